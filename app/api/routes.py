@@ -1,12 +1,21 @@
 import os
+import time
+import asyncio
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from app.core.state import running_system
+from app.core.state import state_store
+from app.core.logging_config import LOG_FILE, log_buffer, tail_file, read_file_since
+from app.core.metrics_history import MAX_HISTORY_POINTS, parse_series
 from app.models.infrastructure import Habitat, HabitatDimensions
 from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.alert import AlertSeverity
+from app.services.ingestion import IngestUnavailableError, PayloadError, UnsupportedPayloadError, decode_payload, decode_msgpack, decode_text
+from app.services.rule_engine import RuleLoadError, parse_rules
+from app.services.watchdog import STATUSES
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -29,41 +38,151 @@ class CreateDinoRequest(BaseModel):
 
 # == ENDPOINTS API ==
 
-# Returns the current list of habitats and their dinos
+def is_cluster(manager) -> bool:
+    return hasattr(manager, "describe")
+
+# The cluster coordinator answers most calls with blocking request/reply
+# round trips to its partitions, so those run on the default executor
+# instead of the event loop; the in-process manager is called directly
+async def call_manager(manager, method, *args):
+    if not is_cluster(manager):
+        return method(*args)
+    return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+
+# Returns the current list of habitats and their dinos. The JSON is cached
+# per park version: If-None-Match with the current ETag gets a 304, and
+# ?since_version=N returns only the habitats changed/removed after N.
 @router.get("/api/habitats")
-async def get_habitats():
-    if not running_system["park"]:
+async def get_habitats(request: Request, since_version: Optional[int] = None):
+    park = state_store.park
+    if not park:
         return []
-    return running_system["park"].habitats
+
+    etag = f'"{park.epoch}-{park.version}"'
+    headers = {"ETag": etag, "X-Park-Version": str(park.version), "Cache-Control": "no-cache"}
+    if etag in (tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers=headers)
+
+    if since_version is not None:
+        return Response(park.habitats_delta_json(since_version), media_type="application/json", headers=headers)
+    return Response(park.habitats_json(), media_type="application/json", headers=headers)
 
 # Returns real-time statistics from the StreamManager
 @router.get("/api/metrics")
 async def get_metrics():
-    manager = running_system["manager"]
+    manager = state_store.manager
     if not manager:
         return {}
-    return manager.get_system_metrics()
+    metrics = await call_manager(manager, manager.get_system_metrics)
+    if state_store.checkpointer:
+        metrics.update(state_store.checkpointer.get_metrics())
+    return metrics
 
-# Read the last 50 lines of the log file
-@router.get("/api/logs")
-async def get_logs():
-    log_path = "logs/jurassic_system.log"
-    
-    if not os.path.exists(log_path):
-        return {"logs": ["Waiting for system logs..."]}
-    
+# Throughput, alert rate, batch size and average bpm over [start, end]
+# (epoch seconds, default last 10 minutes), from the finest history tier
+# covering `start` and downsampled with LTTB to at most `points` per series
+@router.get("/api/metrics/history")
+async def get_metrics_history(series: Optional[str] = None, start: Optional[float] = None,
+                              end: Optional[float] = None, points: int = 500):
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+    end = time.time() if end is None else end
+    start = end - 600 if start is None else start
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
     try:
-        with open(log_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-            return {"logs": [line.strip() for line in lines[-50:]]}
-    except Exception as e:
-        return {"logs": [f"Error reading logs: {str(e)}"]}
+        names = parse_series(series, manager.history.series)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return manager.history.query(names, start, end, max(3, min(points, MAX_HISTORY_POINTS)))
+
+# Same counters and histograms in Prometheus text exposition format
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_prometheus_metrics():
+    manager = state_store.manager
+    if not manager:
+        return PlainTextResponse("", media_type="text/plain; version=0.0.4")
+    return PlainTextResponse(await call_manager(manager, manager.render_prometheus), media_type="text/plain; version=0.0.4")
+
+# == CLUSTER ==
+
+def get_cluster():
+    manager = state_store.manager
+    if not manager or not is_cluster(manager):
+        raise HTTPException(status_code=404, detail="Cluster mode not enabled")
+    return manager
 
+# Partitions, their habitat counts and the current placement
+@router.get("/api/cluster")
+async def get_cluster_status():
+    return get_cluster().describe()
+
+# Starts a new partition and moves its share of habitats to it
+@router.post("/api/cluster/workers", status_code=201)
+def add_cluster_worker():
+    cluster = get_cluster()
+    try:
+        name = cluster.add_worker()
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"status": "joined", "name": name, **cluster.describe()}
+
+# Hands a partition's habitats over to the others and stops it
+@router.delete("/api/cluster/workers/{name}")
+def remove_cluster_worker(name: str):
+    cluster = get_cluster()
+    try:
+        moved = cluster.remove_worker(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Partition not found")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"status": "left", "name": name, "habitats_moved": moved}
+
+# Recent log lines. Served from the in-memory ring buffer by default;
+# source=file reads history from the log file without scanning it.
+# Pass the returned cursor back as `since` to only get newer lines.
+@router.get("/api/logs")
+async def get_logs(limit: int = 50, since: Optional[int] = None, source: str = "memory"):
+    limit = max(1, min(limit, 1000))
+
+    if source == "file":
+        if not os.path.exists(LOG_FILE):
+            return {"logs": ["Waiting for system logs..."], "cursor": 0}
+        try:
+            if since is None:
+                lines, cursor = tail_file(LOG_FILE, limit)
+            else:
+                lines, cursor = read_file_since(LOG_FILE, since, limit)
+        except OSError as e:
+            return {"logs": [f"Error reading logs: {str(e)}"], "cursor": since or 0}
+        return {"logs": [line.strip() for line in lines], "cursor": cursor}
+
+    lines, cursor = log_buffer.get_lines(since or 0, limit)
+    if since is None and not lines:
+        lines = ["Waiting for system logs..."]
+    return {"logs": lines, "cursor": cursor}
+
+
+# Rolling temperature and heart-rate statistics (1m / 5m / 1h windows)
+@router.get("/api/habitats/{habitat_id}/stats")
+async def get_habitat_stats(habitat_id: str):
+    manager = state_store.manager
+    park = state_store.park
+    if not manager or not park:
+        raise HTTPException(status_code=503, detail="System not ready")
+
+    habitat = park.get_habitat(habitat_id)
+    if not habitat:
+        raise HTTPException(status_code=404, detail="Habitat not found")
+
+    return await call_manager(manager, manager.get_habitat_stats, habitat)
 
 # Create a new habitat in the park
 @router.post("/api/habitats")
 async def create_habitat(payload: CreateHabitatRequest):
-    if not running_system["park"]:
+    if not state_store.park:
         raise HTTPException(status_code=503, detail="System not ready")
 
     new_habitat = Habitat(
@@ -76,7 +195,7 @@ async def create_habitat(payload: CreateHabitatRequest):
         )
     )
     
-    running_system["park"].add_habitat(new_habitat)
+    state_store.add_habitat(new_habitat)
     return {"status": "created", "habitat": new_habitat}
 
 # Remove a habitat by its ID
@@ -84,7 +203,7 @@ async def create_habitat(payload: CreateHabitatRequest):
 async def delete_habitat(habitat_id: str):
     try:
         habitat_uuid = UUID(habitat_id)
-        running_system["park"].remove_habitat(habitat_uuid)
+        state_store.remove_habitat(habitat_uuid)
         return {"status": "deleted"}
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid UUID")
@@ -101,41 +220,235 @@ async def create_dinosaur(payload: CreateDinoRequest):
         health_points=100
     )
     
-    habitats = running_system["park"].habitats
-    target_habitat = next((h for h in habitats if str(h.id) == payload.habitat_id), None)
+    # The simulator and the stream manager pick it up from the state store
+    target_habitat = state_store.add_dinosaur(new_dino, payload.habitat_id)
     
     if not target_habitat:
         raise HTTPException(status_code=404, detail="Habitat not found")
-    
-    target_habitat.dinosaur_ids.append(new_dino.id)
-    
-    if running_system["simulator"]:
-        running_system["simulator"].add_dinosaur(new_dino)
-        
-    if running_system["manager"]:
-        running_system["manager"].register_dinosaur(new_dino)
         
     return {"status": "created", "dino": new_dino}
 
 # Remove a dinosaur from the entire system
 @router.delete("/api/dinosaurs/{dino_id}")
 async def delete_dinosaur(dino_id: str):
-    
-    if running_system["simulator"]:
-        running_system["simulator"].remove_dinosaur(dino_id)
-    if running_system["manager"]:
-        running_system["manager"].unregister_dinosaur(dino_id)
-        
+    state_store.remove_dinosaur(dino_id)
+    return {"status": "deleted"}
+
+# == INGESTION ==
+
+# Bulk sensor ingestion (NDJSON, JSON array or msgpack body)
+@router.post("/api/ingest", status_code=202)
+async def ingest_readings(request: Request):
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+
+    try:
+        readings = decode_payload(await request.body(), request.headers.get("content-type"))
+    except UnsupportedPayloadError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except PayloadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        accepted = await call_manager(manager, manager.try_ingest, readings)
+    except IngestUnavailableError as e:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": str(e), "accepted": e.accepted, "credits": manager.available_credits()},
+            headers={"Retry-After": "1"}
+        )
+    if not accepted:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Ingest buffer saturated", "credits": manager.available_credits()},
+            headers={"Retry-After": "1"}
+        )
+
+    return {"accepted": len(readings), "credits": manager.available_credits()}
+
+# Persistent ingest channel: text frames are NDJSON/JSON, binary frames msgpack.
+# Every reply carries the remaining credits so gateways can pace themselves.
+@router.websocket("/ws/ingest")
+async def ingest_socket(websocket: WebSocket):
+    manager = state_store.manager
+    await websocket.accept()
+    if not manager:
+        await websocket.close(code=1013)
+        return
+
+    await websocket.send_json({"credits": manager.available_credits()})
     try:
-        d_uuid = UUID(dino_id)
-        for habitat in running_system["park"].habitats:
-            if d_uuid in habitat.dinosaur_ids:
-                habitat.dinosaur_ids.remove(d_uuid)
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
                 break
+
+            try:
+                if message.get("bytes") is not None:
+                    readings = decode_msgpack(message["bytes"])
+                else:
+                    readings = decode_text(message.get("text") or "")
+            except PayloadError as e:
+                await websocket.send_json({"error": str(e), "credits": manager.available_credits()})
+                continue
+
+            try:
+                accepted = await call_manager(manager, manager.try_ingest, readings)
+            except IngestUnavailableError as e:
+                await websocket.send_json({
+                    "accepted": e.accepted,
+                    "rejected": len(readings) - e.accepted,
+                    "reason": "unavailable",
+                    "credits": manager.available_credits()
+                })
+                continue
+            if accepted:
+                await websocket.send_json({"accepted": len(readings), "credits": manager.available_credits()})
+            else:
+                await websocket.send_json({
+                    "rejected": len(readings),
+                    "reason": "backpressure",
+                    "credits": manager.available_credits()
+                })
+    except WebSocketDisconnect:
+        pass
+
+# == ALERT STREAMING ==
+
+SSE_HEARTBEAT_SEC = 15.0
+
+def parse_alert_filters(severity: Optional[str], habitat_id: Optional[str]):
+    try:
+        severities = [AlertSeverity(s.strip().lower()) for s in severity.split(",") if s.strip()] if severity else None
+        habitat_uuid = UUID(habitat_id) if habitat_id else None
     except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid severity or habitat_id filter")
+    return severities, habitat_uuid
+
+# Server-Sent Events feed of live alerts (?severity=high,critical&habitat_id=...)
+@router.get("/api/alerts/stream")
+async def stream_alerts(request: Request, severity: Optional[str] = None, habitat_id: Optional[str] = None):
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+
+    severities, habitat_uuid = parse_alert_filters(severity, habitat_id)
+    subscription = manager.alert_bus.subscribe(severities, habitat_uuid)
+
+    async def event_source():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(subscription.queue.get(), timeout=SSE_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: alert\ndata: {alert.model_dump_json()}\n\n"
+        finally:
+            manager.alert_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Same feed over WebSocket, one JSON alert per message
+@router.websocket("/ws/alerts")
+async def alerts_socket(websocket: WebSocket, severity: Optional[str] = None, habitat_id: Optional[str] = None):
+    manager = state_store.manager
+    await websocket.accept()
+    if not manager:
+        await websocket.close(code=1013)
+        return
+
+    try:
+        severities, habitat_uuid = parse_alert_filters(severity, habitat_id)
+    except HTTPException as e:
+        await websocket.close(code=1008, reason=e.detail)
+        return
+
+    subscription = manager.alert_bus.subscribe(severities, habitat_uuid)
+    # Watch the socket too, so an idle feed still notices the client leaving
+    receiver = asyncio.create_task(websocket.receive())
+    try:
+        while True:
+            getter = asyncio.create_task(subscription.queue.get())
+            done, _ = await asyncio.wait({receiver, getter}, return_when=asyncio.FIRST_COMPLETED)
+
+            if receiver in done:
+                getter.cancel()
+                if receiver.result()["type"] == "websocket.disconnect":
+                    break
+                receiver = asyncio.create_task(websocket.receive())
+                continue
+
+            await websocket.send_text(getter.result().model_dump_json())
+    except WebSocketDisconnect:
         pass
-            
-    return {"status": "deleted"}
+    finally:
+        receiver.cancel()
+        manager.alert_bus.unsubscribe(subscription)
+
+# == HISTORY ==
+
+HISTORY_DEFAULT_SPAN = 3600.0
+
+def history_range(start: Optional[float], end: Optional[float]):
+    end = time.time() if end is None else end
+    start = end - HISTORY_DEFAULT_SPAN if start is None else start
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return start, end
+
+def parse_habitat_filter(habitat_id: Optional[str]) -> Optional[UUID]:
+    try:
+        return UUID(habitat_id) if habitat_id else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid UUID")
+
+def get_event_store():
+    store = state_store.event_store
+    if not store:
+        raise HTTPException(status_code=503, detail="Event store not available")
+    return store
+
+# Stored sensor readings in [start, end) (epoch seconds, default last hour)
+@router.get("/api/history/readings")
+def get_reading_history(start: Optional[float] = None, end: Optional[float] = None, habitat_id: Optional[str] = None,
+                        sensor_id: Optional[str] = None, sensor_type: Optional[str] = None, limit: int = 1000):
+    start, end = history_range(start, end)
+    readings = get_event_store().query_readings(start, end, parse_habitat_filter(habitat_id), sensor_id, sensor_type, limit)
+    return {"start": start, "end": end, "count": len(readings), "readings": readings}
+
+# Stored alerts in [start, end)
+@router.get("/api/history/alerts")
+def get_alert_history(start: Optional[float] = None, end: Optional[float] = None, habitat_id: Optional[str] = None,
+                      sensor_id: Optional[str] = None, severity: Optional[str] = None, limit: int = 1000):
+    start, end = history_range(start, end)
+    alerts = get_event_store().query_alerts(start, end, parse_habitat_filter(habitat_id), sensor_id, severity, limit)
+    return {"start": start, "end": end, "count": len(alerts), "alerts": alerts}
+
+# Health of every sensor seen (ok / stale / low_battery / clock_skew), ordered
+# by id. Pass the returned `next` back as `after` for the following page.
+@router.get("/api/sensors")
+async def get_sensors(status: Optional[str] = None, habitat_id: Optional[str] = None,
+                      after: Optional[str] = None, limit: int = 100):
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+    if status is not None and status not in STATUSES:
+        raise HTTPException(status_code=400, detail=f"status must be one of: {', '.join(STATUSES)}")
+    return await call_manager(manager, manager.list_sensors, status, parse_habitat_filter(habitat_id), after,
+                              max(1, min(limit, 1000)))
+
+# Readings of a single sensor
+@router.get("/api/sensors/{sensor_id}/readings")
+def get_sensor_readings(sensor_id: str, start: Optional[float] = None, end: Optional[float] = None, limit: int = 1000):
+    start, end = history_range(start, end)
+    readings = get_event_store().query_readings(start, end, sensor_id=sensor_id, limit=limit)
+    return {"sensor_id": sensor_id, "start": start, "end": end, "count": len(readings), "readings": readings}
 
 # == ENDPOINTS VIEWS ==
 
@@ -145,11 +458,11 @@ async def read_root(request: Request):
 
 @router.get("/habitat/{habitat_id}", response_class=HTMLResponse)
 async def read_habitat(request: Request, habitat_id: str):
-    if not running_system["park"]:
+    park = state_store.park
+    if not park:
         raise HTTPException(status_code=503, detail="System initializing")
 
-    habitats = running_system["park"].habitats
-    target = next((h for h in habitats if str(h.id) == habitat_id), None)
+    target = park.get_habitat(habitat_id)
     
     if not target:
         raise HTTPException(status_code=404, detail="Habitat not found")
@@ -161,4 +474,45 @@ async def read_habitat(request: Request, habitat_id: str):
 
 @router.get("/metrics-view", response_class=HTMLResponse)
 async def read_metrics_page(request: Request):
-    return templates.TemplateResponse("metrics.html", {"request": request})
\ No newline at end of file
+    return templates.TemplateResponse("metrics.html", {"request": request})
+
+# == RULES ==
+
+def rules_summary(manager):
+    return {
+        "version": manager.rules.version,
+        "path": manager.rules.path,
+        "rules": [rule.model_dump(mode="json") for rule in manager.rules.definitions]
+    }
+
+# Active alert rules and their version
+@router.get("/api/rules")
+async def get_rules():
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+    return rules_summary(manager)
+
+# Replaces the active rules in memory (same format as the rules file)
+@router.put("/api/rules")
+async def replace_rules(request: Request):
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+    try:
+        await call_manager(manager, manager.replace_rules, parse_rules(await request.json()))
+    except (RuleLoadError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return rules_summary(manager)
+
+# Re-reads the rules file now instead of waiting for the watcher
+@router.post("/api/rules/reload")
+async def reload_rules():
+    manager = state_store.manager
+    if not manager:
+        raise HTTPException(status_code=503, detail="System not ready")
+    try:
+        await call_manager(manager, manager.reload_rules)
+    except RuleLoadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return rules_summary(manager)
@@ -1,33 +1,209 @@
+import atexit
 import logging
 import os
+import queue
 import sys
+import threading
+from collections import deque
+from itertools import islice
+from logging.handlers import QueueHandler, RotatingFileHandler, TimedRotatingFileHandler
 
-def setup_logging():
-    log_dir = "logs"
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+LOG_FILE = os.path.join("logs", "jurassic_system.log")
+
+# == IN-MEMORY LOG TAIL ==
+# Keeps the last N formatted records so /api/logs never touches the disk.
+# Every record gets a monotonically increasing sequence number that clients
+# pass back as a cursor to only fetch newer lines.
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity: int = 1000):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.last_seq = 0
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        # handle() already holds self.lock here
+        self.last_seq += 1
+        self.records.append((self.last_seq, line))
+
+    def get_lines(self, since: int = 0, limit: int = 50):
+        with self.lock:
+            last_seq = self.last_seq
+            if since >= last_seq:
+                return [], last_seq
+            # Sequence numbers are contiguous, so the records newer than the
+            # cursor are exactly the tail of the deque
+            newer = min(last_seq - since, len(self.records), limit)
+            lines = [line for _, line in islice(reversed(self.records), newer)][::-1]
+        return lines, last_seq
+
+log_buffer = RingBufferHandler()
+
+# == FILE HISTORY ==
+
+TAIL_BLOCK_SIZE = 8192
+
+# Last `limit` lines of a file, reading backwards in blocks from the end
+def tail_file(path: str, limit: int = 50):
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = position = f.tell()
+        data = b""
+        while position > 0 and data.count(b"\n") <= limit:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    return lines[-limit:] if limit else [], size
+
+# Complete lines appended after byte `offset`. Falls back to a tail when the
+# cursor is stale (file rotated or truncated) or too far behind.
+def read_file_since(path: str, offset: int, limit: int = 50):
+    size = os.path.getsize(path)
+    if offset > size or size - offset > TAIL_BLOCK_SIZE * limit:
+        return tail_file(path, limit)
+
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+
+    # Only hand out whole lines; a partial last line is picked up next time
+    end = data.rfind(b"\n") + 1
+    lines = data[:end].decode("utf-8", errors="replace").splitlines()
+    return lines[-limit:], offset + end
+
+# == NON-BLOCKING WRITER ==
+# Callers only push records onto a queue; a dedicated thread drains it in
+# batches, formats and writes them, and flushes once per batch.
+
+class DeferredFlushMixin:
+    deferred = False
+
+    def flush(self):
+        if not self.deferred:
+            super().flush()
+
+class BatchedRotatingFileHandler(DeferredFlushMixin, RotatingFileHandler):
+    pass
+
+class BatchedTimedRotatingFileHandler(DeferredFlushMixin, TimedRotatingFileHandler):
+    pass
 
-    log_file = os.path.join(log_dir, "jurassic_system.log")
+class BatchedStreamHandler(DeferredFlushMixin, logging.StreamHandler):
+    pass
+
+class FastQueueHandler(QueueHandler):
+    # Records are handed over as-is and formatted on the writer thread
+    def prepare(self, record):
+        return record
+
+_STOP = object()
+
+class AsyncLogWriter:
+    def __init__(self, log_queue: queue.SimpleQueue, handlers: list, batch_size: int = 512):
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="jurassic-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self.queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = _STOP in batch
+            self._write([record for record in batch if record is not _STOP])
+            if stop:
+                return
+
+    def _write(self, records: list):
+        for handler in self.handlers:
+            handler.deferred = True
+            try:
+                for record in records:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+            finally:
+                handler.deferred = False
+                handler.flush()
+
+_writer = None
+
+def setup_logging(async_mode: bool = True, log_file: str = LOG_FILE, rotation: str = "size",
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, console: bool = True):
+    global _writer
+    shutdown_logging()
+
+    log_dir = os.path.dirname(log_file)
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
 
     formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
 
-    file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
+    if rotation == "time":
+        file_handler = BatchedTimedRotatingFileHandler(log_file, when="midnight", backupCount=backup_count, encoding='utf-8')
+    else:
+        file_handler = BatchedRotatingFileHandler(log_file, mode='a', maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
     file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.INFO)
 
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setFormatter(formatter)
-    console_handler.setLevel(logging.INFO)
+    handlers = [file_handler, log_buffer]
+
+    if console:
+        console_handler = BatchedStreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(logging.INFO)
+        handlers.append(console_handler)
+
+    log_buffer.setFormatter(formatter)
+    log_buffer.setLevel(logging.INFO)
 
     root_logger = logging.getLogger()
     if root_logger.handlers:
         root_logger.handlers = []
     
     root_logger.setLevel(logging.INFO)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
+
+    if async_mode:
+        log_queue = queue.SimpleQueue()
+        root_logger.addHandler(FastQueueHandler(log_queue))
+        _writer = AsyncLogWriter(log_queue, handlers)
+        _writer.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
 
     app_logger = logging.getLogger("JurassicReactor")
     app_logger.setLevel(logging.INFO)
     
-    print(f">>> Logging setup complete. Writing to: {os.path.abspath(log_file)}")
\ No newline at end of file
+    print(f">>> Logging setup complete ({'async' if async_mode else 'sync'}). Writing to: {os.path.abspath(log_file)}")
+
+# Drains pending records; safe to call more than once
+def shutdown_logging():
+    global _writer
+    if _writer:
+        _writer.stop()
+        _writer = None
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,200 @@
+import math
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+# == COUNTERS ==
+# Totals plus a ring of 1-second slots, so rates over the last 10s / 1m are
+# windowed instead of averaged over the whole uptime. Counters and histograms
+# are only updated from the event loop thread; they take no locks.
+
+RATE_SLOTS = 60
+RATE_WINDOWS = {"10s": 10, "1m": 60}
+
+class Counter:
+    def __init__(self):
+        self.total = 0
+        self._slots = [0] * RATE_SLOTS
+        self._created = time.monotonic()
+        self._second = int(self._created)
+
+    def _advance(self, second: int):
+        gap = second - self._second
+        if gap <= 0:
+            return
+        for s in range(self._second + 1, self._second + 1 + min(gap, RATE_SLOTS)):
+            self._slots[s % RATE_SLOTS] = 0
+        self._second = second
+
+    def inc(self, amount: int = 1):
+        second = int(time.monotonic())
+        self._advance(second)
+        self._slots[second % RATE_SLOTS] += amount
+        self.total += amount
+
+    # Events per second over the last `window` seconds (current second included)
+    def rate(self, window: int) -> float:
+        now = time.monotonic()
+        second = int(now)
+        self._advance(second)
+        window = min(window, RATE_SLOTS)
+        count = sum(self._slots[(second - k) % RATE_SLOTS] for k in range(window))
+        # Young counters divide by their age, not by the full window
+        span = min(window - 1 + (now - second), now - self._created)
+        return count / span if span > 0 else 0.0
+
+# == HISTOGRAMS ==
+# HDR-style log-linear buckets over integer microseconds: values below 16us
+# get exact buckets, above that every power of two is split into 16 linear
+# sub-buckets (<= 6.25% relative error) up to 2^32us (~71 min).
+
+SUB_BUCKETS = 16
+MAX_SHIFT = 27
+N_BUCKETS = SUB_BUCKETS * (MAX_SHIFT + 2)
+MAX_MICROS = (2 * SUB_BUCKETS << MAX_SHIFT) - 1
+
+# Percentiles are reported over the current + previous interval (1-2 min)
+RECENT_INTERVAL = 60.0
+
+PROMETHEUS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _bucket_upper(index: int) -> int:
+    if index < SUB_BUCKETS:
+        return index + 1
+    shift = index // SUB_BUCKETS - 1
+    return (index % SUB_BUCKETS + SUB_BUCKETS + 1) << shift
+
+_UPPER_MICROS = np.array([_bucket_upper(i) for i in range(N_BUCKETS)], dtype=np.int64)
+# Number of buckets entirely below each Prometheus `le` bound
+_PROMETHEUS_CUTS = np.searchsorted(_UPPER_MICROS, [b * 1e6 for b in PROMETHEUS_BUCKETS], side="right")
+
+def _bucket_indexes(micros: np.ndarray) -> np.ndarray:
+    micros = np.clip(micros, 0, MAX_MICROS)
+    _, exponent = np.frexp(micros)
+    shift = np.maximum(exponent - 5, 0)
+    return np.where(micros < SUB_BUCKETS, micros, SUB_BUCKETS * (shift + 1) + (micros >> shift) - SUB_BUCKETS)
+
+class Histogram:
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._total = np.zeros(N_BUCKETS, dtype=np.int64)
+        self._current = np.zeros(N_BUCKETS, dtype=np.int64)
+        self._previous = np.zeros(N_BUCKETS, dtype=np.int64)
+        self._rotated_at = time.monotonic()
+
+    def _rotate(self):
+        now = time.monotonic()
+        if now - self._rotated_at < RECENT_INTERVAL:
+            return
+        if now - self._rotated_at < 2 * RECENT_INTERVAL:
+            self._previous, self._current = self._current, self._previous
+        else:
+            self._previous[:] = 0
+        self._current[:] = 0
+        self._rotated_at = now
+
+    def record(self, seconds: float):
+        self.record_many(np.array([seconds], dtype=np.float64))
+
+    def record_many(self, seconds):
+        values = np.asarray(seconds, dtype=np.float64)
+        if values.size == 0:
+            return
+        self._rotate()
+        counts = np.bincount(_bucket_indexes((values * 1e6).astype(np.int64)), minlength=N_BUCKETS)
+        self._total += counts
+        self._current += counts
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.max = max(self.max, float(values.max()))
+
+    # Upper bound of the bucket holding the q-th percentile, in seconds
+    def percentile(self, q: float, recent: bool = True) -> Optional[float]:
+        if recent:
+            self._rotate()
+            counts = self._current + self._previous
+        else:
+            counts = self._total
+        cumulative = np.cumsum(counts)
+        total = int(cumulative[-1])
+        if total == 0:
+            return None
+        index = int(np.searchsorted(cumulative, max(1, math.ceil(q / 100 * total))))
+        return int(_UPPER_MICROS[index]) / 1e6
+
+    def prometheus_buckets(self):
+        cumulative = np.concatenate(([0], np.cumsum(self._total)))
+        return [(bound, int(cumulative[cut])) for bound, cut in zip(PROMETHEUS_BUCKETS, _PROMETHEUS_CUTS)]
+
+# == REGISTRY ==
+# Single source for /api/metrics (JSON) and /metrics (Prometheus text).
+# Metrics are keyed by name + sorted label pairs; gauges are callbacks read
+# at scrape time.
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "jurassic"):
+        self.prefix = prefix
+        self._kinds: Dict[str, Tuple[str, str]] = {}
+        self._series: Dict[str, Dict[LabelKey, object]] = {}
+
+    def _get(self, kind: str, name: str, description: str, labels: dict, factory):
+        if name not in self._kinds:
+            self._kinds[name] = (kind, description)
+            self._series[name] = {}
+        key = _label_key(labels)
+        series = self._series[name]
+        if key not in series:
+            series[key] = factory()
+        return series[key]
+
+    def counter(self, name: str, description: str = "", **labels) -> Counter:
+        return self._get("counter", name, description, labels, Counter)
+
+    def histogram(self, name: str, description: str = "", **labels) -> Histogram:
+        return self._get("histogram", name, description, labels, Histogram)
+
+    # Re-registering a gauge replaces its callback
+    def gauge(self, name: str, fn: Callable[[], float], description: str = "", **labels):
+        self._get("gauge", name, description, labels, lambda: fn)
+        self._series[name][_label_key(labels)] = fn
+
+    def series(self, name: str) -> Dict[LabelKey, object]:
+        return self._series.get(name, {})
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, (kind, description) in self._kinds.items():
+            full_name = f"{self.prefix}_{name}"
+            if description:
+                lines.append(f"# HELP {full_name} {description}")
+            lines.append(f"# TYPE {full_name} {kind}")
+            for key, metric in self._series[name].items():
+                if kind == "counter":
+                    lines.append(f"{full_name}{_labels(key)} {metric.total}")
+                elif kind == "gauge":
+                    lines.append(f"{full_name}{_labels(key)} {_number(metric())}")
+                else:
+                    for bound, count in metric.prometheus_buckets():
+                        lines.append(f"{full_name}_bucket{_labels(key, le=repr(bound))} {count}")
+                    lines.append(f"{full_name}_bucket{_labels(key, le='+Inf')} {metric.count}")
+                    lines.append(f"{full_name}_sum{_labels(key)} {metric.sum!r}")
+                    lines.append(f"{full_name}_count{_labels(key)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _labels(key: LabelKey, **extra) -> str:
+    pairs = list(key) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+def _number(value) -> str:
+    return repr(float(value)) if value is not None else "NaN"
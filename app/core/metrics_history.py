@@ -0,0 +1,157 @@
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+# == METRICS HISTORY ==
+# Round-robin tiers of fixed size, like RRDtool: every tier is a ring of
+# (step-second) buckets holding the sum and count of the samples that fell
+# in them, so a bucket reads back as the mean over its step. Each sample
+# goes into every tier; a slot is reused when its bucket number comes
+# around again. Memory is fixed at construction, whatever the uptime.
+
+HISTORY_INTERVAL = 1.0
+HISTORY_SERIES = ("throughput", "alert_rate", "batch_size", "avg_bpm")
+# (step seconds, slots): 1s x 10 min, 10s x 6 h, 1 min x 7 days
+HISTORY_TIERS = ((1, 600), (10, 2160), (60, 10080))
+MAX_HISTORY_POINTS = 2000
+
+class _Tier:
+    def __init__(self, step: int, slots: int, series: int):
+        self.step = step
+        self.slots = slots
+        self.buckets = np.full(slots, -1, dtype=np.int64)
+        self.sums = np.zeros((slots, series), dtype=np.float64)
+        self.counts = np.zeros((slots, series), dtype=np.int32)
+
+    @property
+    def span(self) -> int:
+        return self.step * self.slots
+
+    def record(self, now: float, values: np.ndarray, present: np.ndarray):
+        bucket = int(now // self.step)
+        slot = bucket % self.slots
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.sums[slot] = 0.0
+            self.counts[slot] = 0
+        self.sums[slot, present] += values[present]
+        self.counts[slot, present] += 1
+
+    # Bucket start times and means (NaN where no sample) in [start, end], oldest first
+    def read(self, start: float, end: float) -> Tuple[np.ndarray, np.ndarray]:
+        first, last = int(start // self.step), int(end // self.step)
+        rows = np.flatnonzero((self.buckets >= first) & (self.buckets <= last))
+        rows = rows[np.argsort(self.buckets[rows])]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = self.sums[rows] / self.counts[rows]
+        return self.buckets[rows] * float(self.step), means
+
+class MetricsHistory:
+    def __init__(self, series: Iterable[str] = HISTORY_SERIES, tiers=HISTORY_TIERS):
+        self.series = tuple(series)
+        self._columns = {name: k for k, name in enumerate(self.series)}
+        self.tiers = [_Tier(step, slots, len(self.series)) for step, slots in tiers]
+        self._last_totals: Optional[Dict[str, float]] = None
+        self._last_time = 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.buckets.nbytes + t.sums.nbytes + t.counts.nbytes for t in self.tiers)
+
+    def record(self, values: Dict[str, Optional[float]], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        row = np.zeros(len(self.series))
+        present = np.zeros(len(self.series), dtype=bool)
+        for name, value in values.items():
+            k = self._columns.get(name)
+            if k is not None and value is not None:
+                row[k] = value
+                present[k] = True
+        for tier in self.tiers:
+            tier.record(now, row, present)
+
+    # Counters are cumulative totals turned into per-second rates against the
+    # previous sample; gauges are recorded as they are
+    def sample(self, counters: Dict[str, float], gauges: Dict[str, Optional[float]], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        values = dict(gauges)
+        if self._last_totals is not None and now > self._last_time:
+            elapsed = now - self._last_time
+            for name, total in counters.items():
+                values[name] = max(total - self._last_totals.get(name, total), 0) / elapsed
+        self._last_totals = dict(counters)
+        self._last_time = now
+        self.record(values, now)
+
+    def export_state(self) -> dict:
+        return {"tiers": [{"step": t.step, "buckets": t.buckets.copy(), "sums": t.sums.copy(), "counts": t.counts.copy()}
+                          for t in self.tiers]}
+
+    # Tiers whose step and shape still match are restored; others start empty
+    def restore_state(self, state: dict):
+        for tier, saved in zip(self.tiers, state.get("tiers", [])):
+            if saved["step"] == tier.step and saved["sums"].shape == tier.sums.shape:
+                tier.buckets[:] = saved["buckets"]
+                tier.sums[:] = saved["sums"]
+                tier.counts[:] = saved["counts"]
+
+    # Finest tier still holding `start` (give or take one step), else the coarsest
+    def tier_for(self, start: float, now: Optional[float] = None) -> _Tier:
+        now = time.time() if now is None else now
+        for tier in self.tiers:
+            if now - tier.span - tier.step <= start:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, names: Iterable[str], start: float, end: float,
+              max_points: int = 500, now: Optional[float] = None) -> dict:
+        tier = self.tier_for(start, now)
+        stamps, means = tier.read(start, end)
+        series = {}
+        for name in names:
+            column = means[:, self._columns[name]]
+            valid = ~np.isnan(column)
+            x, y = stamps[valid], column[valid]
+            keep = lttb(x, y, max_points)
+            series[name] = [[t, round(v, 3)] for t, v in zip(x[keep].tolist(), y[keep].tolist())]
+        return {"start": start, "end": end, "step": tier.step, "series": series}
+
+# == DOWNSAMPLING ==
+# Largest-Triangle-Three-Buckets: keeps the first and last points and, for
+# each of threshold - 2 buckets in between, the point forming the largest
+# triangle with the previously kept point and the mean of the next bucket.
+# Preserves peaks and dips that plain averaging flattens.
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    n = len(x)
+    if threshold >= n or n <= 2:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1])[:max(threshold, 1)]
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    kept = np.empty(threshold, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        xa, ya = x[a], y[a]
+        areas = np.abs((xa - next_x) * (y[lo:hi] - ya) - (xa - x[lo:hi]) * (next_y - ya))
+        a = lo + int(np.argmax(areas))
+        kept[i + 1] = a
+    return kept
+
+def parse_series(requested: Optional[str], available: Iterable[str]) -> List[str]:
+    available = list(available)
+    if not requested:
+        return available
+    names = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown series: {', '.join(unknown)}")
+    return names
@@ -1,5 +1,177 @@
-running_system = {
-    "manager": None,
-    "park": None,
-    "simulator": None
-}
\ No newline at end of file
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+logger = logging.getLogger("JurassicReactor")
+
+# == STATE STORE ==
+# Copy-on-write park state shared by the routes, the simulator and the
+# stream pipeline. Readers call snapshot() (a single attribute read, no
+# lock) and use that snapshot for a whole request or batch; it is never
+# mutated afterwards. Writers serialize on a lock, build the next Park and
+# dinosaur map from copies, publish them with one reference swap and notify
+# subscribers in version order.
+
+HABITAT_ADDED = "habitat_added"
+HABITAT_REMOVED = "habitat_removed"
+DINOSAUR_ADDED = "dinosaur_added"
+DINOSAUR_REMOVED = "dinosaur_removed"
+RESET = "reset"
+
+class StateChange:
+    __slots__ = ("kind", "version", "habitat_ids", "dinosaur_id")
+
+    def __init__(self, kind: str, version: int, habitat_ids: Tuple[UUID, ...] = (), dinosaur_id: Optional[str] = None):
+        self.kind = kind
+        self.version = version
+        # Habitats whose contents changed (or were removed)
+        self.habitat_ids = habitat_ids
+        self.dinosaur_id = dinosaur_id
+
+    def __repr__(self):
+        return f"StateChange({self.kind!r}, v{self.version}, habitats={len(self.habitat_ids)}, dinosaur={self.dinosaur_id!r})"
+
+class StateSnapshot:
+    __slots__ = ("version", "park", "dinosaurs")
+
+    def __init__(self, version: int, park, dinosaurs: Dict[str, object]):
+        self.version = version
+        self.park = park
+        # str(dino.id) -> Dinosaur; a fresh dict per version, treat as read-only
+        self.dinosaurs = dinosaurs
+
+Subscriber = Callable[[StateSnapshot, StateChange], None]
+
+class StateStore:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._snapshot = StateSnapshot(0, None, {})
+        self._subscribers: List[Subscriber] = []
+
+        # Running services, set once at boot
+        self.manager = None
+        self.simulator = None
+        self.event_store = None
+        self.checkpointer = None
+
+    def snapshot(self) -> StateSnapshot:
+        return self._snapshot
+
+    @property
+    def park(self):
+        return self._snapshot.park
+
+    # Runs fn(snapshot) with writers held off, so no change is published
+    # (or seen by subscribers) until it returns
+    def with_snapshot(self, fn):
+        with self._lock:
+            return fn(self._snapshot)
+
+    # Subscribers run on the writer's thread, in version order; they must
+    # not write to the store. Returns a callable that unsubscribes.
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+        return unsubscribe
+
+    def _publish(self, park, dinosaurs: Dict[str, object], kind: str, habitat_ids: Iterable[UUID] = (),
+                 dinosaur_id: Optional[str] = None) -> StateSnapshot:
+        snapshot = StateSnapshot(self._snapshot.version + 1, park, dinosaurs)
+        self._snapshot = snapshot
+        change = StateChange(kind, snapshot.version, tuple(habitat_ids), dinosaur_id)
+        for callback in list(self._subscribers):
+            try:
+                callback(snapshot, change)
+            except Exception as e:
+                logger.error(f"State subscriber failed on {change}: {e}")
+        return snapshot
+
+    # == WRITERS ==
+
+    # `dinosaurs` is either an iterable of dinosaurs or a registry already keyed by str(id)
+    def load(self, park, dinosaurs: Iterable) -> StateSnapshot:
+        registry = dict(dinosaurs) if isinstance(dinosaurs, dict) else {str(d.id): d for d in dinosaurs}
+        with self._lock:
+            return self._publish(park, registry, RESET, [h.id for h in park.habitats])
+
+    def add_habitat(self, habitat) -> StateSnapshot:
+        with self._lock:
+            current = self._snapshot
+            park = current.park.copy_on_write()
+            park.add_habitat(habitat)
+            return self._publish(park, current.dinosaurs, HABITAT_ADDED, [habitat.id])
+
+    # Dinosaurs of a removed habitat stay registered, unassigned, unless
+    # drop_dinosaurs is set (a cluster partition handing the habitat over)
+    def remove_habitat(self, habitat_id: UUID, drop_dinosaurs: bool = False) -> bool:
+        with self._lock:
+            current = self._snapshot
+            habitat = current.park.get_habitat(habitat_id)
+            if habitat is None:
+                return False
+            park = current.park.copy_on_write()
+            park.remove_habitat(habitat_id)
+            dinosaurs = current.dinosaurs
+            if drop_dinosaurs:
+                gone = {str(d) for d in habitat.dinosaur_ids}
+                dinosaurs = {k: d for k, d in dinosaurs.items() if k not in gone}
+            self._publish(park, dinosaurs, HABITAT_REMOVED, [habitat_id])
+            return True
+
+    # Replaces a habitat and the dinosaurs registered for it in one version
+    # (cluster partitions receive habitats with their dinosaurs this way)
+    def upsert_habitat(self, habitat, dinosaurs: Iterable = ()) -> StateSnapshot:
+        with self._lock:
+            current = self._snapshot
+            park = current.park.copy_on_write()
+            registry = dict(current.dinosaurs)
+            previous = park.get_habitat(habitat.id)
+            if previous is not None:
+                for dino_id in previous.dinosaur_ids:
+                    registry.pop(str(dino_id), None)
+                park.remove_habitat(habitat.id)
+            park.add_habitat(habitat)
+            registry.update((str(d.id), d) for d in dinosaurs)
+            return self._publish(park, registry, HABITAT_ADDED, [habitat.id])
+
+    # Registers the dinosaur and moves it into the habitat; None if the habitat does not exist
+    def add_dinosaur(self, dino, habitat_id) -> Optional[object]:
+        with self._lock:
+            current = self._snapshot
+            habitat = current.park.get_habitat(habitat_id)
+            if habitat is None:
+                return None
+            previous = current.park.get_dinosaur_habitat(dino.id)
+            touched = [habitat.id] + ([previous.id] if previous and previous.id != habitat.id else [])
+            park = current.park.copy_on_write(touched)
+            habitat = park.assign_dinosaur(habitat.id, dino.id)
+            dinosaurs = dict(current.dinosaurs)
+            dinosaurs[str(dino.id)] = dino
+            self._publish(park, dinosaurs, DINOSAUR_ADDED, touched, str(dino.id))
+            return habitat
+
+    def remove_dinosaur(self, dino_id: str) -> bool:
+        with self._lock:
+            current = self._snapshot
+            key = str(dino_id)
+            try:
+                habitat = current.park.get_dinosaur_habitat(UUID(key))
+            except ValueError:
+                habitat = None
+            if key not in current.dinosaurs and habitat is None:
+                return False
+            park = current.park
+            if habitat is not None:
+                park = park.copy_on_write([habitat.id])
+                park.unassign_dinosaur(UUID(key))
+            dinosaurs = {k: d for k, d in current.dinosaurs.items() if k != key}
+            self._publish(park, dinosaurs, DINOSAUR_REMOVED, [habitat.id] if habitat else [], key)
+            return True
+
+state_store = StateStore()
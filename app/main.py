@@ -8,15 +8,21 @@ from contextlib import asynccontextmanager
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.logging_config import setup_logging
-from app.core.state import running_system
+from app.core.state import state_store
 from app.services.stream_manager import JurassicStreamManager
-from app.services.simulator import SensorSimulator
+from app.services.cluster import ClusterCoordinator
+from app.services.simulator import SensorSimulator, build_synthetic_park
+from app.services.event_store import EventStore
+from app.services.checkpoint import Checkpointer, CHECKPOINT_INTERVAL
+from app.services.rule_engine import RuleEngine, DEFAULT_RULES_FILE
+from app.services.anomaly import AnomalySettings
+from app.services.watchdog import WatchdogSettings
 from app.api.routes import router
 
 from app.models.infrastructure import Park, Habitat, HabitatDimensions
 from app.models.dinosaur import Dinosaur, DinoCategory
 
-setup_logging()
+setup_logging(async_mode=os.environ.get("JURASSIC_LOG_MODE", "async") != "sync")
 
 # == INITIAL SETUP ==
 
@@ -62,38 +68,129 @@ def setup_infrastructure():
     
     return park, [rex, blue, mosa]
 
+# == SIMULATION MODES ==
+# JURASSIC_SIM_MODE: "random" (default trickle), "load" (JURASSIC_SIM_RATE events/s)
+# or "replay" (JURASSIC_REPLAY_FILE at JURASSIC_REPLAY_SPEED x).
+# JURASSIC_SIM_HABITATS swaps the demo park for a seeded synthetic one.
+
+def _env_seed():
+    seed = os.environ.get("JURASSIC_SIM_SEED")
+    return int(seed) if seed else None
+
+def create_sensor_subscription(simulator: SensorSimulator, manager: JurassicStreamManager):
+    mode = os.environ.get("JURASSIC_SIM_MODE", "random")
+    on_error = lambda e: print(f"CRITICAL STREAM ERROR: {e}")
+
+    if mode == "load":
+        stream = simulator.create_load_stream(float(os.environ.get("JURASSIC_SIM_RATE", "1000")))
+        return stream.subscribe(on_next=manager.on_sensor_batch, on_error=on_error)
+
+    if mode == "replay":
+        stream = simulator.create_replay_stream(
+            os.environ["JURASSIC_REPLAY_FILE"],
+            speed=float(os.environ.get("JURASSIC_REPLAY_SPEED", "1.0"))
+        )
+        return stream.subscribe(
+            on_next=manager.on_sensor_batch,
+            on_error=on_error,
+            on_completed=lambda: print(">>> REPLAY FINISHED.")
+        )
+
+    sensor_stream = rx.merge(
+        simulator.create_temperature_stream(2.0),
+        simulator.create_motion_stream(3.0),
+        simulator.create_heart_rate_stream(1.0)
+    )
+    return sensor_stream.subscribe(
+        on_next=lambda x: manager.on_sensor_data(x),
+        on_error=on_error
+    )
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print(">>> SYSTEM BOOT: INITIATING JURASSIC PARK PROTOCOLS...")
     
-    park, dinos = setup_infrastructure()
+    # Warm restart: the last checkpoint (plus its journal) wins over the demo
+    # or synthetic park. JURASSIC_CHECKPOINT_DIR="" disables checkpoints.
+    checkpoint_dir = os.environ.get("JURASSIC_CHECKPOINT_DIR", "data/checkpoint")
+    checkpointer = Checkpointer(
+        checkpoint_dir, interval=float(os.environ.get("JURASSIC_CHECKPOINT_INTERVAL", CHECKPOINT_INTERVAL))
+    ) if checkpoint_dir else None
+    restored = checkpointer.load() if checkpointer else None
+
+    synthetic_habitats = int(os.environ.get("JURASSIC_SIM_HABITATS", "0"))
+    if restored:
+        park, dinos = restored.park, restored.dinosaurs
+    elif synthetic_habitats:
+        park, dinos = build_synthetic_park(
+            synthetic_habitats,
+            int(os.environ.get("JURASSIC_SIM_DINOS_PER_HABITAT", "1")),
+            seed=_env_seed()
+        )
+    else:
+        park, dinos = setup_infrastructure()
     
-    running_system["park"] = park
+    state_store.load(park, restored.registry if restored else dinos)
+    park = state_store.park
+
+    event_store = EventStore(os.environ.get("JURASSIC_EVENT_DB", "data/jurassic_events.db"))
+    state_store.event_store = event_store
     
-    manager = JurassicStreamManager(park, dinos)
+    rules = RuleEngine.from_file(park, os.environ.get("JURASSIC_RULES_FILE", DEFAULT_RULES_FILE))
+    # Learned baselines; JURASSIC_ANOMALY_SEASONAL=1 adds one per hour of day
+    anomaly_settings = AnomalySettings(
+        enabled=os.environ.get("JURASSIC_ANOMALY", "1") != "0",
+        seasonal=os.environ.get("JURASSIC_ANOMALY_SEASONAL", "0") == "1"
+    )
+    # Silent sensors, low batteries and clock skew; JURASSIC_WATCHDOG=0 disables it
+    watchdog_settings = WatchdogSettings(
+        enabled=os.environ.get("JURASSIC_WATCHDOG", "1") != "0",
+        stale_after=float(os.environ.get("JURASSIC_SENSOR_STALE_AFTER", "120"))
+    )
+    # JURASSIC_CLUSTER_WORKERS > 0 partitions the habitats over that many
+    # processes (use it instead of uvicorn --workers, which splits the park)
+    cluster_workers = int(os.environ.get("JURASSIC_CLUSTER_WORKERS", "0"))
+    if cluster_workers:
+        manager = ClusterCoordinator(park, dinos, cluster_workers, event_store=event_store, rules=rules,
+                                     anomaly_settings=anomaly_settings, watchdog_settings=watchdog_settings)
+    else:
+        manager = JurassicStreamManager(
+            park, dinos,
+            workers=int(os.environ.get("JURASSIC_EVAL_WORKERS", "0")),
+            event_store=event_store,
+            rules=rules,
+            anomaly_settings=anomaly_settings,
+            watchdog_settings=watchdog_settings
+        )
+    if restored and restored.stats:
+        manager.restore_state(restored.stats)
     manager.initialize()
-    running_system["manager"] = manager
+    state_store.manager = manager
     
-    simulator = SensorSimulator(park, dinos)
-    running_system["simulator"] = simulator
-    
-    sensor_stream = rx.merge(
-        simulator.create_temperature_stream(2.0),
-        simulator.create_motion_stream(3.0),
-        simulator.create_heart_rate_stream(1.0)
-    )
+    simulator = SensorSimulator(park, dinos, seed=_env_seed())
+    state_store.simulator = simulator
+
+    # Both follow habitat/dinosaur changes made through the state store
+    unsubscribe = [state_store.subscribe(manager.on_state_change), state_store.subscribe(simulator.on_state_change)]
+    if checkpointer:
+        state_store.checkpointer = checkpointer
+        unsubscribe.append(state_store.subscribe(checkpointer.on_state_change))
+        checkpointer.start(state_store, manager)
     
-    sub = sensor_stream.subscribe(
-        on_next=lambda x: manager.on_sensor_data(x),
-        on_error=lambda e: print(f"CRITICAL STREAM ERROR: {e}")
-    )
+    sub = create_sensor_subscription(simulator, manager)
     
     print(">>> SYSTEM ONLINE: SENSORS ACTIVE.")
     
     yield
     
     print(">>> SYSTEM SHUTDOWN.")
+    for cancel in unsubscribe:
+        cancel()
     sub.dispose()
+    if checkpointer:
+        checkpointer.close()
+    manager.shutdown()
+    event_store.close()
 
 app = FastAPI(
     title="Jurassic Park Reactive System",
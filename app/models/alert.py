@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from typing import Optional
 from uuid import UUID, uuid4
 from pydantic import BaseModel, Field
 
@@ -13,6 +14,10 @@ class Alert(BaseModel):
     id: UUID = Field(default_factory=uuid4)
     timestamp: datetime = Field(default_factory=datetime.utcnow)
     sensor_id: str
+    habitat_id: Optional[UUID] = None
     severity: AlertSeverity
     message: str
-    triggered_value: float | str | int
\ No newline at end of file
+    triggered_value: float | str | int
+    rule: Optional[str] = None
+    # Set when the alert belongs to a correlated incident (AlertProcessor)
+    incident_id: Optional[UUID] = None
@@ -0,0 +1,173 @@
+import math
+import struct
+import time
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Optional, Union
+from uuid import UUID
+
+from app.models.sensors import MotionSensor, TemperatureSensor, HeartRateSensor, SensorEvent
+
+NIL_HABITAT = UUID(int=0)
+
+# == COMPACT INGEST EVENTS ==
+# Slotted, validation-free readings used inside the simulator -> stream
+# manager path. The pydantic models in sensors.py stay at the API boundary;
+# use to_reading()/to_model() to cross it.
+
+# == PACKED COORDINATES ==
+# Motion positions travel as 24 packed bytes (little-endian float64 x, y, z)
+# instead of "x,y,z" strings: parsed once at the API boundary, and a batch
+# decodes with a single np.frombuffer over the joined bytes.
+
+POSITION = struct.Struct("<3d")
+NO_POSITION = POSITION.pack(math.nan, math.nan, math.nan)
+
+def pack_position(x: float, y: float, z: float) -> bytes:
+    return POSITION.pack(x, y, z)
+
+# None when the text is not three numbers (e.g. grid labels like 'A1-North')
+def parse_coordinates(coordinates: Optional[str]) -> Optional[bytes]:
+    if not coordinates:
+        return None
+    try:
+        coords = [float(c) for c in coordinates.split(",")]
+    except ValueError:
+        return None
+    if len(coords) != 3:
+        return None
+    return POSITION.pack(*coords)
+
+# Shortest text that parses back to the same float; whole numbers drop ".0"
+def _format_coordinate(c: float) -> str:
+    text = repr(c)
+    return text[:-2] if text.endswith(".0") else text
+
+def format_position(position: bytes) -> str:
+    return ",".join(_format_coordinate(c) for c in POSITION.unpack(position))
+
+class SensorType(str, Enum):
+    TEMPERATURE = "temperature"
+    MOTION = "motion"
+    HEART_RATE = "heart_rate"
+
+class ReadingBase:
+    __slots__ = ("id", "habitat_id", "timestamp", "battery_level")
+
+    sensor_type: SensorType
+
+    def __init__(self, id: str, habitat_id: Optional[UUID], timestamp: Optional[float] = None, battery_level: float = 100.0):
+        self.id = id
+        self.habitat_id = habitat_id
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.battery_level = battery_level
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields())
+        return f"{type(self).__name__}({fields})"
+
+    # Flat tuple pickling, much cheaper than the default slot-state dicts
+    # when batches are shipped to evaluation worker processes
+    def __reduce__(self):
+        return (_restore_reading, (type(self), tuple(getattr(self, name) for name in self._fields())))
+
+    @classmethod
+    def _fields(cls):
+        fields = cls.__dict__.get("_field_names")
+        if fields is None:
+            fields = tuple(name for klass in reversed(cls.__mro__) for name in getattr(klass, "__slots__", ()))
+            cls._field_names = fields
+        return fields
+
+    def _base_model_fields(self) -> dict:
+        return {
+            "id": self.id,
+            "habitat_id": self.habitat_id or NIL_HABITAT,
+            "timestamp": datetime.fromtimestamp(self.timestamp, timezone.utc).replace(tzinfo=None),
+            "battery_level": self.battery_level,
+            "sensor_type": self.sensor_type.value,
+        }
+
+class TemperatureReading(ReadingBase):
+    __slots__ = ("value", "unit", "humidity")
+
+    sensor_type = SensorType.TEMPERATURE
+
+    def __init__(self, id, habitat_id, value: float, unit: str = "celsius", humidity: Optional[float] = None, timestamp=None, battery_level=100.0):
+        ReadingBase.__init__(self, id, habitat_id, timestamp, battery_level)
+        self.value = value
+        self.unit = unit
+        self.humidity = humidity
+
+    def to_model(self) -> TemperatureSensor:
+        return TemperatureSensor(**self._base_model_fields(), value=self.value, unit=self.unit, humidity=self.humidity)
+
+class MotionReading(ReadingBase):
+    # `position` is the packed x/y/z; `_coordinates` keeps the original text
+    # only when it was given (formatted from `position` otherwise)
+    __slots__ = ("is_detected", "sensitivity", "position", "_coordinates")
+
+    sensor_type = SensorType.MOTION
+
+    def __init__(self, id, habitat_id, is_detected: bool, sensitivity: int = 5, coordinates: Optional[str] = None, timestamp=None, battery_level=100.0,
+                 position: Optional[bytes] = None):
+        ReadingBase.__init__(self, id, habitat_id, timestamp, battery_level)
+        self.is_detected = is_detected
+        self.sensitivity = sensitivity
+        self.position = position if position is not None else parse_coordinates(coordinates)
+        self._coordinates = coordinates
+
+    @property
+    def coordinates(self) -> Optional[str]:
+        if self._coordinates is None and self.position is not None:
+            return format_position(self.position)
+        return self._coordinates
+
+    def to_model(self) -> MotionSensor:
+        return MotionSensor(**self._base_model_fields(), is_detected=self.is_detected, sensitivity=self.sensitivity, coordinates=self.coordinates)
+
+class HeartRateReading(ReadingBase):
+    __slots__ = ("dinosaur_id", "bpm", "stress_level")
+
+    sensor_type = SensorType.HEART_RATE
+
+    def __init__(self, id, habitat_id, dinosaur_id: str, bpm: int, stress_level: Optional[str] = None, timestamp=None, battery_level=100.0):
+        ReadingBase.__init__(self, id, habitat_id, timestamp, battery_level)
+        self.dinosaur_id = dinosaur_id
+        self.bpm = bpm
+        self.stress_level = stress_level
+
+    def to_model(self) -> HeartRateSensor:
+        return HeartRateSensor(**self._base_model_fields(), dinosaur_id=self.dinosaur_id, bpm=self.bpm, stress_level=self.stress_level)
+
+def _restore_reading(cls, values: tuple):
+    reading = cls.__new__(cls)
+    for name, value in zip(cls._fields(), values):
+        setattr(reading, name, value)
+    return reading
+
+# --- Union Type ---
+SensorReading = Union[TemperatureReading, MotionReading, HeartRateReading]
+
+# == API BOUNDARY ==
+
+def to_epoch(ts: datetime) -> float:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+def to_reading(event: SensorEvent) -> SensorReading:
+    if event.sensor_type == "temperature":
+        return TemperatureReading(
+            event.id, event.habitat_id, event.value, event.unit, event.humidity,
+            to_epoch(event.timestamp), event.battery_level
+        )
+    if event.sensor_type == "motion":
+        return MotionReading(
+            event.id, event.habitat_id, event.is_detected, event.sensitivity, event.coordinates,
+            to_epoch(event.timestamp), event.battery_level
+        )
+    return HeartRateReading(
+        event.id, event.habitat_id, event.dinosaur_id, event.bpm, event.stress_level,
+        to_epoch(event.timestamp), event.battery_level
+    )
@@ -1,6 +1,9 @@
 from uuid import UUID, uuid4
-from typing import List, Literal
-from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional, Tuple, Union
+from pydantic import BaseModel, Field, PrivateAttr
+
+# Removed-habitat markers kept for delta responses; older clients get a full reset
+MAX_TOMBSTONES = 1000
 
 # == HABITATS MODEL ==
 
@@ -26,8 +29,155 @@ class Park(BaseModel):
     
     habitats: List[Habitat] = Field(default_factory=list, description="All habitats in the park")
 
+    # Live registry (hash lookups instead of scanning self.habitats)
+    _habitats_by_id: Dict[UUID, Habitat] = PrivateAttr(default_factory=dict)
+    _habitats_by_str: Dict[str, Habitat] = PrivateAttr(default_factory=dict)
+    _dino_habitat: Dict[UUID, Habitat] = PrivateAttr(default_factory=dict)
+
+    # Monotonic change counter. `_epoch` tells versions of different
+    # processes apart, so a client never applies a delta across restarts.
+    _version: int = PrivateAttr(default=0)
+    _epoch: str = PrivateAttr(default_factory=lambda: uuid4().hex[:8])
+    _changed_at: Dict[UUID, int] = PrivateAttr(default_factory=dict)
+    _removed_at: Dict[UUID, int] = PrivateAttr(default_factory=dict)
+    _delta_floor: int = PrivateAttr(default=0)
+    # Serialized JSON per habitat (tagged with its change version) and for the full list
+    _habitat_json: Dict[UUID, Tuple[int, bytes]] = PrivateAttr(default_factory=dict)
+    _list_json: Optional[Tuple[int, bytes]] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        self._index_habitats(self.habitats)
+        self._changed_at.update(dict.fromkeys((habitat.id for habitat in self.habitats), 0))
+
+    # Writable copy for the state store: new habitat list and indexes, and
+    # fresh copies of the habitats about to be changed. Everything else
+    # (including the JSON caches) is shared with the original, which must
+    # not be mutated afterwards.
+    def copy_on_write(self, habitat_ids=()) -> "Park":
+        changed = {
+            hid: self._habitats_by_id[hid].model_copy(update={"dinosaur_ids": list(self._habitats_by_id[hid].dinosaur_ids)})
+            for hid in habitat_ids if hid in self._habitats_by_id
+        }
+        clone = Park(name=self.name, habitats=[changed.get(h.id, h) for h in self.habitats])
+        clone._version = self._version
+        clone._epoch = self._epoch
+        clone._changed_at = dict(self._changed_at)
+        clone._removed_at = dict(self._removed_at)
+        clone._delta_floor = self._delta_floor
+        clone._habitat_json = dict(self._habitat_json)
+        clone._list_json = self._list_json
+        return clone
+
+    def _index_habitat(self, habitat: Habitat):
+        self._index_habitats((habitat,))
+
+    # Private attributes are looked up once per call, not once per habitat
+    def _index_habitats(self, habitats):
+        by_id, by_str, dino_habitat = self._habitats_by_id, self._habitats_by_str, self._dino_habitat
+        for habitat in habitats:
+            by_id[habitat.id] = habitat
+            by_str[str(habitat.id)] = habitat
+            dino_habitat.update(dict.fromkeys(habitat.dinosaur_ids, habitat))
+
     def add_habitat(self, habitat: Habitat):
         self.habitats.append(habitat)
+        self._index_habitat(habitat)
+        self._removed_at.pop(habitat.id, None)
+        self.touch_habitat(habitat.id)
     
     def remove_habitat(self, habitat_id: UUID):
-        self.habitats = [h for h in self.habitats if h.id != habitat_id]
\ No newline at end of file
+        habitat = self._habitats_by_id.pop(habitat_id, None)
+        if habitat is None:
+            return
+        self._habitats_by_str.pop(str(habitat_id), None)
+        for dino_id in habitat.dinosaur_ids:
+            self._dino_habitat.pop(dino_id, None)
+        self.habitats = [h for h in self.habitats if h.id != habitat_id]
+
+        self._version += 1
+        self._changed_at.pop(habitat_id, None)
+        self._habitat_json.pop(habitat_id, None)
+        self._removed_at[habitat_id] = self._version
+        if len(self._removed_at) > MAX_TOMBSTONES:
+            oldest = next(iter(self._removed_at))
+            self._delta_floor = self._removed_at.pop(oldest)
+
+    @property
+    def habitat_index(self) -> Dict[UUID, Habitat]:
+        return self._habitats_by_id
+
+    def get_habitat(self, habitat_id: Union[UUID, str]) -> Optional[Habitat]:
+        if isinstance(habitat_id, UUID):
+            return self._habitats_by_id.get(habitat_id)
+        return self._habitats_by_str.get(habitat_id)
+
+    # == DINOSAUR ASSIGNMENT ==
+
+    def assign_dinosaur(self, habitat_id: Union[UUID, str], dino_id: UUID) -> Optional[Habitat]:
+        habitat = self.get_habitat(habitat_id)
+        if habitat is None:
+            return None
+        self.unassign_dinosaur(dino_id)
+        habitat.dinosaur_ids.append(dino_id)
+        self._dino_habitat[dino_id] = habitat
+        self.touch_habitat(habitat.id)
+        return habitat
+
+    def unassign_dinosaur(self, dino_id: UUID) -> Optional[Habitat]:
+        habitat = self._dino_habitat.pop(dino_id, None)
+        if habitat is not None and dino_id in habitat.dinosaur_ids:
+            habitat.dinosaur_ids.remove(dino_id)
+            self.touch_habitat(habitat.id)
+        return habitat
+
+    def get_dinosaur_habitat(self, dino_id: UUID) -> Optional[Habitat]:
+        return self._dino_habitat.get(dino_id)
+
+    # == VERSIONING ==
+    # Every mutation goes through touch_habitat() (or remove_habitat), so
+    # the version only moves when the serialized park actually changes.
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def epoch(self) -> str:
+        return self._epoch
+
+    # Call after mutating a habitat in place outside the methods above
+    def touch_habitat(self, habitat_id: UUID):
+        self._version += 1
+        self._changed_at[habitat_id] = self._version
+
+    def _habitat_bytes(self, habitat: Habitat) -> bytes:
+        changed = self._changed_at.get(habitat.id, 0)
+        cached = self._habitat_json.get(habitat.id)
+        if cached is None or cached[0] != changed:
+            cached = self._habitat_json[habitat.id] = (changed, habitat.model_dump_json().encode("utf-8"))
+        return cached[1]
+
+    # JSON array of all habitats, rebuilt at most once per version and only
+    # re-serializing the habitats that changed
+    def habitats_json(self) -> bytes:
+        if self._list_json is None or self._list_json[0] != self._version:
+            body = b"[" + b",".join(self._habitat_bytes(h) for h in self.habitats) + b"]"
+            self._list_json = (self._version, body)
+        return self._list_json[1]
+
+    # Habitats changed and ids removed after `since_version`. `reset` means
+    # the delta cannot be computed (too old or from the future) and
+    # `changed` holds every habitat instead.
+    def habitats_delta_json(self, since_version: int) -> bytes:
+        reset = since_version < self._delta_floor or since_version > self._version
+        if reset:
+            changed = self.habitats
+            removed = []
+        else:
+            changed = [h for h in self.habitats if self._changed_at.get(h.id, 0) > since_version]
+            removed = [str(h) for h, v in self._removed_at.items() if v > since_version]
+        removed_json = ",".join(f'"{h}"' for h in removed)
+        return (
+            f'{{"epoch":"{self._epoch}","version":{self._version},"reset":{"true" if reset else "false"},'
+            f'"removed":[{removed_json}],"changed":['
+        ).encode("utf-8") + b",".join(self._habitat_bytes(h) for h in changed) + b"]}"
@@ -38,7 +38,8 @@ class HeartRateSensor(SensorBase):
     
     dinosaur_id: str = Field(..., description="ID of the animal being monitored")
     
-    bpm: int = Field(..., gt=0, description="Beats per minute")
+    # 0 is a valid reading: the monitor lost the heartbeat (vital_signs_lost rule)
+    bpm: int = Field(..., ge=0, description="Beats per minute")
     stress_level: Optional[str] = Field(None, description="Low, Medium, High")
 
 # --- Union Type ---
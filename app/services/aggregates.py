@@ -0,0 +1,306 @@
+import time
+from typing import Dict, Hashable, Iterable, List, Optional
+from uuid import UUID
+import numpy as np
+
+# == SLIDING-WINDOW AGGREGATES ==
+# Rolling mean/min/max/variance/p95 per entity (habitat, dinosaur) over
+# several windows. Every window is a ring of time buckets stored in NumPy
+# arrays indexed by entity slot. Each bucket holds count, sum, sum of
+# squares, min, max and a fixed-bin histogram (the p95 sketch). Window
+# totals are kept incrementally: a batch adds into the current bucket and
+# the totals, and a bucket that falls out of the window is subtracted once.
+# Reads only combine the precomputed totals.
+#
+# Entities with nothing left in their longest window are evicted (at most
+# once per SWEEP_INTERVAL, on update) and their slots reused, so ids that
+# stop reporting, or only ever sent a few readings, do not pile up.
+
+DEFAULT_WINDOWS = {"1m": 60.0, "5m": 300.0, "1h": 3600.0}
+BUCKETS_PER_WINDOW = 10
+HISTOGRAM_BINS = 48
+INITIAL_SLOTS = 64
+SWEEP_INTERVAL = 60.0
+
+class _Window:
+    def __init__(self, span: float, buckets: int, bins: int, slots: int):
+        self.span = span
+        self.buckets = buckets
+        self.bucket_width = span / buckets
+        self.bins = bins
+
+        self.epochs = np.full((slots, buckets), np.iinfo(np.int64).min // 2, dtype=np.int64)
+        self.count = np.zeros((slots, buckets), dtype=np.int64)
+        self.sum = np.zeros((slots, buckets))
+        self.sumsq = np.zeros((slots, buckets))
+        self.min = np.full((slots, buckets), np.inf)
+        self.max = np.full((slots, buckets), -np.inf)
+        self.hist = np.zeros((slots, buckets, bins), dtype=np.uint32)
+
+        self.total_count = np.zeros(slots, dtype=np.int64)
+        self.total_sum = np.zeros(slots)
+        self.total_sumsq = np.zeros(slots)
+        self.total_hist = np.zeros((slots, bins), dtype=np.int64)
+
+    def grow(self, slots: int):
+        extra = slots - len(self.total_count)
+        pad = lambda a, fill: np.concatenate([a, np.full((extra,) + a.shape[1:], fill, dtype=a.dtype)])
+        self.epochs = pad(self.epochs, np.iinfo(np.int64).min // 2)
+        self.count = pad(self.count, 0)
+        self.sum = pad(self.sum, 0)
+        self.sumsq = pad(self.sumsq, 0)
+        self.min = pad(self.min, np.inf)
+        self.max = pad(self.max, -np.inf)
+        self.hist = pad(self.hist, 0)
+        self.total_count = pad(self.total_count, 0)
+        self.total_sum = pad(self.total_sum, 0)
+        self.total_sumsq = pad(self.total_sumsq, 0)
+        self.total_hist = pad(self.total_hist, 0)
+
+    def reset(self, slot: int):
+        self.epochs[slot] = np.iinfo(np.int64).min // 2
+        self.count[slot] = 0
+        self.sum[slot] = self.sumsq[slot] = 0
+        self.min[slot] = np.inf
+        self.max[slot] = -np.inf
+        self.hist[slot] = 0
+        self.total_count[slot] = 0
+        self.total_sum[slot] = self.total_sumsq[slot] = 0
+        self.total_hist[slot] = 0
+
+    def epoch(self, now: float) -> int:
+        return int(now // self.bucket_width)
+
+    def expire(self, slots: np.ndarray, epoch: int):
+        stale = (self.epochs[slots] <= epoch - self.buckets) & (self.count[slots] > 0)
+        rows, cols = np.nonzero(stale)
+        if len(rows):
+            s = slots[rows]
+            np.subtract.at(self.total_count, s, self.count[s, cols])
+            np.subtract.at(self.total_sum, s, self.sum[s, cols])
+            np.subtract.at(self.total_sumsq, s, self.sumsq[s, cols])
+            np.subtract.at(self.total_hist, s, self.hist[s, cols].astype(np.int64))
+            self.count[s, cols] = 0
+            self.sum[s, cols] = 0
+            self.sumsq[s, cols] = 0
+            self.min[s, cols] = np.inf
+            self.max[s, cols] = -np.inf
+            self.hist[s, cols] = 0
+
+    def add(self, batch: "_GroupedBatch", now: float):
+        epoch = self.epoch(now)
+        touched = batch.slots
+        self.expire(touched, epoch)
+
+        b = epoch % self.buckets
+        self.epochs[touched, b] = epoch
+
+        # Slots (and slot/bin pairs) are unique here, so plain fancy-index
+        # adds are safe
+        self.count[touched, b] += batch.count
+        self.sum[touched, b] += batch.sum
+        self.sumsq[touched, b] += batch.sumsq
+        self.min[touched, b] = np.minimum(self.min[touched, b], batch.min)
+        self.max[touched, b] = np.maximum(self.max[touched, b], batch.max)
+        self.hist[batch.hist_slots, b, batch.hist_bins] += batch.hist_counts.astype(np.uint32)
+
+        self.total_count[touched] += batch.count
+        self.total_sum[touched] += batch.sum
+        self.total_sumsq[touched] += batch.sumsq
+        self.total_hist[batch.hist_slots, batch.hist_bins] += batch.hist_counts
+
+class _GroupedBatch:
+    # Per-slot partial aggregates of one batch, shared by every window
+    def __init__(self, slots: np.ndarray, values: np.ndarray, bins: np.ndarray, n_bins: int):
+        self.slots, inverse = np.unique(slots, return_inverse=True)
+        k = len(self.slots)
+        self.count = np.bincount(inverse, minlength=k)
+        self.sum = np.bincount(inverse, weights=values, minlength=k)
+        self.sumsq = np.bincount(inverse, weights=values * values, minlength=k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+        np.minimum.at(self.min, inverse, values)
+        np.maximum.at(self.max, inverse, values)
+
+        pairs, self.hist_counts = np.unique(slots * n_bins + bins, return_counts=True)
+        self.hist_slots, self.hist_bins = np.divmod(pairs, n_bins)
+
+class WindowedAggregator:
+    def __init__(self, value_range: tuple, windows: Optional[Dict[str, float]] = None,
+                 buckets: int = BUCKETS_PER_WINDOW, bins: int = HISTOGRAM_BINS):
+        self.low, self.high = value_range
+        self.bins = bins
+        self.bin_width = (self.high - self.low) / bins
+        self.slots: Dict[Hashable, int] = {}
+        # Slots released by forget, reset and ready for the next new key
+        self._free: List[int] = []
+        self.capacity = INITIAL_SLOTS
+        self.windows = {
+            label: _Window(span, buckets, bins, self.capacity)
+            for label, span in (windows or DEFAULT_WINDOWS).items()
+        }
+        self._longest = max(self.windows.values(), key=lambda window: window.span)
+        self._next_sweep = 0.0
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self.slots)
+                if slot >= self.capacity:
+                    self.capacity *= 2
+                    for window in self.windows.values():
+                        window.grow(self.capacity)
+            self.slots[key] = slot
+        return slot
+
+    def update(self, keys: Iterable[Hashable], values: Iterable[float], now: Optional[float] = None):
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return
+        now = time.time() if now is None else now
+        if now >= self._next_sweep:
+            self.evict_idle(now)
+        keys = list(keys)
+        get = self.slots.get
+        slot_list = [get(k, -1) for k in keys]
+        if -1 in slot_list:
+            slot_list = [s if s >= 0 else self._slot(k) for k, s in zip(keys, slot_list)]
+        slots = np.array(slot_list, dtype=np.int64)
+        bins = np.clip(((values - self.low) / self.bin_width).astype(np.int64), 0, self.bins - 1)
+        batch = _GroupedBatch(slots, values, bins, self.bins)
+        for window in self.windows.values():
+            window.add(batch, now)
+
+    def forget(self, key: Hashable):
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        for window in self.windows.values():
+            window.reset(slot)
+        self._free.append(slot)
+
+    # Forgets the entities whose newest bucket has left the longest window;
+    # returns how many
+    def evict_idle(self, now: float) -> int:
+        self._next_sweep = now + SWEEP_INTERVAL
+        if not self.slots:
+            return 0
+        window = self._longest
+        keys = list(self.slots)
+        slots = np.fromiter(self.slots.values(), dtype=np.int64, count=len(keys))
+        idle = np.flatnonzero(window.epochs[slots].max(axis=1) <= window.epoch(now) - window.buckets)
+        for k in idle.tolist():
+            self.forget(keys[k])
+        return len(idle)
+
+    def snapshot(self, key: Hashable, now: Optional[float] = None) -> Optional[dict]:
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        now = time.time() if now is None else now
+        return {label: self._window_stats(window, slot, now) for label, window in self.windows.items()}
+
+    def _window_stats(self, window: _Window, slot: int, now: float) -> dict:
+        window.expire(np.array([slot]), window.epoch(now))
+        n = int(window.total_count[slot])
+        if n == 0:
+            return {"count": 0, "mean": None, "min": None, "max": None, "variance": None, "p95": None}
+
+        mean = float(window.total_sum[slot]) / n
+        variance = max(0.0, float(window.total_sumsq[slot]) / n - mean * mean)
+        low = float(window.min[slot].min())
+        high = float(window.max[slot].max())
+        return {
+            "count": n,
+            "mean": round(mean, 2),
+            "min": round(low, 2),
+            "max": round(high, 2),
+            "variance": round(variance, 3),
+            "p95": round(min(high, max(low, self._quantile(window.total_hist[slot], n, 0.95))), 2),
+        }
+
+    def _quantile(self, hist: np.ndarray, n: int, q: float) -> float:
+        cumulative = np.cumsum(hist)
+        rank = q * n
+        b = int(np.searchsorted(cumulative, rank))
+        before = cumulative[b - 1] if b > 0 else 0
+        inside = (rank - before) / hist[b] if hist[b] else 0.0
+        return float(self.low + (b + inside) * self.bin_width)
+
+    # == CHECKPOINTS ==
+    # Sparse copy of the buckets holding data: one row per (entity, bucket)
+    # and histograms as (row, bin, count) triples. Exported in chunks of
+    # entities so the event loop can run between them; each entity is
+    # copied as a whole.
+
+    def iter_export(self, chunk: int = 4096):
+        items = list(self.slots.items())
+        for start in range(0, len(items), chunk):
+            keys = [key for key, _ in items[start:start + chunk]]
+            slots = np.array([slot for _, slot in items[start:start + chunk]], dtype=np.int64)
+            windows = {}
+            for label, window in self.windows.items():
+                rows, cols = np.nonzero(window.count[slots] > 0)
+                s = slots[rows]
+                hist = window.hist[s, cols]
+                hist_rows, hist_bins = np.nonzero(hist)
+                windows[label] = {
+                    "entity": rows.astype(np.int32), "bucket": cols.astype(np.int16),
+                    "epoch": window.epochs[s, cols], "count": window.count[s, cols],
+                    "sum": window.sum[s, cols], "sumsq": window.sumsq[s, cols],
+                    "min": window.min[s, cols], "max": window.max[s, cols],
+                    "hist_row": hist_rows.astype(np.int32), "hist_bin": hist_bins.astype(np.int16),
+                    "hist_count": hist[hist_rows, hist_bins],
+                }
+            yield keys, windows
+
+    @staticmethod
+    def merge_exports(parts: list) -> dict:
+        keys, windows = [], {}
+        for part_keys, part_windows in parts:
+            for label, columns in part_windows.items():
+                merged = windows.setdefault(label, {name: [] for name in columns})
+                rows_before = sum(len(c) for c in merged["entity"])
+                for name, values in columns.items():
+                    if name == "entity":
+                        values = values + len(keys)
+                    elif name == "hist_row":
+                        values = values + rows_before
+                    merged[name].append(values)
+            keys.extend(part_keys)
+        return {
+            "keys": [str(k) for k in keys],
+            "uuid_keys": bool(keys) and isinstance(keys[0], UUID),
+            "windows": {label: {name: np.concatenate(v) for name, v in columns.items()} for label, columns in windows.items()},
+        }
+
+    def export_state(self, chunk: int = 4096) -> dict:
+        return self.merge_exports(list(self.iter_export(chunk)))
+
+    def restore_state(self, state: dict):
+        to_key = UUID if state["uuid_keys"] else str
+        slots = np.array([self._slot(to_key(k)) for k in state["keys"]], dtype=np.int64)
+        for label, columns in state["windows"].items():
+            window = self.windows.get(label)
+            if (window is None or not len(columns["entity"]) or int(columns["bucket"].max()) >= window.buckets
+                    or int(columns["hist_bin"].max(initial=0)) >= self.bins):
+                continue
+            s, b = slots[columns["entity"]], columns["bucket"].astype(np.int64)
+            window.epochs[s, b] = columns["epoch"]
+            window.count[s, b] = columns["count"]
+            window.sum[s, b] = columns["sum"]
+            window.sumsq[s, b] = columns["sumsq"]
+            window.min[s, b] = columns["min"]
+            window.max[s, b] = columns["max"]
+            hist_rows = columns["hist_row"]
+            window.hist[s[hist_rows], b[hist_rows], columns["hist_bin"]] = columns["hist_count"]
+
+            # Totals are the sum of the stored buckets; stale ones expire on the next read or update
+            touched = np.unique(s)
+            window.total_count[touched] = window.count[touched].sum(axis=1)
+            window.total_sum[touched] = window.sum[touched].sum(axis=1)
+            window.total_sumsq[touched] = window.sumsq[touched].sum(axis=1)
+            window.total_hist[touched] = window.hist[touched].sum(axis=1)
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Iterable, Optional
+from uuid import UUID
+
+from app.models.alert import Alert, AlertSeverity
+
+logger = logging.getLogger("JurassicReactor")
+
+# == ALERT BUS ==
+# In-memory fan-out of Alert objects to live subscribers (SSE / WebSocket).
+# publish() runs on the event loop thread and never waits: every subscriber
+# has its own bounded queue and a slow client loses its oldest alerts.
+
+class AlertSubscription:
+    def __init__(self, severities: Optional[Iterable[AlertSeverity]] = None, habitat_id: Optional[UUID] = None, max_queue: int = 100):
+        self.severities = set(severities) if severities else None
+        self.habitat_id = habitat_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def matches(self, alert: Alert) -> bool:
+        if self.severities is not None and alert.severity not in self.severities:
+            return False
+        if self.habitat_id is not None and alert.habitat_id != self.habitat_id:
+            return False
+        return True
+
+    def offer(self, alert: Alert):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(alert)
+
+class AlertBus:
+    def __init__(self, max_queue: int = 100):
+        self.max_queue = max_queue
+        self.subscribers: set[AlertSubscription] = set()
+        self.total_published = 0
+
+    def subscribe(self, severities: Optional[Iterable[AlertSeverity]] = None, habitat_id: Optional[UUID] = None) -> AlertSubscription:
+        subscription = AlertSubscription(severities, habitat_id, self.max_queue)
+        self.subscribers.add(subscription)
+        logger.info(f"Alert subscriber connected ({len(self.subscribers)} active).")
+        return subscription
+
+    def unsubscribe(self, subscription: AlertSubscription):
+        self.subscribers.discard(subscription)
+        logger.info(f"Alert subscriber disconnected ({len(self.subscribers)} active).")
+
+    def publish(self, alert: Alert):
+        self.total_published += 1
+        for subscription in self.subscribers:
+            if subscription.matches(alert):
+                subscription.offer(alert)
+
+    def get_metrics(self) -> dict:
+        return {
+            "alert_subscribers": len(self.subscribers),
+            "alert_subscriber_drops": sum(s.dropped for s in self.subscribers),
+        }
@@ -0,0 +1,282 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+from pydantic import BaseModel, Field
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import SensorReading
+
+logger = logging.getLogger("JurassicReactor")
+
+SEVERITY_RANK = {
+    AlertSeverity.LOW: 0,
+    AlertSeverity.MEDIUM: 1,
+    AlertSeverity.HIGH: 2,
+    AlertSeverity.CRITICAL: 3,
+}
+
+# == SETTINGS ==
+
+class AlertProcessingSettings(BaseModel):
+    dedup_window: float = Field(60.0, ge=0, description="Seconds before an ongoing alert is re-notified")
+    clear_after: int = Field(3, ge=1, description="In-range readings needed to clear an active alert")
+    # Alerts per second per severity (burst = one second worth); 0 disables the limit
+    rate_limits: Dict[AlertSeverity, float] = Field(default_factory=lambda: {
+        AlertSeverity.LOW: 10.0,
+        AlertSeverity.MEDIUM: 50.0,
+        AlertSeverity.HIGH: 100.0,
+        AlertSeverity.CRITICAL: 0.0,
+    })
+    correlation_window: float = Field(10.0, gt=0, description="Seconds an incident stays open without new alerts")
+    motion_rules: List[str] = Field(default_factory=lambda: ["perimeter_breach", "boundary_breach", "violent_motion"])
+    heart_rate_rules: List[str] = Field(default_factory=lambda: ["stress", "heart_rate_anomaly"])
+    max_sensors: int = Field(100_000, gt=0, description="Sensors with alert state kept in memory")
+    state_ttl: float = Field(600.0, gt=0, description="Seconds before a silent sensor's state is dropped")
+    max_incidents: int = Field(10_000, gt=0)
+
+# == BOUNDED STATE ==
+# OrderedDict in least-recently-touched order: expired entries are always at
+# the front, so pruning and size eviction are O(1) per removed key.
+
+class LRUTTLMap:
+    def __init__(self, max_items: int, ttl: float):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._items: OrderedDict = OrderedDict()
+        self.evicted = 0
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key) -> bool:
+        return key in self._items
+
+    def get(self, key, now: float):
+        entry = self._items.get(key)
+        if entry is None:
+            return None
+        touched, value = entry
+        if now - touched > self.ttl:
+            del self._items[key]
+            self.expired += 1
+            return None
+        self._items[key] = (now, value)
+        self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value, now: float):
+        self._items[key] = (now, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+            self.evicted += 1
+
+    def pop(self, key):
+        entry = self._items.pop(key, None)
+        return entry[1] if entry else None
+
+    def prune(self, now: float):
+        items = self._items
+        while items:
+            touched, _ = next(iter(items.values()))
+            if now - touched <= self.ttl:
+                break
+            items.popitem(last=False)
+            self.expired += 1
+
+class _AlertState:
+    __slots__ = ("severity", "last_emitted", "in_range", "occurrences")
+
+    def __init__(self, severity: AlertSeverity):
+        self.severity = severity
+        self.last_emitted = -math.inf
+        self.in_range = 0
+        self.occurrences = 1
+
+class _Incident:
+    __slots__ = ("id", "kinds", "alerts", "started")
+
+    def __init__(self, kind: str, now: float):
+        self.id = uuid4()
+        self.kinds = {kind}
+        self.alerts = 1
+        self.started = now
+
+class _TokenBucket:
+    __slots__ = ("rate", "tokens", "updated")
+
+    def __init__(self, rate: float, now: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = now
+
+    def allow(self, now: float) -> bool:
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+# == ALERT PROCESSOR ==
+# Runs between rule evaluation and emission. One pass over the batch, in
+# reading order, so an alert, its in-range readings and a re-trigger in the
+# same batch are handled exactly as if they had arrived one by one:
+#   1. dedup: one notification per (sensor_id, rule) while it stays active,
+#      re-notified on escalation or after dedup_window
+#   2. hysteresis: active alerts clear after clear_after in-range readings
+#   3. correlation: motion breaches and heart-rate spikes in one habitat
+#      within correlation_window become a single incident alert
+#   4. per-severity token bucket rate limits
+
+class AlertProcessor:
+    def __init__(self, park, settings: Optional[AlertProcessingSettings] = None):
+        self.park = park
+        self.settings = settings or AlertProcessingSettings()
+
+        # sensor_id -> {rule: _AlertState}
+        self.states = LRUTTLMap(self.settings.max_sensors, self.settings.state_ttl)
+        # habitat_id -> _Incident (TTL slides with every correlated alert)
+        self.incidents = LRUTTLMap(self.settings.max_incidents, self.settings.correlation_window)
+
+        now = time.monotonic()
+        self._buckets = {
+            severity: _TokenBucket(rate, now)
+            for severity, rate in self.settings.rate_limits.items() if rate > 0
+        }
+        self._kinds = {rule: "motion" for rule in self.settings.motion_rules}
+        self._kinds.update({rule: "heart_rate" for rule in self.settings.heart_rate_rules})
+
+        self.stats = {
+            "alerts_raised": 0,
+            "alerts_suppressed_dedup": 0,
+            "alerts_rate_limited": 0,
+            "alerts_correlated": 0,
+            "alerts_cleared": 0,
+            "incidents_opened": 0,
+        }
+
+    def process(self, batch: list[SensorReading], alerts: List[Tuple[int, Alert]]) -> List[Tuple[int, Alert]]:
+        now = time.monotonic()
+        self.states.prune(now)
+        self.incidents.prune(now)
+        self.stats["alerts_raised"] += len(alerts)
+
+        fired = dict(alerts)
+        states = self.states
+        emitted = []
+        for i, reading in enumerate(batch):
+            alert = fired.get(i)
+            if alert is not None:
+                published = self._on_alert(alert, now)
+                if published is not None:
+                    emitted.append((i, published))
+            if reading.id in states:
+                self._on_reading(reading.id, alert, now)
+        return emitted
+
+    # Alerts not raised by a reading (e.g. a sensor going silent): same dedup,
+    # correlation and rate limits, cleared by the sensor's next readings
+    def process_alerts(self, alerts: List[Alert]) -> List[Alert]:
+        now = time.monotonic()
+        self.stats["alerts_raised"] += len(alerts)
+        published = (self._on_alert(alert, now) for alert in alerts)
+        return [alert for alert in published if alert is not None]
+
+    def _on_alert(self, alert: Alert, now: float) -> Optional[Alert]:
+        rules = self.states.get(alert.sensor_id, now)
+        if rules is None:
+            rules = {}
+            self.states.put(alert.sensor_id, rules, now)
+
+        severity = alert.severity
+        state = rules.get(alert.rule)
+        if state is None:
+            rules[alert.rule] = state = _AlertState(severity)
+        else:
+            state.in_range = 0
+            state.occurrences += 1
+            escalated = SEVERITY_RANK[severity] > SEVERITY_RANK[state.severity]
+            if not escalated and now - state.last_emitted < self.settings.dedup_window:
+                self.stats["alerts_suppressed_dedup"] += 1
+                return None
+
+        # Folded into an incident counts as notified
+        state.severity = severity
+        state.last_emitted = now
+        alert = self._correlate(alert, now)
+        if alert is None:
+            return None
+
+        bucket = self._buckets.get(alert.severity)
+        if bucket is not None and not bucket.allow(now):
+            # Not notified yet: the next occurrence may go through
+            state.last_emitted = -math.inf
+            self.stats["alerts_rate_limited"] += 1
+            return None
+        return alert
+
+    # Counts in-range readings towards clearing each active rule of the sensor
+    def _on_reading(self, sensor_id: str, alert: Optional[Alert], now: float):
+        rules = self.states.get(sensor_id, now)
+        if not rules:
+            return
+        for rule in [r for r in rules if alert is None or r != alert.rule]:
+            state = rules[rule]
+            state.in_range += 1
+            if state.in_range >= self.settings.clear_after:
+                del rules[rule]
+                self.stats["alerts_cleared"] += 1
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Alert cleared: {sensor_id} / {rule} after {state.occurrences} occurrences")
+        if not rules:
+            self.states.pop(sensor_id)
+
+    def _correlate(self, alert: Alert, now: float) -> Optional[Alert]:
+        kind = self._kinds.get(alert.rule)
+        if kind is None or alert.habitat_id is None:
+            return alert
+
+        incident = self.incidents.get(alert.habitat_id, now)
+        if incident is None:
+            incident = _Incident(kind, now)
+            self.incidents.put(alert.habitat_id, incident, now)
+            alert.incident_id = incident.id
+            return alert
+
+        incident.alerts += 1
+        if kind in incident.kinds:
+            if len(incident.kinds) > 1:
+                # Already reported as a correlated incident
+                self.stats["alerts_correlated"] += 1
+                return None
+            alert.incident_id = incident.id
+            return alert
+
+        incident.kinds.add(kind)
+        self.stats["incidents_opened"] += 1
+        self.stats["alerts_correlated"] += 1
+        habitat = self.park.get_habitat(alert.habitat_id)
+        name = habitat.name if habitat else str(alert.habitat_id)
+        return Alert(
+            sensor_id=alert.sensor_id,
+            habitat_id=alert.habitat_id,
+            severity=AlertSeverity.CRITICAL,
+            message=f"INCIDENT in {name}: motion breach and heart-rate spike within "
+                    f"{self.settings.correlation_window:.0f}s ({incident.alerts} alerts)",
+            triggered_value=alert.triggered_value,
+            rule="correlated_incident",
+            incident_id=incident.id
+        )
+
+    def get_metrics(self) -> dict:
+        return {
+            "alert_states": len(self.states),
+            "open_incidents": len(self.incidents),
+            "alert_states_evicted": self.states.evicted,
+            **self.stats,
+        }
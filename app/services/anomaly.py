@@ -0,0 +1,324 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+from uuid import UUID
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import SensorReading
+
+INITIAL_SLOTS = 64
+# Floors for the learned standard deviation, so a flat signal does not turn
+# sensor rounding into huge z-scores
+TEMPERATURE_MIN_STD = 0.2
+BPM_MIN_STD = 1.0
+
+SPIKE, DRIFT_UP, DRIFT_DOWN = 1, 2, 3
+
+# == SETTINGS ==
+
+class AnomalySettings(BaseModel):
+    enabled: bool = True
+    alpha: float = Field(0.02, gt=0, lt=1, description="EWMA weight of each new reading")
+    warmup: int = Field(30, ge=1, description="Readings before a baseline may raise alerts")
+    z_threshold: float = Field(4.0, gt=0, description="|z| of a single reading that raises a spike alert")
+    cusum_slack: float = Field(0.5, ge=0, description="CUSUM allowance k, in standard deviations")
+    cusum_threshold: float = Field(10.0, gt=0, description="CUSUM decision limit h, in standard deviations")
+    # Extra baseline per hour of day, used once warmed up (the overall one until then)
+    seasonal: bool = False
+    season_buckets: int = Field(24, gt=0)
+    season_period: float = Field(86400.0, gt=0, description="Seconds covered by the season buckets")
+
+# == BASELINES ==
+# EWMA mean and variance per entity, in NumPy arrays indexed by entity slot
+# (column 0 is the overall baseline, columns 1.. the hour-of-day ones when
+# seasonal). Each reading is scored against the baseline before being
+# folded into it:
+#   - spike: |z| >= z_threshold
+#   - drift: a two-sided CUSUM of z minus cusum_slack crosses
+#     cusum_threshold (both sums restart after any alert)
+# Updates are winsorized at z_threshold so one spike barely moves the
+# baseline, while a lasting level shift is learned (and reported as drift).
+#
+# A batch is applied in rounds: round r holds the r-th reading of every
+# entity present, so slots are unique inside a round and each round is a
+# single vectorized update, and an entity's readings still apply in order.
+
+class BaselineModel:
+    def __init__(self, settings: AnomalySettings, min_std: float):
+        self.settings = settings
+        self.min_std = min_std
+        self.columns = 1 + (settings.season_buckets if settings.seasonal else 0)
+        self.slots: Dict[Hashable, int] = {}
+        self._free: List[int] = []
+        self.capacity = 0
+        self.mean = np.zeros((0, self.columns))
+        self.var = np.zeros((0, self.columns))
+        self.count = np.zeros((0, self.columns), dtype=np.int64)
+        self.cusum_high = np.zeros(0)
+        self.cusum_low = np.zeros(0)
+        self._grow(INITIAL_SLOTS)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _grow(self, capacity: int):
+        extra = capacity - self.capacity
+        pad = lambda a: np.concatenate([a, np.zeros((extra,) + a.shape[1:], dtype=a.dtype)])
+        self.mean, self.var, self.count = pad(self.mean), pad(self.var), pad(self.count)
+        self.cusum_high, self.cusum_low = pad(self.cusum_high), pad(self.cusum_low)
+        self.capacity = capacity
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot = len(self.slots)
+                if slot >= self.capacity:
+                    self._grow(self.capacity * 2)
+            self.slots[key] = slot
+        return slot
+
+    def forget(self, key: Hashable):
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            return
+        self.mean[slot] = self.var[slot] = 0.0
+        self.count[slot] = 0
+        self.cusum_high[slot] = self.cusum_low[slot] = 0.0
+        self._free.append(slot)
+
+    # Season column of each reading, plus the neighbouring column and weight
+    # used to interpolate the expected value between bucket centres
+    def _seasons(self, timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        buckets = self.settings.season_buckets
+        position = (timestamps % self.settings.season_period) / self.settings.season_period * buckets
+        season = np.minimum(position.astype(np.int64), buckets - 1)
+        offset = position - season - 0.5
+        neighbour = (season + np.where(offset < 0, -1, 1)) % buckets
+        return 1 + season, 1 + neighbour, np.abs(offset)
+
+    # Returns (positions, kinds, z, baseline mean, baseline std) of the readings that fired
+    # (timestamps are only read by seasonal models)
+    def observe(self, keys: list, values, timestamps) -> Tuple[np.ndarray, ...]:
+        n = len(keys)
+        if n == 0:
+            return (np.empty(0, dtype=np.int64),) * 2 + (np.empty(0),) * 3
+        get = self.slots.get
+        slot_list = [get(k, -1) for k in keys]
+        if -1 in slot_list:
+            slot_list = [s if s >= 0 else self._slot(k) for k, s in zip(keys, slot_list)]
+        slots = np.array(slot_list, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if self.columns == 1:
+            seasons = neighbours = np.zeros(n, dtype=np.int64)
+            weights = np.zeros(n)
+        else:
+            seasons, neighbours, weights = self._seasons(np.asarray(timestamps, dtype=np.float64))
+
+        # Rank of each reading among the readings of its entity, in arrival order
+        order = np.argsort(slots, kind="stable")
+        ordered = slots[order]
+        starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+        fired = []
+        by_round = np.argsort(rank, kind="stable")
+        for rows in np.split(by_round, np.cumsum(np.bincount(rank))[:-1]):
+            fired.append(self._apply(rows, slots[rows], values[rows], seasons[rows], neighbours[rows], weights[rows]))
+        positions, kinds, z, mean, std = (np.concatenate(parts) for parts in zip(*fired))
+        order = np.argsort(positions, kind="stable")
+        return positions[order], kinds[order], z[order], mean[order], std[order]
+
+    def _apply(self, rows, slots, x, seasons, neighbours, weights) -> Tuple[np.ndarray, ...]:
+        s = self.settings
+        ready = self.count[slots, 0] >= s.warmup
+        # Hour-of-day baseline once it has warmed up itself, overall baseline
+        # before; its mean is interpolated towards the neighbouring hour when
+        # that one is warm too, so a smooth daily curve is not a staircase
+        if self.columns == 1:
+            column = 0
+            mean = self.mean[slots, 0]
+        else:
+            seasonal = self.count[slots, seasons] >= s.warmup
+            column = np.where(seasonal, seasons, 0)
+            mean = self.mean[slots, column]
+            blend = np.where(seasonal & (self.count[slots, neighbours] >= s.warmup), weights, 0.0)
+            mean = mean + blend * (self.mean[slots, neighbours] - mean)
+        std = np.maximum(np.sqrt(self.var[slots, column]), self.min_std)
+        z = np.where(ready, (x - mean) / std, 0.0)
+
+        high = np.maximum(0.0, self.cusum_high[slots] + z - s.cusum_slack)
+        low = np.maximum(0.0, self.cusum_low[slots] - z - s.cusum_slack)
+        spike = ready & (np.abs(z) >= s.z_threshold)
+        drift_up = ready & ~spike & (high > s.cusum_threshold)
+        drift_down = ready & ~spike & ~drift_up & (low > s.cusum_threshold)
+        k = np.flatnonzero(spike | drift_up | drift_down)
+        high[k] = 0.0
+        low[k] = 0.0
+        self.cusum_high[slots] = high
+        self.cusum_low[slots] = low
+
+        x = np.where(ready, np.clip(x, mean - s.z_threshold * std, mean + s.z_threshold * std), x)
+        self._fold(slots, 0, x)
+        if self.columns > 1:
+            self._fold(slots, seasons, x)
+
+        kinds = np.where(spike[k], SPIKE, np.where(drift_up[k], DRIFT_UP, DRIFT_DOWN))
+        return rows[k], kinds, z[k], mean[k], std[k]
+
+    # Incremental EWMA mean/variance. The weight starts at 1/n, so the first
+    # readings average plainly instead of all leaning on the first one.
+    def _fold(self, slots, column, x):
+        n = self.count[slots, column]
+        mean = self.mean[slots, column]
+        weight = np.maximum(self.settings.alpha, 1.0 / (n + 1))
+        diff = x - mean
+        step = weight * diff
+        self.mean[slots, column] = mean + step
+        self.var[slots, column] = (1.0 - weight) * (self.var[slots, column] + diff * step)
+        self.count[slots, column] = n + 1
+
+    def baseline(self, key: Hashable) -> Optional[dict]:
+        slot = self.slots.get(key)
+        if slot is None:
+            return None
+        return {
+            "mean": round(float(self.mean[slot, 0]), 2),
+            "std": round(float(np.sqrt(self.var[slot, 0])), 3),
+            "samples": int(self.count[slot, 0]),
+        }
+
+    # == CHECKPOINTS ==
+
+    def export_state(self) -> dict:
+        keys = list(self.slots)
+        slots = np.array(list(self.slots.values()), dtype=np.int64)
+        return {
+            "keys": [str(k) for k in keys],
+            "uuid_keys": bool(keys) and isinstance(keys[0], UUID),
+            "columns": self.columns,
+            "mean": self.mean[slots], "var": self.var[slots], "count": self.count[slots],
+            "cusum_high": self.cusum_high[slots], "cusum_low": self.cusum_low[slots],
+        }
+
+    # Skipped when the season layout changed since the export
+    def restore_state(self, state: dict):
+        if state["columns"] != self.columns:
+            return
+        to_key = UUID if state["uuid_keys"] else str
+        slots = np.array([self._slot(to_key(k)) for k in state["keys"]], dtype=np.int64)
+        self.mean[slots] = state["mean"]
+        self.var[slots] = state["var"]
+        self.count[slots] = state["count"]
+        self.cusum_high[slots] = state["cusum_high"]
+        self.cusum_low[slots] = state["cusum_low"]
+
+# == DETECTOR ==
+# One baseline per habitat for temperature and one per dinosaur for heart
+# rate. observe() is fed by the stream manager with the columns it already
+# extracts for the rolling aggregates and returns the firings as plain
+# tuples; alerts() builds Alerts afterwards, only for the readings no rule
+# fired on. They carry their own rule names, so AlertProcessor dedups and
+# clears them like any rule.
+
+class AnomalyDetector:
+    def __init__(self, settings: Optional[AnomalySettings] = None):
+        self.settings = settings or AnomalySettings()
+        self.temperature = BaselineModel(self.settings, TEMPERATURE_MIN_STD)
+        self.heart_rate = BaselineModel(self.settings, BPM_MIN_STD)
+        self.stats = {"anomaly_spikes": 0, "anomaly_drifts": 0}
+
+    # `temperature` and `heart_rate` are (batch positions, keys, values);
+    # returns (position, series, kind, value, z, mean, std) per firing.
+    # Only habitats and dinosaurs of the current park get a baseline (the
+    # others could never alert), so made-up ids cannot grow the models.
+    def observe(self, batch: list[SensorReading], temperature: tuple, heart_rate: tuple, park, dinos_map: dict) -> list:
+        if not self.settings.enabled:
+            return []
+        fired = []
+        for series, model, known, (index, keys, values) in (
+            ("temperature", self.temperature, lambda key: park.get_habitat(key) is not None, temperature),
+            ("heart_rate", self.heart_rate, dinos_map.__contains__, heart_rate),
+        ):
+            if not index:
+                continue
+            if not all(map(known, keys)):
+                kept = [k for k, key in enumerate(keys) if known(key)]
+                if not kept:
+                    continue
+                index, keys, values = [index[k] for k in kept], [keys[k] for k in kept], [values[k] for k in kept]
+            timestamps = [batch[i].timestamp for i in index] if model.columns > 1 else None
+            for k, kind, z, mean, std in zip(*(a.tolist() for a in model.observe(keys, values, timestamps))):
+                fired.append((index[k], series, kind, values[k], z, mean, std))
+        return fired
+
+    def alerts(self, batch: list[SensorReading], fired: list, park, dinos_map: dict) -> List[Tuple[int, Alert]]:
+        alerts = []
+        for i, series, kind, value, z, mean, std in fired:
+            if series == "temperature":
+                alert = self._temperature_alert(batch[i], kind, value, z, mean, std, park)
+            else:
+                alert = self._heart_rate_alert(batch[i], kind, value, z, mean, std, dinos_map)
+            if alert is not None:
+                alerts.append((i, alert))
+                self.stats["anomaly_spikes" if kind == SPIKE else "anomaly_drifts"] += 1
+        return alerts
+
+    @staticmethod
+    def _direction(kind: int, z: float) -> str:
+        if kind == SPIKE:
+            return "above" if z > 0 else "below"
+        return "drifting up" if kind == DRIFT_UP else "drifting down"
+
+    def _temperature_alert(self, reading, kind, value, z, mean, std, park) -> Optional[Alert]:
+        habitat = park.get_habitat(reading.habitat_id)
+        if habitat is None:
+            return None
+        spike = kind == SPIKE
+        return Alert(
+            sensor_id=reading.id,
+            habitat_id=reading.habitat_id,
+            severity=AlertSeverity.MEDIUM if spike else AlertSeverity.LOW,
+            message=f"Temperature anomaly in {habitat.name}: {value:.1f}C, {self._direction(kind, z)} "
+                    f"learned {mean:.1f}±{std:.1f}C" + (f" (z={z:+.1f})" if spike else ""),
+            triggered_value=round(value, 2),
+            rule="temperature_anomaly" if spike else "temperature_drift"
+        )
+
+    def _heart_rate_alert(self, reading, kind, value, z, mean, std, dinos_map) -> Optional[Alert]:
+        dino = dinos_map.get(reading.dinosaur_id)
+        if dino is None:
+            return None
+        spike = kind == SPIKE
+        return Alert(
+            sensor_id=reading.id,
+            habitat_id=reading.habitat_id,
+            severity=AlertSeverity.MEDIUM if spike else AlertSeverity.LOW,
+            message=f"Heart-rate anomaly for {dino.name} ({dino.species}): {value:.0f} BPM, "
+                    f"{self._direction(kind, z)} learned {mean:.0f}±{std:.0f}" + (f" (z={z:+.1f})" if spike else ""),
+            triggered_value=int(value),
+            rule="heart_rate_anomaly" if spike else "heart_rate_drift"
+        )
+
+    def forget_habitat(self, habitat_id):
+        self.temperature.forget(habitat_id)
+
+    def forget_dinosaur(self, dino_id: str):
+        self.heart_rate.forget(dino_id)
+
+    def export_state(self) -> dict:
+        return {"temperature": self.temperature.export_state(), "heart_rate": self.heart_rate.export_state()}
+
+    def restore_state(self, state: dict):
+        for name in ("temperature", "heart_rate"):
+            if name in state:
+                getattr(self, name).restore_state(state[name])
+
+    def get_metrics(self) -> dict:
+        return {
+            "anomaly_baselines": len(self.temperature) + len(self.heart_rate),
+            **self.stats,
+        }
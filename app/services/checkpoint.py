@@ -0,0 +1,466 @@
+import asyncio
+import gc
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+import numpy as np
+from pydantic import TypeAdapter
+
+from app.core.state import HABITAT_ADDED, HABITAT_REMOVED, DINOSAUR_ADDED, DINOSAUR_REMOVED, RESET
+from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.infrastructure import Park, Habitat
+
+logger = logging.getLogger("JurassicReactor")
+
+CHECKPOINT_INTERVAL = 60.0
+# A checkpoint is also taken once the journal grows past this many records
+MAX_JOURNAL_RECORDS = 10_000
+
+# == SNAPSHOT FILE ==
+# MAGIC, u64 header length, JSON header, then every NumPy array of the tree
+# as raw bytes at 8-byte aligned offsets. The header holds the tree itself
+# with arrays replaced by {"__array__": name}; reading maps the file and
+# builds each array as a zero-copy view on the mapping.
+
+MAGIC = b"JPSNAP01"
+ALIGN = 8
+
+def _aligned(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+def _strip_arrays(node, path: str, arrays: Dict[str, np.ndarray]):
+    if isinstance(node, np.ndarray):
+        arrays[path] = np.ascontiguousarray(node)
+        return {"__array__": path}
+    if isinstance(node, dict):
+        return {k: _strip_arrays(v, f"{path}/{k}", arrays) for k, v in node.items()}
+    if isinstance(node, (list, tuple)):
+        return [_strip_arrays(v, f"{path}/{i}", arrays) for i, v in enumerate(node)]
+    return node
+
+def _attach_arrays(node, arrays: Dict[str, np.ndarray]):
+    if isinstance(node, dict):
+        if "__array__" in node:
+            return arrays[node["__array__"]]
+        return {k: _attach_arrays(v, arrays) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_attach_arrays(v, arrays) for v in node]
+    return node
+
+def write_snapshot(path: str, tree: dict) -> int:
+    arrays: Dict[str, np.ndarray] = {}
+    meta = _strip_arrays(tree, "", arrays)
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset += _aligned(array.nbytes)
+    header = json.dumps({"tree": meta, "arrays": layout}, separators=(",", ":")).encode("utf-8")
+    prefix = MAGIC + struct.pack("<Q", len(header)) + header
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(prefix + b"\0" * (_aligned(len(prefix)) - len(prefix)))
+        for array in arrays.values():
+            if array.nbytes:
+                f.write(memoryview(array).cast("B"))
+                f.write(b"\0" * (_aligned(array.nbytes) - array.nbytes))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp, path)
+    return size
+
+def read_snapshot(path: str) -> dict:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mapped[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a park snapshot")
+    (header_length,) = struct.unpack_from("<Q", mapped, len(MAGIC))
+    start = len(MAGIC) + 8
+    header = json.loads(mapped[start:start + header_length])
+    base = _aligned(start + header_length)
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        count = int(np.prod(shape, dtype=np.int64))
+        if count == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=base + spec["offset"]).reshape(shape)
+    return _attach_arrays(header["tree"], arrays)
+
+# == PARK ENCODING ==
+# Columnar: UUIDs as (n, 16) uint8, strings as one UTF-8 blob plus offsets,
+# numbers as typed arrays, habitat members as indexes into the dinosaur
+# table (so each dinosaur's UUID is decoded once). Loading validates each
+# table with one TypeAdapter call, which runs entirely inside pydantic-core
+# and is several times cheaper than building the models one by one in
+# Python, even with model_construct.
+
+_dinosaurs_adapter = TypeAdapter(List[Dinosaur])
+_habitats_adapter = TypeAdapter(List[Habitat])
+
+CATEGORIES = list(DinoCategory)
+CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+def _uuid_column(ids: List[UUID]) -> np.ndarray:
+    return np.frombuffer(b"".join(u.bytes for u in ids), dtype=np.uint8).reshape(-1, 16)
+
+def _uuids(column: np.ndarray) -> List[UUID]:
+    raw = column.tobytes()
+    return [UUID(bytes=raw[i:i + 16]) for i in range(0, len(raw), 16)]
+
+# Canonical str() of every UUID in the column, formatted in one NumPy pass
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+def _uuid_strings(column: np.ndarray) -> List[str]:
+    digits = np.empty((len(column), 32), dtype=np.uint8)
+    digits[:, 0::2] = HEX_DIGITS[column >> 4]
+    digits[:, 1::2] = HEX_DIGITS[column & 15]
+    raw = np.insert(digits, [8, 12, 16, 20], ord("-"), axis=1).tobytes().decode("ascii")
+    return [raw[i:i + 36] for i in range(0, len(raw), 36)]
+
+def _string_column(values: List[str]) -> dict:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return {"blob": np.frombuffer(b"".join(encoded), dtype=np.uint8), "offsets": offsets}
+
+def _strings(column: dict) -> List[str]:
+    raw = column["blob"].tobytes()
+    offsets = column["offsets"].tolist()
+    return [raw[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+def encode_park(park: Park, dinosaurs: Dict[str, Dinosaur]) -> dict:
+    habitats = park.habitats
+    dinos = list(dinosaurs.values())
+    # Members point into the dinosaur table; ids with no registered dinosaur
+    # are appended after it in `unregistered`
+    position = {d.id: k for k, d in enumerate(dinos)}
+    unregistered = []
+    members = []
+    for h in habitats:
+        for dino_id in h.dinosaur_ids:
+            k = position.get(dino_id)
+            if k is None:
+                k = position[dino_id] = len(position)
+                unregistered.append(dino_id)
+            members.append(k)
+    member_offsets = np.zeros(len(habitats) + 1, dtype=np.int64)
+    np.cumsum([len(h.dinosaur_ids) for h in habitats], out=member_offsets[1:])
+    return {
+        "name": park.name,
+        "habitats": {
+            "id": _uuid_column([h.id for h in habitats]),
+            "name": _string_column([h.name for h in habitats]),
+            "size": np.array([(h.size.x, h.size.y, h.size.z) for h in habitats], dtype=np.float64).reshape(-1, 3),
+            "mean_temperature": np.array([h.mean_temperature for h in habitats], dtype=np.float64),
+            "members": np.array(members, dtype=np.int64),
+            "unregistered": _uuid_column(unregistered),
+            "member_offsets": member_offsets,
+        },
+        "dinosaurs": {
+            "id": _uuid_column([d.id for d in dinos]),
+            "name": _string_column([d.name for d in dinos]),
+            "species": _string_column([d.species for d in dinos]),
+            "category": np.array([CATEGORY_CODES[d.category] for d in dinos], dtype=np.uint8),
+            "health_points": np.array([d.health_points for d in dinos], dtype=np.int16),
+            "heart_rate": np.array([d.heart_rate for d in dinos], dtype=np.int32),
+        },
+    }
+
+def decode_park(data: dict):
+    h, d = data["habitats"], data["dinosaurs"]
+    keys = _uuid_strings(d["id"])
+    dinos = _dinosaurs_adapter.validate_python([
+        {"id": key, "name": name, "species": species, "category": CATEGORIES[category],
+         "health_points": health, "heart_rate": heart_rate}
+        for key, name, species, category, health, heart_rate in zip(
+            keys, _strings(d["name"]), _strings(d["species"]),
+            d["category"].tolist(), d["health_points"].tolist(), d["heart_rate"].tolist()
+        )
+    ])
+    dinosaurs = dict(zip(keys, dinos))
+
+    ids = [dino.id for dino in dinos] + _uuids(h["unregistered"])
+    members = [ids[k] for k in h["members"].tolist()]
+    offsets = h["member_offsets"].tolist()
+    habitats = _habitats_adapter.validate_python([
+        {"id": habitat_id, "name": name, "size": {"x": x, "y": y, "z": z},
+         "mean_temperature": temperature, "dinosaur_ids": members[offsets[k]:offsets[k + 1]]}
+        for k, (habitat_id, name, (x, y, z), temperature) in enumerate(zip(
+            _uuid_strings(h["id"]), _strings(h["name"]), h["size"].tolist(), h["mean_temperature"].tolist()
+        ))
+    ])
+    return Park(name=data["name"], habitats=habitats), dinosaurs
+
+# == JOURNAL ==
+# One JSON line per state change after the snapshot, tagged with the run
+# that wrote it and its state version (versions restart with every run).
+# Replay applies the same Park operations as the StateStore and skips
+# records of the snapshot's own run it already contains; a torn last line
+# (crash while writing) ends the replay.
+
+def journal_record(snapshot, change, run: str) -> Optional[dict]:
+    record = {"run": run, "v": change.version, "kind": change.kind}
+    if change.kind == HABITAT_ADDED:
+        habitat = snapshot.park.get_habitat(change.habitat_ids[0])
+        if habitat is None:
+            return None
+        record["habitat"] = habitat.model_dump(mode="json")
+    elif change.kind == HABITAT_REMOVED:
+        record["habitat_id"] = str(change.habitat_ids[0])
+    elif change.kind == DINOSAUR_ADDED:
+        dino = snapshot.dinosaurs.get(change.dinosaur_id)
+        if dino is None:
+            return None
+        habitat = snapshot.park.get_dinosaur_habitat(dino.id)
+        record["dinosaur"] = dino.model_dump(mode="json")
+        record["habitat_id"] = str(habitat.id) if habitat else None
+    elif change.kind == DINOSAUR_REMOVED:
+        record["dinosaur_id"] = change.dinosaur_id
+    else:
+        return None
+    return record
+
+def replay_journal(path: str, park: Park, dinosaurs: Dict[str, Dinosaur], run: str, after_version: int) -> int:
+    if not os.path.exists(path):
+        return 0
+    applied = 0
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Checkpoint journal ends with a torn record after {applied} changes")
+                break
+            if record["run"] == run and record["v"] <= after_version:
+                continue
+            kind = record["kind"]
+            if kind == HABITAT_ADDED:
+                habitat = Habitat.model_validate(record["habitat"])
+                park.remove_habitat(habitat.id)
+                park.add_habitat(habitat)
+            elif kind == HABITAT_REMOVED:
+                park.remove_habitat(UUID(record["habitat_id"]))
+            elif kind == DINOSAUR_ADDED:
+                dino = Dinosaur.model_validate(record["dinosaur"])
+                dinosaurs[str(dino.id)] = dino
+                if record["habitat_id"]:
+                    park.assign_dinosaur(UUID(record["habitat_id"]), dino.id)
+            elif kind == DINOSAUR_REMOVED:
+                dinosaurs.pop(record["dinosaur_id"], None)
+                try:
+                    park.unassign_dinosaur(UUID(record["dinosaur_id"]))
+                except ValueError:
+                    pass
+            applied += 1
+    return applied
+
+class RestoredState:
+    def __init__(self, park: Park, registry: Dict[str, Dinosaur], stats: Optional[dict], replayed: int, seconds: float):
+        self.park = park
+        self.registry = registry
+        self.stats = stats
+        self.replayed = replayed
+        self.seconds = seconds
+
+    @property
+    def dinosaurs(self) -> List[Dinosaur]:
+        return list(self.registry.values())
+
+# == CHECKPOINTER ==
+# Subscribed to the StateStore: every change becomes a journal record. A
+# periodic task captures the current immutable StateSnapshot plus the
+# manager's counters/aggregates (copied in chunks on the event loop) and
+# hands them to the writer thread, which serializes and fsyncs the snapshot
+# and then truncates the journal. Journal records and checkpoints share one
+# queue, so the journal restarts exactly after the snapshot's version.
+
+class Checkpointer:
+    def __init__(self, directory: str, interval: float = CHECKPOINT_INTERVAL,
+                 max_journal_records: int = MAX_JOURNAL_RECORDS):
+        self.directory = directory
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.snapshot_path = os.path.join(directory, "park.snapshot")
+        self.journal_path = os.path.join(directory, "park.journal")
+        self.interval = interval
+        self.max_journal_records = max_journal_records
+
+        self._store = None
+        self._manager = None
+        self._task = None
+        self._wake = None
+        self._loop = None
+        self._loop_thread = None
+        self._pending_records = 0
+        self.run = uuid4().hex[:8]
+        self._queue: queue.Queue = queue.Queue()
+        self.stats = {
+            "checkpoints_written": 0,
+            "checkpoint_failures": 0,
+            "checkpoint_bytes": 0,
+            "checkpoint_write_seconds": 0.0,
+            "journal_records_written": 0,
+            "restore_seconds": 0.0,
+            "restored_journal_records": 0,
+        }
+        self._thread = threading.Thread(target=self._run, name="jurassic-checkpoint", daemon=True)
+        self._thread.start()
+
+    # == BOOT ==
+
+    def load(self) -> Optional[RestoredState]:
+        if not os.path.exists(self.snapshot_path):
+            return None
+        started = time.perf_counter()
+        # Only long-lived objects are created here: collections triggered
+        # by every 700 allocations would just rescan them (about half the load time)
+        paused = gc.isenabled()
+        gc.disable()
+        try:
+            tree = read_snapshot(self.snapshot_path)
+            park, registry = decode_park(tree["park"])
+            replayed = replay_journal(self.journal_path, park, registry, tree["run"], tree["state_version"])
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Checkpoint unreadable, booting fresh: {e}")
+            return None
+        finally:
+            if paused:
+                gc.enable()
+        seconds = time.perf_counter() - started
+        self.stats["restore_seconds"] = round(seconds, 4)
+        self.stats["restored_journal_records"] = replayed
+        logger.info(f"Park restored from checkpoint in {seconds * 1e3:.0f} ms "
+                    f"({len(park.habitats)} habitats, {len(registry)} dinosaurs, {replayed} journal records).")
+        return RestoredState(park, registry, tree.get("stats"), replayed, seconds)
+
+    # == RUNTIME ==
+
+    def start(self, store, manager):
+        self._store = store
+        self._manager = manager
+        self._loop = asyncio.get_event_loop()
+        self._loop_thread = threading.get_ident()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._periodic())
+        # Compact right away when there is no snapshot yet or the journal was replayed
+        if not os.path.exists(self.snapshot_path) or self.stats["restored_journal_records"]:
+            self._wake.set()
+
+    def on_state_change(self, snapshot, change):
+        if change.kind == RESET:
+            self.request_checkpoint()
+            return
+        record = journal_record(snapshot, change, self.run)
+        if record is None:
+            return
+        self._queue.put(("journal", record))
+        self._pending_records += 1
+        if self._pending_records >= self.max_journal_records:
+            self.request_checkpoint()
+
+    def request_checkpoint(self):
+        if self._wake is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._wake.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _periodic(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                self.stats["checkpoint_failures"] += 1
+                logger.error(f"Checkpoint capture failed: {e}")
+
+    async def checkpoint(self):
+        stats = await self._manager.capture_state() if self._manager else None
+        # The journal is truncated once this snapshot is written, so no change
+        # may be journaled between taking it and queueing it
+        self._store.with_snapshot(lambda snapshot: self._enqueue_checkpoint(snapshot, stats))
+
+    def _enqueue_checkpoint(self, snapshot, stats):
+        if snapshot.park is None:
+            return
+        self._pending_records = 0
+        self._queue.put(("checkpoint", (snapshot, stats)))
+
+    # Final checkpoint at shutdown, then stops the writer
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._store is not None:
+            stats = self._manager.export_state() if self._manager else None
+            self._store.with_snapshot(lambda snapshot: self._enqueue_checkpoint(snapshot, stats))
+        self._queue.put(None)
+        self._thread.join()
+
+    # == WRITER THREAD ==
+
+    def _run(self):
+        journal = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, payload = item
+            try:
+                if kind == "journal":
+                    if journal is None:
+                        journal = open(self.journal_path, "ab")
+                    journal.write(json.dumps(payload, separators=(",", ":")).encode("utf-8") + b"\n")
+                    # Flush once the queue is drained, not per record
+                    if self._queue.empty():
+                        journal.flush()
+                        os.fsync(journal.fileno())
+                    self.stats["journal_records_written"] += 1
+                else:
+                    if journal is not None:
+                        journal.close()
+                        journal = None
+                    self._write_checkpoint(*payload)
+            except (OSError, ValueError) as e:
+                self.stats["checkpoint_failures"] += 1
+                logger.error(f"Checkpoint write failed: {e}")
+        if journal is not None:
+            journal.close()
+
+    def _write_checkpoint(self, snapshot, stats):
+        started = time.perf_counter()
+        tree = {
+            "run": self.run,
+            "state_version": snapshot.version,
+            "created": time.time(),
+            "park": encode_park(snapshot.park, snapshot.dinosaurs),
+        }
+        if stats is not None:
+            tree["stats"] = stats
+        size = write_snapshot(self.snapshot_path, tree)
+        # Everything up to snapshot.version is in the snapshot now
+        with open(self.journal_path, "wb") as f:
+            os.fsync(f.fileno())
+        self.stats["checkpoints_written"] += 1
+        self.stats["checkpoint_bytes"] = size
+        self.stats["checkpoint_write_seconds"] = round(time.perf_counter() - started, 4)
+
+    def get_metrics(self) -> dict:
+        return dict(self.stats)
@@ -0,0 +1,756 @@
+import asyncio
+import bisect
+import concurrent.futures
+import hashlib
+import logging
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from app.core.metrics import MetricsRegistry
+from app.core.metrics_history import MetricsHistory, HISTORY_INTERVAL
+from app.core.state import StateStore, RESET
+from app.models.events import SensorReading, SensorType
+from app.models.infrastructure import Park
+from app.services.alert_bus import AlertBus
+from app.services.alert_processor import AlertProcessingSettings
+from app.services.anomaly import AnomalySettings
+from app.services.watchdog import WatchdogSettings
+from app.services.event_store import STORE_GAUGES
+from app.services.ingest_buffer import IngestSettings
+from app.services.ingestion import IngestUnavailableError
+from app.services.rule_engine import RuleEngine, RuleLoadError
+from app.services.stream_manager import JurassicStreamManager, RULES_POLL_INTERVAL
+
+logger = logging.getLogger("JurassicReactor")
+
+VIRTUAL_NODES = 64
+PARTITION_START_TIMEOUT = 30.0
+# Answered on the partition's command thread, without a loop round trip
+INGEST_COMMANDS = ("ingest", "reserve", "release_credits", "commit")
+
+# == CONSISTENT HASH RING ==
+# Each partition owns VIRTUAL_NODES points on a 64-bit ring; a habitat
+# belongs to the first point at or after its hash. Adding or removing a
+# partition only moves the habitats between it and its neighbours.
+
+def _ring_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+class HashRing:
+    def __init__(self, nodes=(), vnodes: int = VIRTUAL_NODES):
+        self.vnodes = vnodes
+        self.nodes = set()
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def add(self, node: str):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = _ring_hash(f"{node}#{i}")
+            k = bisect.bisect(self._points, point)
+            self._points.insert(k, point)
+            self._owners.insert(k, node)
+
+    def remove(self, node: str):
+        if node not in self.nodes:
+            return
+        self.nodes.discard(node)
+        kept = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [o for _, o in kept]
+
+    def owner(self, key) -> Optional[str]:
+        if not self._points:
+            return None
+        k = bisect.bisect(self._points, _ring_hash(str(key)))
+        return self._owners[k % len(self._points)]
+
+# == PARTITION PROCESS ==
+# A full JurassicStreamManager over the habitats it owns, fed through a
+# partition-local StateStore. Two Unix socket connections to the coordinator:
+# commands (requests and replies, plus fire-and-forget "put" batches) and
+# events (published alerts, one message per batch).
+
+def _on_loop(loop, fn, *args):
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+    loop.call_soon_threadsafe(run)
+    return future.result()
+
+def _partition_main(address: str, authkey: bytes, park_name: str, rules: list,
+                    ingest_settings: Optional[IngestSettings], alert_settings: Optional[AlertProcessingSettings],
+                    anomaly_settings: Optional[AnomalySettings], watchdog_settings: Optional[WatchdogSettings]):
+    # The coordinator logs the alerts; partitions stay quiet
+    logging.getLogger("JurassicReactor").addHandler(logging.NullHandler())
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    store = StateStore()
+    store.load(Park(name=park_name), [])
+    manager = JurassicStreamManager(
+        store.park, [], ingest_settings,
+        rules=RuleEngine(store.park, definitions=rules),
+        alert_settings=alert_settings,
+        anomaly_settings=anomaly_settings,
+        watchdog_settings=watchdog_settings
+    )
+    store.subscribe(manager.on_state_change)
+    manager.initialize()
+
+    listener = Listener(address, family="AF_UNIX", authkey=authkey)
+    commands = listener.accept()
+    events = listener.accept()
+    listener.close()
+    manager.alert_sink = events.send
+
+    handlers = {
+        "assign": lambda payload: store.upsert_habitat(*payload).version,
+        "release": lambda habitat_id: store.remove_habitat(habitat_id, drop_dinosaurs=True),
+        "metrics": lambda _: manager.get_system_metrics(),
+        "prometheus": lambda _: manager.render_prometheus(),
+        "habitat_stats": lambda habitat_id: manager.get_habitat_stats(store.park.get_habitat(habitat_id)),
+        "load_rules": lambda definitions: manager.replace_rules(definitions),
+        "history_sample": lambda _: manager.history_sample(),
+        "sensors": lambda query: manager.list_sensors(*query),
+    }
+
+    # Ingest slots promised to multi-partition requests between their
+    # "reserve" and "commit"; only touched by the command thread
+    reserved = 0
+
+    def ingest(command: str, payload):
+        nonlocal reserved
+        free = manager.available_credits() - reserved
+        # Refusals are counted once, by the coordinator
+        if command == "ingest":
+            ok = manager.buffer.put_batch(payload, reserved)
+            return ok, manager.available_credits() - reserved
+        if command == "reserve":
+            ok = payload <= free
+            reserved += payload if ok else 0
+            return ok, free - payload if ok else free
+        if command == "release_credits":
+            reserved = max(0, reserved - payload)
+            return True, free + payload
+        # commit: the share of a reservation that held on every partition
+        reserved = max(0, reserved - len(payload))
+        manager.on_sensor_batch(payload)
+        return True, manager.available_credits() - reserved
+
+    def serve():
+        while True:
+            try:
+                command, payload = commands.recv()
+            except (EOFError, OSError):
+                break
+            if command == "put":
+                manager.on_sensor_batch(payload)
+                continue
+            if command == "stop":
+                break
+            try:
+                if command in INGEST_COMMANDS:
+                    result = ingest(command, payload)
+                else:
+                    result = _on_loop(loop, handlers[command], payload)
+                commands.send(("ok", result))
+            except Exception as e:
+                commands.send(("error", f"{type(e).__name__}: {e}"))
+        loop.call_soon_threadsafe(loop.stop)
+
+    threading.Thread(target=serve, name="jurassic-partition-commands", daemon=True).start()
+    loop.run_forever()
+    manager.shutdown()
+    commands.close()
+    events.close()
+
+class _Partition:
+    def __init__(self, name: str, ctx, socket_dir: str, authkey: bytes, args: tuple, credits: int):
+        self.name = name
+        self.address = os.path.join(socket_dir, f"{name}.sock")
+        self.process = ctx.Process(
+            target=_partition_main,
+            args=(self.address, authkey, *args),
+            name=f"jurassic-{name}",
+            daemon=True
+        )
+        self.process.start()
+        self.commands = self._connect(authkey)
+        self.events = self._connect(authkey)
+        # Serializes request/reply pairs and keeps batches in order
+        self.lock = threading.Lock()
+        # Last known free ingest slots
+        self.credits = credits
+
+    def _connect(self, authkey: bytes):
+        deadline = time.monotonic() + PARTITION_START_TIMEOUT
+        while True:
+            try:
+                return Client(self.address, family="AF_UNIX", authkey=authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if not self.process.is_alive() or time.monotonic() > deadline:
+                    self.process.kill()
+                    raise RuntimeError(f"Partition {self.name} did not start")
+                time.sleep(0.05)
+
+    def send(self, command: str, payload):
+        with self.lock:
+            self.commands.send((command, payload))
+
+    def call(self, command: str, payload=None):
+        with self.lock:
+            self.commands.send((command, payload))
+            status, result = self.commands.recv()
+        if status == "error":
+            raise RuntimeError(f"Partition {self.name}: {result}")
+        return result
+
+    def stop(self):
+        try:
+            self.send("stop", None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.commands.close()
+        self.events.close()
+
+# == METRICS MERGING ==
+# Counters and rates add up across partitions. Latency percentiles and
+# maxima take the worst partition (an upper bound, not the exact cluster
+# percentile); averages are averaged over the partitions reporting one
+# (None until their first sample, so idle partitions do not pull them down).
+
+def merge_metrics(results: List[dict]) -> dict:
+    merged = {}
+    for key in dict.fromkeys(k for result in results for k in result):
+        values = [result[key] for result in results if result.get(key) is not None]
+        if not values:
+            merged[key] = None
+        elif not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            merged[key] = values[0]
+        elif key.endswith("_ms") or key.startswith("max_") or key == "uptime_seconds":
+            merged[key] = max(values)
+        elif key.startswith("avg_"):
+            merged[key] = round(sum(values) / len(values), 2)
+        else:
+            total = sum(values)
+            merged[key] = round(total, 3) if isinstance(total, float) else total
+    return merged
+
+# Sensor pages are ordered by id in every partition, so the first `limit`
+# of their union is the cluster page; totals and status counts add up
+def merge_sensor_pages(pages: List[dict], limit: int) -> dict:
+    sensors = sorted((sensor for page in pages for sensor in page["sensors"]), key=lambda sensor: sensor["sensor_id"])
+    more = len(sensors) > limit or any(page["next"] is not None for page in pages)
+    sensors = sensors[:limit]
+    return {
+        "total": sum(page["total"] for page in pages),
+        "summary": merge_metrics([page["summary"] for page in pages]),
+        "sensors": sensors,
+        "next": sensors[-1]["sensor_id"] if more and sensors else None,
+    }
+
+def _with_label(sample: str, key: str, value: str) -> str:
+    brace, space = sample.find("{"), sample.find(" ")
+    if brace != -1 and brace < space:
+        return f'{sample[:brace + 1]}{key}="{value}",{sample[brace + 1:]}'
+    return f'{sample[:space]}{{{key}="{value}"}}{sample[space:]}'
+
+# Groups the samples of every partition under one HELP/TYPE header per
+# metric, each tagged with a partition label
+def merge_prometheus(texts: Dict[str, str]) -> str:
+    families = {}
+    for partition, text in texts.items():
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# "):
+                family = families.setdefault(line.split(" ", 3)[2], ([], []))
+                if line not in family[0]:
+                    family[0].append(line)
+            elif line and family is not None:
+                family[1].append(_with_label(line, "partition", partition))
+    lines = [line for headers, samples in families.values() for line in headers + samples]
+    return "\n".join(lines) + "\n" if lines else ""
+
+# == COORDINATOR ==
+# Stands in for the JurassicStreamManager in the API process: same ingest,
+# metrics, rules and alert interface, but readings are routed to the
+# partition owning their habitat (heart rate: the habitat of the dinosaur)
+# and alerts come back over the events connection. Placement follows the
+# StateStore: habitat changes are forwarded to their owner, and partitions
+# joining or leaving move only the habitats whose owner changed (assigned
+# to the new owner first, then released by the old one).
+
+class ClusterCoordinator:
+    def __init__(self, park_context, dinos_context, workers: int, ingest_settings: Optional[IngestSettings] = None,
+                 event_store=None, rules: Optional[RuleEngine] = None,
+                 alert_settings: Optional[AlertProcessingSettings] = None,
+                 anomaly_settings: Optional[AnomalySettings] = None,
+                 watchdog_settings: Optional[WatchdogSettings] = None, vnodes: int = VIRTUAL_NODES):
+        self._context = (park_context, {str(d.id): d for d in dinos_context})
+        self._dino_habitats = self._index_dinosaurs(park_context)
+
+        # Front copy of the rules: watched and edited here, pushed to partitions
+        self.rules = rules or RuleEngine.from_file(park_context)
+        self._rules_task = None
+
+        # Readings and alerts are persisted here, the single writer
+        self.event_store = event_store
+        self.ingest_settings = ingest_settings or IngestSettings()
+        self.alert_settings = alert_settings
+        self.anomaly_settings = anomaly_settings
+        self.watchdog_settings = watchdog_settings
+        self.alert_bus = AlertBus()
+
+        self.workers = workers
+        self.ring = HashRing(vnodes=vnodes)
+        self.partitions: Dict[str, _Partition] = {}
+        # habitat_id -> partition name; replaced as a whole on every change
+        self.owners: Dict[UUID, str] = {}
+        self._placement_lock = threading.RLock()
+        self._placement = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="jurassic-placement")
+        self._ctx = mp.get_context("spawn")
+        self._authkey = os.urandom(16)
+        self._socket_dir = None
+        self._next_index = 0
+        self.loop = None
+
+        self.stats = {"start_time": datetime.now(), "rebalances": 0, "habitats_moved": 0}
+        self.metrics = MetricsRegistry()
+        self._routed = self.metrics.counter("cluster_events_routed_total", "Readings sent to a partition")
+        self._unroutable = self.metrics.counter("cluster_events_unroutable_total", "Readings with no owning partition")
+        self._rejected = self.metrics.counter("cluster_events_rejected_total", "Readings refused by a partition")
+        self._alerts = {}
+        self.metrics.gauge("cluster_partitions", lambda: len(self.partitions))
+        self.metrics.gauge("cluster_habitats", lambda: len(self.owners), "Habitats placed on a partition")
+        self.metrics.gauge("cluster_rebalances", lambda: self.stats["rebalances"])
+        self.metrics.gauge("alert_subscribers", lambda: len(self.alert_bus.subscribers))
+        if event_store:
+            for name, description in STORE_GAUGES:
+                self.metrics.gauge(name, lambda name=name: event_store.get_metrics()[name], description)
+
+        # Sampled from all partitions once per interval
+        self.history = MetricsHistory()
+        self._history_task = None
+
+    @property
+    def park(self):
+        return self._context[0]
+
+    @property
+    def dinos_map(self) -> dict:
+        return self._context[1]
+
+    def initialize(self):
+        self.loop = asyncio.get_event_loop()
+        self._socket_dir = tempfile.mkdtemp(prefix="jurassic-cluster-")
+        # Start everything first so the initial placement moves nothing
+        for _ in range(self.workers):
+            name = self._next_name()
+            self.partitions[name] = self._start_partition(name)
+            self.ring.add(name)
+        with self._placement_lock:
+            self._rebalance()
+        self._history_task = self.loop.create_task(self._sample_history())
+        if self.rules.path:
+            self._rules_task = self.loop.create_task(self._watch_rules())
+        logger.info(f"Cluster mode: {len(self.partitions)} partitions, {len(self.owners)} habitats placed.")
+
+    def shutdown(self):
+        if self._rules_task:
+            self._rules_task.cancel()
+            self._rules_task = None
+        if self._history_task:
+            self._history_task.cancel()
+            self._history_task = None
+        self._placement.shutdown(wait=True)
+        for partition in list(self.partitions.values()):
+            partition.stop()
+        self.partitions.clear()
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None
+
+    # == MEMBERSHIP ==
+
+    def _next_name(self) -> str:
+        name = f"partition-{self._next_index}"
+        self._next_index += 1
+        return name
+
+    def _start_partition(self, name: str) -> _Partition:
+        args = (self.park.name, self.rules.definitions, self.ingest_settings, self.alert_settings, self.anomaly_settings,
+                self.watchdog_settings)
+        partition = _Partition(name, self._ctx, self._socket_dir, self._authkey, args, self.ingest_settings.capacity)
+        threading.Thread(target=self._read_alerts, args=(partition,), name=f"jurassic-{name}-events", daemon=True).start()
+        return partition
+
+    # Blocks while the new process starts; call it off the event loop
+    def add_worker(self) -> str:
+        name = self._next_name()
+        partition = self._start_partition(name)
+        with self._placement_lock:
+            self.partitions[name] = partition
+            self.ring.add(name)
+            moved = self._rebalance()
+        logger.info(f"Partition {name} joined, {moved} habitats moved.")
+        return name
+
+    def remove_worker(self, name: str) -> int:
+        with self._placement_lock:
+            partition = self.partitions.get(name)
+            if partition is None:
+                raise KeyError(name)
+            if len(self.partitions) == 1:
+                raise ValueError("Cannot remove the last partition")
+            self.ring.remove(name)
+            moved = self._rebalance()
+            del self.partitions[name]
+        partition.stop()
+        logger.info(f"Partition {name} left, {moved} habitats moved.")
+        return moved
+
+    def _rebalance(self) -> int:
+        park, dinos = self._context
+        previous = self.owners
+        owners = {}
+        moved = 0
+        for habitat in park.habitats:
+            owner = self.ring.owner(habitat.id)
+            if owner is None:
+                continue
+            if previous.get(habitat.id) != owner:
+                self._assign(owner, habitat, dinos)
+                moved += habitat.id in previous
+            owners[habitat.id] = owner
+        self.owners = owners
+
+        for habitat_id, owner in previous.items():
+            if owners.get(habitat_id) != owner and owner in self.partitions:
+                self._call(owner, "release", habitat_id)
+        self.stats["rebalances"] += 1
+        self.stats["habitats_moved"] += moved
+        return moved
+
+    def _assign(self, owner: str, habitat, dinos: dict):
+        registered = [dinos[str(d)] for d in habitat.dinosaur_ids if str(d) in dinos]
+        self._call(owner, "assign", (habitat, registered))
+
+    def _call(self, name: str, command: str, payload=None):
+        try:
+            return self.partitions[name].call(command, payload)
+        except (RuntimeError, EOFError, OSError) as e:
+            logger.error(f"Cluster {command} on {name} failed: {e}")
+            return None
+
+    # == STATE ==
+
+    @staticmethod
+    def _index_dinosaurs(park) -> Dict[str, UUID]:
+        return {str(d): h.id for h in park.habitats for d in h.dinosaur_ids}
+
+    # Runs on the writer's thread (often the event loop): the new context is
+    # swapped in right away (one reference each) and the partition round
+    # trips are queued on the single placement thread, in version order
+    def on_state_change(self, snapshot, change):
+        self._context = (snapshot.park, snapshot.dinosaurs)
+        self._dino_habitats = self._index_dinosaurs(snapshot.park)
+        self.rules.park = snapshot.park
+        self._placement.submit(self._apply_change, snapshot, change)
+
+    def _apply_change(self, snapshot, change):
+        try:
+            self._place(snapshot, change)
+        except Exception as e:
+            logger.error(f"Cluster placement failed on {change}: {e}")
+
+    def _place(self, snapshot, change):
+        with self._placement_lock:
+            if change.kind == RESET:
+                self._rebalance()
+                return
+
+            owners = dict(self.owners)
+            for habitat_id in change.habitat_ids:
+                habitat = snapshot.park.get_habitat(habitat_id)
+                if habitat is None:
+                    owner = owners.pop(habitat_id, None)
+                    if owner:
+                        self._call(owner, "release", habitat_id)
+                    continue
+                owner = self.ring.owner(habitat_id)
+                if owner is not None:
+                    self._assign(owner, habitat, snapshot.dinosaurs)
+                    owners[habitat_id] = owner
+            self.owners = owners
+
+    # == INGESTION ==
+
+    def _route(self, readings: list[SensorReading]) -> Dict[str, list]:
+        owners = self.owners
+        dino_habitats = self._dino_habitats
+        parts = {}
+        unroutable = 0
+        for reading in readings:
+            habitat_id = reading.habitat_id
+            if reading.sensor_type == SensorType.HEART_RATE:
+                habitat_id = dino_habitats.get(reading.dinosaur_id, habitat_id)
+            owner = owners.get(habitat_id)
+            if owner is None:
+                unroutable += 1
+                continue
+            part = parts.get(owner)
+            if part is None:
+                part = parts[owner] = []
+            part.append(reading)
+        if unroutable:
+            self._unroutable.inc(unroutable)
+        return parts
+
+    def on_sensor_data(self, data: SensorReading):
+        self.on_sensor_batch([data])
+
+    def on_sensor_batch(self, readings: list[SensorReading]):
+        for name, part in self._route(readings).items():
+            partition = self.partitions.get(name)
+            try:
+                partition.send("put", part)
+            except (AttributeError, BrokenPipeError, OSError):
+                self._unroutable.inc(len(part))
+                continue
+            self._routed.inc(len(part))
+            if self.event_store:
+                self.event_store.append(part, [])
+
+    def available_credits(self) -> int:
+        return sum(p.credits for p in list(self.partitions.values()))
+
+    # All or nothing, like JurassicStreamManager.try_ingest. A single share
+    # is offered as is; a request spanning several partitions first reserves
+    # credits on each of them and only sends the shares once every
+    # reservation holds, so no partition keeps part of a refused request.
+    # Raises IngestUnavailableError when no reading has a live owner, or when
+    # a partition fails between its reservation and the commit.
+    # Makes blocking round trips to the partitions; call it off the event loop.
+    def try_ingest(self, readings: list[SensorReading]) -> bool:
+        if not readings:
+            return True
+        parts = [(self.partitions.get(name), part) for name, part in self._route(readings).items()]
+        if not parts:
+            raise IngestUnavailableError("No partition owns these readings")
+        failed = 0
+        if len(parts) == 1:
+            partition, part = parts[0]
+            if not self._offer(partition, "ingest", part):
+                self._rejected.inc(len(part))
+                return False
+            accepted = [part]
+        else:
+            reserved = []
+            for partition, part in parts:
+                if not self._offer(partition, "reserve", len(part)):
+                    for holder, share in reserved:
+                        self._offer(holder, "release_credits", len(share))
+                    self._rejected.inc(sum(len(share) for _, share in parts))
+                    return False
+                reserved.append((partition, part))
+            accepted = []
+            for partition, part in parts:
+                if self._offer(partition, "commit", part):
+                    accepted.append(part)
+                    continue
+                logger.error(f"Cluster commit of {len(part)} readings failed: partition unavailable")
+                # In case it is still there, give its reservation back
+                self._offer(partition, "release_credits", len(part))
+                self._unroutable.inc(len(part))
+                failed += len(part)
+
+        for part in accepted:
+            self._routed.inc(len(part))
+            if self.event_store:
+                self.event_store.append(part, [])
+        if failed:
+            raise IngestUnavailableError(f"{failed} readings lost with their partition",
+                                         accepted=sum(len(part) for part in accepted))
+        return True
+
+    # Sends an ingest command and records the partition's remaining credits
+    @staticmethod
+    def _offer(partition: Optional[_Partition], command: str, payload) -> bool:
+        try:
+            ok, partition.credits = partition.call(command, payload)
+        except (AttributeError, RuntimeError, EOFError, OSError):
+            return False
+        return ok
+
+    # == ALERTS ==
+
+    def _read_alerts(self, partition: _Partition):
+        while True:
+            try:
+                alerts = partition.events.recv()
+            except (EOFError, OSError):
+                break
+            try:
+                self.loop.call_soon_threadsafe(self._publish_alerts, alerts)
+            except RuntimeError:
+                break
+
+    def _publish_alerts(self, alerts: list):
+        for alert in alerts:
+            counter = self._alerts.get(alert.severity)
+            if counter is None:
+                counter = self._alerts[alert.severity] = self.metrics.counter(
+                    "cluster_alerts_total", "Alerts received from partitions", severity=alert.severity.value
+                )
+            counter.inc()
+            logger.critical(f"==> ALERT! [{alert.severity}]: {alert.message}")
+            self.alert_bus.publish(alert)
+        if self.event_store:
+            self.event_store.append([], [(None, alert) for alert in alerts])
+
+    def list_sensors(self, status=None, habitat_id=None, after=None, limit=100) -> dict:
+        if habitat_id is not None:
+            owner = self.owners.get(habitat_id)
+            names = [owner] if owner else []
+        else:
+            names = list(self.partitions)
+        pages = [self._call(name, "sensors", (status, habitat_id, after, limit)) for name in names]
+        return merge_sensor_pages([page for page in pages if page is not None], limit)
+
+    def get_habitat_stats(self, habitat):
+        owner = self.owners.get(habitat.id)
+        stats = self._call(owner, "habitat_stats", habitat.id) if owner else None
+        return stats or {"habitat_id": str(habitat.id), "temperature": None, "dinosaurs": {}}
+
+    # == RULES ==
+
+    def _broadcast(self, command: str, payload):
+        for name in list(self.partitions):
+            self._call(name, command, payload)
+
+    def reload_rules(self):
+        self._broadcast("load_rules", self.rules.reload())
+
+    def replace_rules(self, definitions):
+        self.rules.replace(definitions)
+        self._broadcast("load_rules", definitions)
+
+    async def _watch_rules(self):
+        while True:
+            await asyncio.sleep(RULES_POLL_INTERVAL)
+            if not self.rules.changed_on_disk():
+                continue
+            try:
+                self.reload_rules()
+            except RuleLoadError as e:
+                logger.error(f"Rules reload failed, keeping v{self.rules.version}: {e}")
+
+    # == METRICS ==
+
+    def _gather(self, command: str) -> Dict[str, object]:
+        results = {}
+        for name in list(self.partitions):
+            result = self._call(name, command)
+            if result is not None:
+                results[name] = result
+        return results
+
+    # Partition totals are summed, so a partition leaving shows up as a dip
+    # to zero for one sample rather than a negative rate
+    async def _sample_history(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            samples = list((await loop.run_in_executor(None, self._gather, "history_sample")).values())
+            if samples:
+                self.history.sample(merge_metrics([c for c, _ in samples]), merge_metrics([g for _, g in samples]))
+            await asyncio.sleep(HISTORY_INTERVAL)
+
+    # Aggregates and alert state live in the partitions and are not
+    # checkpointed; the coordinator keeps its history across restarts
+    async def capture_state(self) -> dict:
+        return self.export_state()
+
+    def export_state(self) -> dict:
+        return {"history": self.history.export_state()}
+
+    def restore_state(self, state: dict):
+        if "history" in state:
+            self.history.restore_state(state["history"])
+
+    def render_prometheus(self) -> str:
+        return self.metrics.render_prometheus() + merge_prometheus(self._gather("prometheus"))
+
+    def describe(self) -> dict:
+        placed = Counter(self.owners.values())
+        return {
+            "vnodes": self.ring.vnodes,
+            "rebalances": self.stats["rebalances"],
+            "habitats_moved": self.stats["habitats_moved"],
+            "partitions": [
+                {
+                    "name": name,
+                    "pid": partition.process.pid,
+                    "alive": partition.process.is_alive(),
+                    "address": partition.address,
+                    "habitats": placed.get(name, 0),
+                    "credits": partition.credits,
+                }
+                for name, partition in list(self.partitions.items())
+            ],
+            "placement": {str(habitat_id): name for habitat_id, name in self.owners.items()},
+        }
+
+    def get_system_metrics(self):
+        results = self._gather("metrics")
+        for name, result in results.items():
+            partition = self.partitions.get(name)
+            if partition is not None:
+                partition.credits = result["queue_capacity"] - result["queue_depth"]
+
+        merged = merge_metrics(list(results.values()))
+        placed = Counter(self.owners.values())
+        return {
+            **merged,
+            "uptime_seconds": round((datetime.now() - self.stats["start_time"]).total_seconds(), 2),
+            "total_rejected": merged.get("total_rejected", 0) + self._rejected.total,
+            "events_unroutable": self._unroutable.total,
+            **self.alert_bus.get_metrics(),
+            **(self.event_store.get_metrics() if self.event_store else {}),
+            "cluster_partitions": len(self.partitions),
+            "cluster_rebalances": self.stats["rebalances"],
+            "cluster_habitats_moved": self.stats["habitats_moved"],
+            "partitions": {
+                name: {
+                    "habitats": placed.get(name, 0),
+                    "total_processed": result.get("total_processed"),
+                    "current_throughput_tps": result.get("current_throughput_tps"),
+                    "queue_depth": result.get("queue_depth"),
+                    "total_alerts": result.get("total_alerts"),
+                }
+                for name, result in results.items()
+            },
+        }
@@ -0,0 +1,234 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+
+from app.core.metrics import Counter
+from app.models.events import SensorType, to_epoch
+
+logger = logging.getLogger("JurassicReactor")
+
+# == EVENT & ALERT STORE ==
+# Append-only SQLite database in WAL mode. The stream manager hands every
+# processed batch to append(), which only enqueues it; a writer thread
+# inserts queued batches with executemany in one transaction per flush.
+# Readings and alerts are indexed by timestamp, habitat and sensor.
+# Batches dropped on a full queue and rows lost to failed writes are counted
+# and logged, at most once per WARN_INTERVAL so a stuck disk can't flood the log.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    ts REAL NOT NULL,
+    sensor_id TEXT NOT NULL,
+    sensor_type TEXT NOT NULL,
+    habitat_id BLOB,
+    dinosaur_id TEXT,
+    value REAL,
+    unit TEXT,
+    is_detected INTEGER,
+    coordinates TEXT,
+    stress_level TEXT,
+    battery_level REAL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_ts ON readings (ts);
+CREATE INDEX IF NOT EXISTS idx_readings_habitat ON readings (habitat_id, ts);
+CREATE INDEX IF NOT EXISTS idx_readings_sensor ON readings (sensor_id, ts);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    ts REAL NOT NULL,
+    alert_id TEXT NOT NULL,
+    sensor_id TEXT NOT NULL,
+    habitat_id BLOB,
+    severity TEXT NOT NULL,
+    message TEXT NOT NULL,
+    triggered_value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_habitat ON alerts (habitat_id, ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_sensor ON alerts (sensor_id, ts);
+"""
+
+MAX_QUERY_ROWS = 10_000
+WARN_INTERVAL = 10.0
+DROP_RATE_WINDOW = 60
+
+# get_metrics() keys that owners of a MetricsRegistry export as gauges
+STORE_GAUGES = (
+    ("store_pending_batches", "Batches waiting for the store writer"),
+    ("store_batches_dropped", "Batches discarded because the store queue was full"),
+    ("store_batches_dropped_rate", "Dropped batches per second over the last minute"),
+    ("store_rows_lost", "Readings and alerts lost to failed store writes"),
+)
+
+def _reading_row(r) -> tuple:
+    habitat = r.habitat_id.bytes if r.habitat_id else None
+    if r.sensor_type == SensorType.TEMPERATURE:
+        return (r.timestamp, r.id, "temperature", habitat, None, r.value, r.unit, None, None, None, r.battery_level)
+    if r.sensor_type == SensorType.MOTION:
+        return (r.timestamp, r.id, "motion", habitat, None, r.sensitivity, None, int(r.is_detected), r.coordinates, None, r.battery_level)
+    return (r.timestamp, r.id, "heart_rate", habitat, r.dinosaur_id, r.bpm, None, None, None, r.stress_level, r.battery_level)
+
+def _alert_row(alert) -> tuple:
+    return (
+        to_epoch(alert.timestamp), str(alert.id), alert.sensor_id, alert.habitat_id.bytes if alert.habitat_id else None,
+        alert.severity.value, alert.message, str(alert.triggered_value)
+    )
+
+class EventStore:
+    def __init__(self, path: str, max_pending_batches: int = 1000):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending_batches)
+        self.stats = {"readings_written": 0, "alerts_written": 0, "batches_dropped": 0,
+                      "write_failures": 0, "rows_lost": 0, "write_seconds": 0.0}
+        self._dropped = Counter()
+        self._warned_at = {}
+        self._thread = threading.Thread(target=self._run, name="jurassic-event-store", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # == WRITE PATH ==
+
+    def append(self, batch: list, alerts: list):
+        try:
+            self._queue.put_nowait((batch, alerts))
+        except queue.Full:
+            self._dropped.inc()
+            self.stats["batches_dropped"] += 1
+            self._warn("dropped", logging.WARNING,
+                       f"Event store queue full: {self.stats['batches_dropped']} batches dropped so far "
+                       f"({self._dropped.rate(DROP_RATE_WINDOW):.1f}/s)")
+
+    def _warn(self, key: str, level: int, message: str):
+        now = time.monotonic()
+        last = self._warned_at.get(key)
+        if last is None or now - last >= WARN_INTERVAL:
+            self._warned_at[key] = now
+            logger.log(level, message)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in items
+            self._write(conn, [item for item in items if item is not None])
+            if stop:
+                break
+        conn.close()
+
+    def _write(self, conn: sqlite3.Connection, items: list):
+        if not items:
+            return
+        start = time.perf_counter()
+        readings = [_reading_row(r) for batch, _ in items for r in batch]
+        alerts = [_alert_row(a) for _, batch_alerts in items for _, a in batch_alerts]
+        try:
+            with conn:
+                conn.executemany("INSERT INTO readings VALUES (?,?,?,?,?,?,?,?,?,?,?)", readings)
+                if alerts:
+                    conn.executemany("INSERT INTO alerts VALUES (?,?,?,?,?,?,?)", alerts)
+        except sqlite3.Error as e:
+            self.stats["write_failures"] += 1
+            self.stats["rows_lost"] += len(readings) + len(alerts)
+            self._warn("write", logging.ERROR,
+                       f"Event store write failed, {len(readings)} readings and {len(alerts)} alerts lost "
+                       f"({self.stats['rows_lost']} rows so far): {e}")
+            return
+        self.stats["readings_written"] += len(readings)
+        self.stats["alerts_written"] += len(alerts)
+        self.stats["write_seconds"] += time.perf_counter() - start
+
+    # == QUERIES ==
+
+    def query_readings(self, start: float, end: float, habitat_id: Optional[UUID] = None,
+                       sensor_id: Optional[str] = None, sensor_type: Optional[str] = None, limit: int = 1000) -> list:
+        sql = "SELECT ts, sensor_id, sensor_type, habitat_id, dinosaur_id, value, unit, is_detected, coordinates, stress_level, battery_level FROM readings WHERE ts >= ? AND ts < ?"
+        params = [start, end]
+        if habitat_id is not None:
+            sql += " AND habitat_id = ?"
+            params.append(habitat_id.bytes)
+        if sensor_id is not None:
+            sql += " AND sensor_id = ?"
+            params.append(sensor_id)
+        if sensor_type is not None:
+            sql += " AND sensor_type = ?"
+            params.append(sensor_type)
+        sql += " ORDER BY ts LIMIT ?"
+        params.append(max(1, min(limit, MAX_QUERY_ROWS)))
+
+        columns = ("timestamp", "sensor_id", "sensor_type", "habitat_id", "dinosaur_id", "value", "unit", "is_detected", "coordinates", "stress_level", "battery_level")
+        rows = self._query(sql, params)
+        return [self._to_dict(columns, row) for row in rows]
+
+    def query_alerts(self, start: float, end: float, habitat_id: Optional[UUID] = None,
+                     sensor_id: Optional[str] = None, severity: Optional[str] = None, limit: int = 1000) -> list:
+        sql = "SELECT ts, alert_id, sensor_id, habitat_id, severity, message, triggered_value FROM alerts WHERE ts >= ? AND ts < ?"
+        params = [start, end]
+        if habitat_id is not None:
+            sql += " AND habitat_id = ?"
+            params.append(habitat_id.bytes)
+        if sensor_id is not None:
+            sql += " AND sensor_id = ?"
+            params.append(sensor_id)
+        if severity is not None:
+            sql += " AND severity = ?"
+            params.append(severity)
+        sql += " ORDER BY ts LIMIT ?"
+        params.append(max(1, min(limit, MAX_QUERY_ROWS)))
+
+        columns = ("timestamp", "id", "sensor_id", "habitat_id", "severity", "message", "triggered_value")
+        rows = self._query(sql, params)
+        return [self._to_dict(columns, row) for row in rows]
+
+    def _query(self, sql: str, params: list) -> list:
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_dict(columns: tuple, row: tuple) -> dict:
+        record = dict(zip(columns, row))
+        if record.get("habitat_id") is not None:
+            record["habitat_id"] = str(UUID(bytes=record["habitat_id"]))
+        if record.get("is_detected") is not None:
+            record["is_detected"] = bool(record["is_detected"])
+        return {k: v for k, v in record.items() if v is not None}
+
+    def get_metrics(self) -> dict:
+        return {
+            "store_pending_batches": self._queue.qsize(),
+            "store_readings_written": self.stats["readings_written"],
+            "store_alerts_written": self.stats["alerts_written"],
+            "store_batches_dropped": self.stats["batches_dropped"],
+            "store_batches_dropped_rate": round(self._dropped.rate(DROP_RATE_WINDOW), 3),
+            "store_write_failures": self.stats["write_failures"],
+            "store_rows_lost": self.stats["rows_lost"],
+        }
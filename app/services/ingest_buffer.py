@@ -0,0 +1,281 @@
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Optional, Tuple
+from pydantic import BaseModel, Field
+
+from app.models.events import SensorReading, SensorType
+
+# == SETTINGS ==
+
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DROP_LOWEST_PRIORITY = "drop_lowest_priority"
+    BLOCK = "block"
+
+# Batch policy of one priority lane: a batch is cut when the lane holds
+# target_batch_size readings (its arrival rate x max_batch_latency, within
+# [min_batch_size, max_batch_size]) or its oldest reading has waited
+# max_batch_latency
+class LanePolicy(BaseModel):
+    min_batch_size: int = Field(1, gt=0)
+    max_batch_size: int = Field(5_000, gt=0)
+    max_batch_latency: float = Field(0.25, ge=0, description="Seconds a reading may wait for its batch")
+
+class IngestSettings(BaseModel):
+    capacity: int = Field(100_000, gt=0, description="Max readings waiting to be processed")
+    overflow_policy: OverflowPolicy = Field(OverflowPolicy.DROP_LOWEST_PRIORITY)
+    # Possible breaches and lost vital signs: taken as soon as they arrive
+    critical: LanePolicy = Field(default_factory=lambda: LanePolicy(max_batch_size=500, max_batch_latency=0.0))
+    # Routine motion and heart rate
+    normal: LanePolicy = Field(default_factory=LanePolicy)
+    # Temperature telemetry, batched for throughput
+    bulk: LanePolicy = Field(default_factory=lambda: LanePolicy(max_batch_size=10_000, max_batch_latency=1.0))
+    # Normal and bulk batches are cut so that one takes about this long to
+    # process, which bounds how long a critical reading waits for the loop
+    critical_latency_target: float = Field(0.05, gt=0, description="Seconds a critical reading may wait for the batch in progress")
+    block_timeout: float = Field(1.0, ge=0, description="Max seconds a producer waits under BLOCK")
+
+# == PRIORITY LANES ==
+# Lower index = lower priority (dropped first under DROP_LOWEST_PRIORITY)
+BULK, NORMAL, CRITICAL = 0, 1, 2
+LANES = ("bulk", "normal", "critical")
+
+# Readings that may carry a breach or lost vital signs skip the queue; the
+# rules still decide whether they alert. Temperature is telemetry.
+def classify(reading: SensorReading) -> int:
+    sensor_type = reading.sensor_type
+    if sensor_type == SensorType.TEMPERATURE:
+        return BULK
+    if sensor_type == SensorType.MOTION:
+        return CRITICAL if reading.is_detected else NORMAL
+    if sensor_type == SensorType.HEART_RATE and (reading.bpm == 0 or reading.stress_level == "High"):
+        return CRITICAL
+    return NORMAL
+
+RATE_SMOOTHING = 0.3
+RATE_WINDOW = 0.1
+COST_SMOOTHING = 0.2
+
+class _Lane:
+    __slots__ = ("name", "policy", "queue", "arrivals", "arrival_rate", "target_batch_size")
+
+    def __init__(self, name: str, policy: LanePolicy):
+        self.name = name
+        self.policy = policy
+        # Entries are (arrival_time, reading)
+        self.queue = deque()
+        self.arrivals = 0
+        self.arrival_rate = 0.0
+        self.target_batch_size = policy.min_batch_size
+
+# == BOUNDED BUFFER ==
+# Thread-safe: producers (rx timer threads, HTTP handlers) call put(), the
+# stream manager drains it from the event loop with take_batch(). Readings
+# wait in one lane per priority, each with its own batch policy, and every
+# batch comes from a single lane. The capacity is shared.
+#
+# The critical lane is served first whenever it holds readings, except
+# right after a critical batch when another lane is due, so that a steady
+# stream of critical readings cannot starve the others. Normal and bulk
+# batches are capped at critical_latency_target worth of processing
+# (per-reading cost measured by the stream manager).
+
+class IngestBuffer:
+    def __init__(self, settings: Optional[IngestSettings] = None, on_ready: Optional[Callable[[], None]] = None):
+        self.settings = settings or IngestSettings()
+        self.on_ready = on_ready
+
+        self._lanes = tuple(_Lane(name, getattr(self.settings, name)) for name in LANES)
+        self._depth = 0
+        self._cond = threading.Condition()
+        self._last_lane = None
+
+        self._last_rate_update = time.monotonic()
+        self.arrival_rate = 0.0
+        # Smoothed processing seconds per reading
+        self.cost_per_reading = 0.0
+
+        self.stats = {
+            "dropped_oldest": 0,
+            "dropped_low_priority": 0,
+            "dropped_blocked": 0,
+            "blocked_puts": 0,
+            "max_depth": 0,
+        }
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def target_batch_size(self) -> int:
+        return sum(lane.target_batch_size for lane in self._lanes)
+
+    def lane_depth(self, lane: int) -> int:
+        return len(self._lanes[lane].queue)
+
+    def free_slots(self) -> int:
+        return max(0, self.settings.capacity - self._depth)
+
+    def put(self, reading: SensorReading, lane: Optional[int] = None, can_block: bool = True) -> bool:
+        if lane is None:
+            lane = classify(reading)
+
+        with self._cond:
+            if self._depth >= self.settings.capacity and not self._make_room(lane, can_block):
+                return False
+
+            target = self._lanes[lane]
+            target.queue.append((time.monotonic(), reading))
+            target.arrivals += 1
+            self._depth += 1
+            if self._depth > self.stats["max_depth"]:
+                self.stats["max_depth"] = self._depth
+            queued = len(target.queue)
+            notify = queued == 1 or queued == target.target_batch_size
+
+        if notify and self.on_ready:
+            self.on_ready()
+        return True
+
+    # All or nothing, checked and enqueued under one lock: every reading goes
+    # in if the free slots (minus `reserved` ones promised elsewhere) cover
+    # the whole batch, none otherwise. Never evicts or blocks.
+    def put_batch(self, readings: list[SensorReading], reserved: int = 0) -> bool:
+        lanes = [classify(reading) for reading in readings]
+        notify = False
+        with self._cond:
+            if self._depth + len(readings) + reserved > self.settings.capacity:
+                return False
+            now = time.monotonic()
+            for reading, index in zip(readings, lanes):
+                target = self._lanes[index]
+                target.queue.append((now, reading))
+                target.arrivals += 1
+                queued = len(target.queue)
+                notify = notify or queued == 1 or queued == target.target_batch_size
+            self._depth += len(readings)
+            if self._depth > self.stats["max_depth"]:
+                self.stats["max_depth"] = self._depth
+
+        if notify and self.on_ready:
+            self.on_ready()
+        return True
+
+    def _make_room(self, lane: int, can_block: bool) -> bool:
+        policy = self.settings.overflow_policy
+
+        if policy == OverflowPolicy.BLOCK:
+            self.stats["blocked_puts"] += 1
+            if can_block and self._cond.wait_for(
+                lambda: self._depth < self.settings.capacity, timeout=self.settings.block_timeout
+            ):
+                return True
+            self.stats["dropped_blocked"] += 1
+            return False
+
+        if policy == OverflowPolicy.DROP_LOWEST_PRIORITY:
+            lowest = next(index for index, queued in enumerate(self._lanes) if queued.queue)
+            if lane < lowest:
+                self.stats["dropped_low_priority"] += 1
+                return False
+            # Nothing of lower priority left: the lane's own oldest reading goes
+            self.stats["dropped_low_priority" if lane > lowest else "dropped_oldest"] += 1
+            self._lanes[lowest].queue.popleft()
+            self._depth -= 1
+            return True
+
+        # DROP_OLDEST: evict whichever lane holds the oldest reading
+        oldest = min((queued for queued in self._lanes if queued.queue), key=lambda queued: queued.queue[0][0])
+        oldest.queue.popleft()
+        self._depth -= 1
+        self.stats["dropped_oldest"] += 1
+        return True
+
+    # Seconds until the lane must be flushed (0 = now), None when empty
+    @staticmethod
+    def _lane_wait(lane: _Lane, now: float) -> Optional[float]:
+        if not lane.queue:
+            return None
+        if len(lane.queue) >= lane.target_batch_size:
+            return 0.0
+        return max(0.0, lane.queue[0][0] + lane.policy.max_batch_latency - now)
+
+    def time_until_flush(self) -> Optional[float]:
+        now = time.monotonic()
+        with self._cond:
+            waits = [wait for wait in (self._lane_wait(lane, now) for lane in self._lanes) if wait is not None]
+        return min(waits) if waits else None
+
+    # Most urgent due lane (critical first, but not twice in a row while another is due)
+    def _next_lane(self, now: float) -> Optional[int]:
+        due = [index for index in (CRITICAL, NORMAL, BULK) if self._lane_wait(self._lanes[index], now) == 0.0]
+        if not due:
+            return None
+        if due[0] == CRITICAL and self._last_lane == CRITICAL and len(due) > 1:
+            return due[1]
+        return due[0]
+
+    # Returns (lane, readings) for the next due lane, (None, []) when none is.
+    # `arrivals`, if given, receives the monotonic arrival time of each reading
+    def take_batch(self, arrivals: Optional[list] = None) -> Tuple[Optional[int], list[SensorReading]]:
+        with self._cond:
+            self._update_rate()
+            index = self._next_lane(time.monotonic())
+            if index is None:
+                return None, []
+            lane = self._lanes[index]
+            limit = min(len(lane.queue), lane.policy.max_batch_size)
+            if index != CRITICAL and self.cost_per_reading > 0:
+                cap = int(self.settings.critical_latency_target / self.cost_per_reading)
+                limit = min(limit, max(lane.policy.min_batch_size, cap))
+            queue = lane.queue
+            batch = []
+            for _ in range(limit):
+                arrived, reading = queue.popleft()
+                batch.append(reading)
+                if arrivals is not None:
+                    arrivals.append(arrived)
+            self._depth -= len(batch)
+            self._last_lane = index
+            self._cond.notify_all()
+        return index, batch
+
+    # Fed by the stream manager after each batch
+    def record_processing(self, readings: int, seconds: float):
+        if readings:
+            cost = seconds / readings
+            self.cost_per_reading = cost if not self.cost_per_reading else \
+                COST_SMOOTHING * cost + (1 - COST_SMOOTHING) * self.cost_per_reading
+
+    def _update_rate(self):
+        now = time.monotonic()
+        elapsed = now - self._last_rate_update
+        if elapsed < RATE_WINDOW:
+            return
+        self._last_rate_update = now
+        total = 0.0
+        for lane in self._lanes:
+            instant = lane.arrivals / elapsed
+            lane.arrival_rate = RATE_SMOOTHING * instant + (1 - RATE_SMOOTHING) * lane.arrival_rate
+            lane.arrivals = 0
+            total += lane.arrival_rate
+            policy = lane.policy
+            target = int(lane.arrival_rate * policy.max_batch_latency)
+            lane.target_batch_size = max(policy.min_batch_size, min(policy.max_batch_size, target))
+        self.arrival_rate = total
+
+    def get_metrics(self) -> dict:
+        return {
+            "queue_depth": self._depth,
+            "queue_capacity": self.settings.capacity,
+            "overflow_policy": self.settings.overflow_policy.value,
+            "batch_target": self.target_batch_size,
+            "arrival_rate": round(self.arrival_rate, 2),
+            "dropped_events": self.stats["dropped_oldest"] + self.stats["dropped_low_priority"] + self.stats["dropped_blocked"],
+            **{f"queue_depth_{lane.name}": len(lane.queue) for lane in self._lanes},
+            **{f"arrival_rate_{lane.name}": round(lane.arrival_rate, 2) for lane in self._lanes},
+            **self.stats,
+        }
@@ -0,0 +1,92 @@
+from typing import Annotated, List
+from pydantic import Field, TypeAdapter, ValidationError
+
+from app.models.sensors import SensorEvent
+from app.models.events import SensorReading, to_reading
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# == BULK PAYLOAD DECODING ==
+# Field gateways push arrays of readings in the same shape as the pydantic
+# sensor models. Validation happens here, once per request, then everything
+# is converted to compact readings for the stream manager.
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+JSON_TYPES = ("application/json",)
+
+_events_adapter = TypeAdapter(List[Annotated[SensorEvent, Field(discriminator="sensor_type")]])
+
+class PayloadError(ValueError):
+    pass
+
+class UnsupportedPayloadError(PayloadError):
+    pass
+
+# Raised by try_ingest when readings could not be handed to any processing
+# stage (cluster: no live owning partition). `accepted` readings of the same
+# request may still have gone through.
+class IngestUnavailableError(RuntimeError):
+    def __init__(self, message: str, accepted: int = 0):
+        super().__init__(message)
+        self.accepted = accepted
+
+def supports_msgpack() -> bool:
+    return msgpack is not None
+
+def decode_ndjson(body: bytes) -> List[SensorReading]:
+    lines = [line for line in body.splitlines() if line.strip()]
+    return _validate_json(b"[" + b",".join(lines) + b"]")
+
+def decode_json(body: bytes) -> List[SensorReading]:
+    return _validate_json(body)
+
+def decode_msgpack(body: bytes) -> List[SensorReading]:
+    if msgpack is None:
+        raise UnsupportedPayloadError("msgpack payloads require the 'msgpack' package")
+    try:
+        items = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise PayloadError(f"Invalid msgpack body: {e}")
+    if not isinstance(items, list):
+        raise PayloadError("msgpack body must be an array of readings")
+    try:
+        events = _events_adapter.validate_python(items)
+    except ValidationError as e:
+        raise PayloadError(_summarize(e))
+    return [to_reading(event) for event in events]
+
+def encode_ndjson(readings: List[SensorReading]) -> bytes:
+    # Inverse of decode_ndjson, used to record event files for replay
+    return b"".join(reading.to_model().model_dump_json().encode("utf-8") + b"\n" for reading in readings)
+
+def decode_text(text: str) -> List[SensorReading]:
+    body = text.strip().encode("utf-8")
+    if body.startswith(b"["):
+        return decode_json(body)
+    return decode_ndjson(body)
+
+def decode_payload(body: bytes, content_type: str) -> List[SensorReading]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in MSGPACK_TYPES:
+        return decode_msgpack(body)
+    if media_type in JSON_TYPES:
+        return decode_json(body)
+    if media_type in NDJSON_TYPES or not media_type:
+        return decode_ndjson(body)
+    raise UnsupportedPayloadError(f"Unsupported content type: {media_type}")
+
+def _validate_json(body: bytes) -> List[SensorReading]:
+    try:
+        events = _events_adapter.validate_json(body)
+    except ValidationError as e:
+        raise PayloadError(_summarize(e))
+    return [to_reading(event) for event in events]
+
+def _summarize(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{error.error_count()} invalid field(s), first at {location}: {first['msg']}"
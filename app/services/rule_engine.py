@@ -0,0 +1,508 @@
+import json
+import logging
+import math
+import operator
+from operator import attrgetter
+import os
+from string import Formatter
+import time
+from typing import Any, Dict, List, Literal, Optional, Tuple, Union
+
+import numpy as np
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import SensorReading, SensorType
+from app.services.spatial_index import HabitatBoundsIndex, decode_positions
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+logger = logging.getLogger("JurassicReactor")
+
+DEFAULT_RULES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "rules", "default_rules.yaml")
+
+class RuleLoadError(ValueError):
+    pass
+
+# == RULE DEFINITIONS ==
+# A condition compares a reading field with a constant (`value`) or with a
+# context field scaled and shifted: ref * scale + offset. Fields are reading
+# attributes (bpm, sensitivity, stress_level...), derived columns (value_c,
+# x, y, z) or context attributes (habitat.size.z, dinosaur.heart_rate).
+
+Operator = Literal[">", ">=", "<", "<=", "==", "!="]
+
+OPERATORS = {
+    ">": operator.gt, ">=": operator.ge, "<": operator.lt,
+    "<=": operator.le, "==": operator.eq, "!=": operator.ne,
+}
+
+class RuleCondition(BaseModel):
+    field: str
+    op: Operator = "=="
+    value: Optional[Union[bool, float, str]] = None
+    ref: Optional[str] = None
+    scale: float = 1.0
+    offset: float = 0.0
+
+    @model_validator(mode="after")
+    def _check_operand(self):
+        if (self.value is None) == (self.ref is None):
+            raise ValueError("a condition needs exactly one of 'value' or 'ref'")
+        return self
+
+class RuleEscalation(BaseModel):
+    when: List[RuleCondition]
+    severity: AlertSeverity
+
+class RuleDefinition(BaseModel):
+    name: str
+    sensor_type: SensorType
+    when: List[RuleCondition] = Field(..., min_length=1)
+    severity: AlertSeverity
+    message: str
+    triggered: str = Field(..., description="Field reported as Alert.triggered_value")
+    escalate: List[RuleEscalation] = Field(default_factory=list)
+    # Scope: habitat names or ids / dinosaur species. None applies everywhere.
+    habitats: Optional[List[str]] = None
+    species: Optional[List[str]] = None
+    # Higher priority rules are checked first; the first rule that fires wins
+    priority: int = 0
+    enabled: bool = True
+
+    @model_validator(mode="after")
+    def _check_scope(self):
+        if self.species is not None and self.sensor_type != SensorType.HEART_RATE:
+            raise ValueError("'species' scope only applies to heart_rate rules")
+        return self
+
+class RuleFile(BaseModel):
+    rules: List[RuleDefinition]
+
+def parse_rules(data: Any) -> List[RuleDefinition]:
+    try:
+        return RuleFile.model_validate(data).rules
+    except ValidationError as e:
+        first = e.errors()[0]
+        location = ".".join(str(part) for part in first["loc"])
+        raise RuleLoadError(f"{e.error_count()} invalid field(s), first at {location}: {first['msg']}")
+
+def load_rules(path: str) -> List[RuleDefinition]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except OSError as e:
+        raise RuleLoadError(f"Cannot read rules file {path}: {e}")
+
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise RuleLoadError("YAML rule files require the 'PyYAML' package")
+        try:
+            data = yaml.safe_load(text)
+        except yaml.YAMLError as e:
+            raise RuleLoadError(f"Invalid YAML in {path}: {e}")
+    else:
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise RuleLoadError(f"Invalid JSON in {path}: {e}")
+    return parse_rules(data)
+
+# == COLUMNS ==
+# Per group of rows, each field is materialized at most once as a NumPy
+# array, and only when a rule that runs needs it.
+
+# Derived builders get the row indexes to compute; positions are only
+# decoded for rows that are still candidates for the rule asking for them.
+
+def _celsius(columns, indexes) -> np.ndarray:
+    rows, n = columns.rows, len(indexes)
+    values = np.fromiter((rows[k][1].value for k in indexes), dtype=np.float64, count=n)
+    fahrenheit = np.fromiter((rows[k][1].unit == "fahrenheit" for k in indexes), dtype=bool, count=n)
+    return np.where(fahrenheit, (values - 32) * 5/9, values)
+
+def _coordinate(axis: int):
+    def build(columns, indexes) -> np.ndarray:
+        return columns.positions(indexes)[:, axis]
+    return build
+
+def _out_of_bounds(columns, indexes) -> np.ndarray:
+    return columns.bounds.out_of_bounds(columns.habitat_ids(indexes), columns.positions(indexes))
+
+def _perimeter_zone(columns, indexes) -> np.ndarray:
+    labels, _ = columns.bounds.nearest_zones(columns.habitat_ids(indexes), columns.positions(indexes))
+    return np.array(labels, dtype=object)
+
+def _perimeter_distance(columns, indexes) -> np.ndarray:
+    _, distance = columns.bounds.nearest_zones(columns.habitat_ids(indexes), columns.positions(indexes))
+    return distance
+
+DERIVED_FIELDS = {
+    SensorType.TEMPERATURE: {"value_c": _celsius},
+    SensorType.MOTION: {
+        "x": _coordinate(0), "y": _coordinate(1), "z": _coordinate(2),
+        "out_of_bounds": _out_of_bounds, "perimeter_zone": _perimeter_zone, "perimeter_distance": _perimeter_distance,
+    },
+    SensorType.HEART_RATE: {},
+}
+
+def _resolve(obj, path: str):
+    try:
+        return attrgetter(path)(obj)
+    except AttributeError:
+        return None
+
+def _to_array(values: list) -> np.ndarray:
+    try:
+        return np.fromiter(values, dtype=np.float64, count=len(values))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return np.fromiter((math.nan if v is None else v for v in values), dtype=np.float64, count=len(values))
+    except (TypeError, ValueError):
+        return np.array(values, dtype=object)
+
+class _Columns:
+    def __init__(self, sensor_type: SensorType, rows: list, bounds: HabitatBoundsIndex):
+        self.rows = rows
+        self.bounds = bounds
+        self.derived = DERIVED_FIELDS[sensor_type]
+        self._cache: Dict[str, np.ndarray] = {}
+        # Derived field -> (values, computed mask)
+        self._partial: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # "habitat" / "dinosaur" -> rows that have one
+        self._present: Dict[str, np.ndarray] = {}
+
+    # `active` limits derived columns to the rows that still matter
+    def get(self, field: str, active: Optional[np.ndarray] = None) -> np.ndarray:
+        if field in self.derived:
+            return self._derived(field, active)
+        column = self._cache.get(field)
+        if column is None:
+            column = self._cache[field] = self._build(field)
+        return column
+
+    def _derived(self, field: str, active: Optional[np.ndarray]) -> np.ndarray:
+        entry = self._partial.get(field)
+        if entry is None:
+            entry = self._partial[field] = (np.full(len(self.rows), math.nan), np.zeros(len(self.rows), dtype=bool))
+        values, computed = entry
+        missing = ~computed if active is None else active & ~computed
+        indexes = np.flatnonzero(missing)
+        if indexes.size:
+            result = self.derived[field](self, indexes.tolist())
+            if result.dtype == object and values.dtype != object:
+                values = values.astype(object)
+                self._partial[field] = (values, computed)
+            values[indexes] = result
+            computed |= missing
+        return values
+
+    def positions(self, indexes: list) -> np.ndarray:
+        rows = self.rows
+        return decode_positions(rows[k][1].position for k in indexes)
+
+    def habitat_ids(self, indexes: list) -> list:
+        rows = self.rows
+        return [rows[k][1].habitat_id for k in indexes]
+
+    # Rows whose habitat / dinosaur exists, for context fields; None otherwise
+    def present(self, field: str) -> Optional[np.ndarray]:
+        scope = field.partition(".")[0]
+        if scope not in ("habitat", "dinosaur"):
+            return None
+        mask = self._present.get(scope)
+        if mask is None:
+            k = 2 if scope == "habitat" else 3
+            mask = self._present[scope] = np.fromiter((row[k] is not None for row in self.rows), dtype=bool,
+                                                      count=len(self.rows))
+        return mask
+
+    def _build(self, field: str) -> np.ndarray:
+        scope, _, path = field.partition(".")
+        if scope == "habitat":
+            get = attrgetter(path)
+            return _to_array([get(h) if h is not None else None for _, _, h, _ in self.rows])
+        if scope == "dinosaur":
+            get = attrgetter(path)
+            return _to_array([get(d) if d is not None else None for _, _, _, d in self.rows])
+        return _to_array([getattr(r, field, None) for _, r, _, _ in self.rows])
+
+    # Plain Python values of `field` for the given rows
+    def values_at(self, field: str, indexes: list) -> list:
+        if field in self.derived:
+            rows = np.zeros(len(self.rows), dtype=bool)
+            rows[indexes] = True
+            return self._derived(field, rows)[indexes].tolist()
+        scope, _, path = field.partition(".")
+        if scope == "habitat":
+            return [_resolve(self.rows[k][2], path) for k in indexes]
+        if scope == "dinosaur":
+            return [_resolve(self.rows[k][3], path) for k in indexes]
+        return [getattr(self.rows[k][1], field, None) for k in indexes]
+
+# == COMPILED RULES ==
+
+CONTEXT_NAMES = {"reading", "habitat", "dinosaur"}
+
+class _CompiledCondition:
+    __slots__ = ("field", "op", "value", "ref", "scale", "offset")
+
+    def __init__(self, condition: RuleCondition):
+        self.field = condition.field
+        self.op = OPERATORS[condition.op]
+        self.value = condition.value
+        self.ref = condition.ref
+        self.scale = condition.scale
+        self.offset = condition.offset
+
+    # Rows without the habitat or dinosaur a field refers to never match
+    def mask(self, columns: _Columns, active: np.ndarray) -> np.ndarray:
+        for field in (self.field, self.ref):
+            present = columns.present(field) if field else None
+            if present is not None:
+                active = active & present
+        left = columns.get(self.field, active)
+        if self.ref is None:
+            right = self.value
+        else:
+            right = columns.get(self.ref, active) * self.scale + self.offset
+        with np.errstate(invalid="ignore"):
+            return np.asarray(self.op(left, right), dtype=bool) & active
+
+def _all(conditions: List[_CompiledCondition], columns: _Columns, active: np.ndarray) -> np.ndarray:
+    mask = active.copy()
+    for condition in conditions:
+        if not mask.any():
+            break
+        mask &= condition.mask(columns, mask)
+    return mask
+
+class CompiledRule:
+    def __init__(self, definition: RuleDefinition, index: int):
+        self.definition = definition
+        self.name = definition.name
+        self.order = (-definition.priority, index)
+        self.conditions = [_CompiledCondition(c) for c in definition.when]
+        self.escalations = [([_CompiledCondition(c) for c in e.when], e.severity) for e in definition.escalate]
+        self.species = list(definition.species) if definition.species is not None else None
+        self.uses_habitat = _uses_habitat(definition)
+        # Top-level names used by the message template, gathered once per batch
+        self.message_fields = sorted({
+            name.split(".")[0].split("[")[0]
+            for _, name, _, _ in Formatter().parse(definition.message) if name
+        } - CONTEXT_NAMES)
+
+    def fire(self, columns: _Columns, active: np.ndarray) -> np.ndarray:
+        if self.species is not None:
+            active = active & np.isin(columns.get("dinosaur.species"), self.species)
+        return _all(self.conditions, columns, active)
+
+    def build_alerts(self, columns: _Columns, fired: np.ndarray) -> List[Tuple[int, Alert]]:
+        indexes = np.flatnonzero(fired)
+        # Per row index into `levels`; later escalations win
+        levels = [self.definition.severity] + [severity for _, severity in self.escalations]
+        codes = np.zeros(len(fired), dtype=np.int8)
+        for level, (conditions, _) in enumerate(self.escalations, start=1):
+            codes[_all(conditions, columns, fired)] = level
+
+        rows = columns.rows
+        message = self.definition.message
+        fields = {name: columns.values_at(name, indexes.tolist()) for name in self.message_fields}
+        triggered = columns.values_at(self.definition.triggered, indexes.tolist())
+
+        alerts = []
+        for j, k in enumerate(indexes.tolist()):
+            i, reading, habitat, dino = rows[k]
+            alerts.append((i, Alert(
+                sensor_id=reading.id,
+                habitat_id=reading.habitat_id,
+                severity=levels[codes[k]],
+                message=message.format(
+                    reading=reading, habitat=habitat, dinosaur=dino,
+                    **{name: values[j] for name, values in fields.items()}
+                ),
+                triggered_value=triggered[j],
+                rule=self.name
+            )))
+        return alerts
+
+def _uses_habitat(definition: RuleDefinition) -> bool:
+    conditions = list(definition.when) + [c for e in definition.escalate for c in e.when]
+    fields = [c.field for c in conditions] + [c.ref or "" for c in conditions] + [definition.triggered]
+    return "{habitat" in definition.message or any(f.startswith("habitat.") for f in fields)
+
+# Dispatch tables: sensor type -> habitat id -> ordered tuple of rules.
+# Habitats without scoped rules share the default tuple, so their rows are
+# evaluated together in one vectorized group. The rules themselves only
+# depend on their definitions; bind() reuses them for a new park and only
+# rebuilds the tables and the bounds index.
+
+class CompiledRules:
+    def __init__(self, definitions: List[RuleDefinition], park, version: int = 0,
+                 rules: Optional[List[CompiledRule]] = None):
+        self.definitions = definitions
+        self.version = version
+        if rules is None:
+            rules = [CompiledRule(definition, index) for index, definition in enumerate(definitions) if definition.enabled]
+        self.rules = rules
+
+        habitats_by_name = {h.name: h.id for h in park.habitats}
+        # Rebuilt on every bind, so habitat resizes are picked up
+        self.bounds = HabitatBoundsIndex(park.habitats)
+        defaults = {t: [] for t in SensorType}
+        scoped: Dict[Tuple[SensorType, Any], List[CompiledRule]] = {}
+
+        for rule in rules:
+            definition = rule.definition
+            if definition.habitats is None:
+                defaults[definition.sensor_type].append(rule)
+                continue
+            for ref in definition.habitats:
+                habitat = park.get_habitat(ref)
+                habitat_id = habitat.id if habitat else habitats_by_name.get(ref)
+                if habitat_id is None:
+                    logger.warning(f"Rule '{definition.name}' targets unknown habitat '{ref}'")
+                    continue
+                scoped.setdefault((definition.sensor_type, habitat_id), []).append(rule)
+
+        self.default = {t: tuple(sorted(rules, key=lambda r: r.order)) for t, rules in defaults.items()}
+        self.tables: Dict[SensorType, Dict[Any, tuple]] = {t: {} for t in SensorType}
+        for (sensor_type, habitat_id), rules in scoped.items():
+            # A scoped rule replaces the default rule with the same name
+            names = {r.name for r in rules}
+            merged = [r for r in self.default[sensor_type] if r.name not in names] + rules
+            self.tables[sensor_type][habitat_id] = tuple(sorted(merged, key=lambda r: r.order))
+
+        self._has_scoped_rules = any(self.tables.values())
+        # Heart-rate rows only resolve their habitat when some rule needs it
+        self._heart_rate_needs_habitat = bool(self.tables[SensorType.HEART_RATE]) or any(
+            r.uses_habitat for r in self.default[SensorType.HEART_RATE]
+        )
+
+    def bind(self, park) -> "CompiledRules":
+        return CompiledRules(self.definitions, park, self.version, self.rules)
+
+    def rules_for(self, sensor_type: SensorType, habitat_id) -> tuple:
+        return self.tables[sensor_type].get(habitat_id, self.default[sensor_type])
+
+    def _groups(self, batch: list[SensorReading], park, dinos_map: dict) -> list:
+        habitats = park.habitat_index
+        temperature, motion, heart_rate = SensorType.TEMPERATURE, SensorType.MOTION, SensorType.HEART_RATE
+        temp_rows, motion_rows, bpm_rows = [], [], []
+        scoped_rows: Dict[Tuple[SensorType, Any], list] = {}
+        tables = self.tables if self._has_scoped_rules else None
+        heart_rate_habitat = self._heart_rate_needs_habitat
+
+        for i, reading in enumerate(batch):
+            sensor_type = reading.sensor_type
+            if sensor_type is heart_rate:
+                dino = dinos_map.get(reading.dinosaur_id)
+                if dino is None:
+                    continue
+                habitat = habitats.get(reading.habitat_id) if heart_rate_habitat else None
+                rows = bpm_rows
+            else:
+                habitat = habitats.get(reading.habitat_id)
+                if habitat is None:
+                    continue
+                dino = None
+                rows = temp_rows if sensor_type is temperature else motion_rows
+
+            if tables is not None and habitat is not None and habitat.id in tables[sensor_type]:
+                rows = scoped_rows.setdefault((sensor_type, habitat.id), [])
+            rows.append((i, reading, habitat, dino))
+
+        groups = [
+            (t, self.default[t], rows)
+            for t, rows in ((temperature, temp_rows), (motion, motion_rows), (heart_rate, bpm_rows)) if rows
+        ]
+        groups += [(t, self.tables[t][habitat_id], rows) for (t, habitat_id), rows in scoped_rows.items()]
+        return [group for group in groups if group[1]]
+
+    def evaluate_batch(self, batch: list[SensorReading], park, dinos_map: dict,
+                       timings: Optional[dict] = None) -> List[Tuple[int, Alert]]:
+        started = time.perf_counter()
+        groups = self._groups(batch, park, dinos_map)
+
+        if timings is not None:
+            timings["dispatch"] = time.perf_counter() - started
+
+        alerts = []
+        for sensor_type, rules, rows in groups:
+            started = time.perf_counter()
+            columns = _Columns(sensor_type, rows, self.bounds)
+            remaining = np.ones(len(rows), dtype=bool)
+            for rule in rules:
+                fired = rule.fire(columns, remaining)
+                if fired.any():
+                    alerts.extend(rule.build_alerts(columns, fired))
+                    remaining &= ~fired
+                    if not remaining.any():
+                        break
+            if timings is not None:
+                key = sensor_type.value
+                timings[key] = timings.get(key, 0.0) + time.perf_counter() - started
+
+        alerts.sort(key=lambda pair: pair[0])
+        return alerts
+
+# == ENGINE ==
+# Holds the active CompiledRules. Reloads build a new object off to the side
+# and swap the reference, so a batch always runs against one consistent
+# rule set and the stream never pauses.
+
+class RuleEngine:
+    def __init__(self, park, path: Optional[str] = None, definitions: Optional[List[RuleDefinition]] = None):
+        self.park = park
+        self.path = path
+        self._mtime = None
+        if definitions is None:
+            definitions = self._read_file()
+        self.compiled = CompiledRules(definitions, park)
+
+    @classmethod
+    def from_file(cls, park, path: str = DEFAULT_RULES_FILE) -> "RuleEngine":
+        return cls(park, path=path)
+
+    @property
+    def definitions(self) -> List[RuleDefinition]:
+        return self.compiled.definitions
+
+    @property
+    def version(self) -> int:
+        return self.compiled.version
+
+    def _read_file(self) -> List[RuleDefinition]:
+        # Remember the mtime even if parsing fails, so a broken file is reported once
+        self._mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        return load_rules(self.path)
+
+    def changed_on_disk(self) -> bool:
+        if not self.path or not os.path.exists(self.path):
+            return False
+        return os.path.getmtime(self.path) != self._mtime
+
+    # Raises RuleLoadError and keeps the current rules if the file is invalid
+    def reload(self) -> List[RuleDefinition]:
+        definitions = self._read_file()
+        self.replace(definitions)
+        return definitions
+
+    def replace(self, definitions: List[RuleDefinition]):
+        self.compiled = CompiledRules(definitions, self.park, self.compiled.version + 1)
+        logger.info(f"Rules v{self.compiled.version} active ({len(definitions)} rules).")
+
+    # Habitat scopes are resolved against the park, so CRUD changes re-resolve
+    # them (the compiled rules are kept)
+    def rebind(self, park=None):
+        if park is not None:
+            self.park = park
+        self.compiled = self.compiled.bind(self.park)
+
+    def evaluate_batch(self, batch: list[SensorReading], park, dinos_map: dict,
+                       timings: Optional[dict] = None) -> List[Tuple[int, Alert]]:
+        return self.compiled.evaluate_batch(batch, park, dinos_map, timings)
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import multiprocessing as mp
+import threading
+from typing import List, Optional, Tuple
+
+from app.models.alert import Alert
+from app.models.events import SensorReading, SensorType
+from app.models.infrastructure import Park
+from app.services.rule_engine import RuleEngine
+
+logger = logging.getLogger("JurassicReactor")
+
+# == WORKER PROCESS ==
+# Each worker owns a replica of the park and dinosaur registry and applies
+# control messages in the same order as the batches it receives.
+
+def _shard_worker(conn, park_name: str, habitats: list, dinosaurs: list, rules: Optional[list]):
+    park = Park(name=park_name)
+    for habitat in habitats:
+        park.add_habitat(habitat)
+    dinos_map = {str(d.id): d for d in dinosaurs}
+    engine = RuleEngine(park, definitions=rules) if rules is not None else RuleEngine.from_file(park)
+
+    while True:
+        try:
+            command, payload = conn.recv()
+        except EOFError:
+            break
+
+        if command == "evaluate":
+            conn.send(engine.evaluate_batch(payload, park, dinos_map))
+        elif command == "upsert_habitat":
+            park.remove_habitat(payload.id)
+            park.add_habitat(payload)
+            engine.rebind()
+        elif command == "remove_habitat":
+            park.remove_habitat(payload)
+            engine.rebind()
+        elif command == "load_rules":
+            engine.replace(payload)
+        elif command == "register_dinosaur":
+            dinos_map[str(payload.id)] = payload
+        elif command == "unregister_dinosaur":
+            dinos_map.pop(str(payload), None)
+        elif command == "stop":
+            break
+
+    conn.close()
+
+class _Shard:
+    def __init__(self, index: int, ctx, park: Park, dinosaurs: list, rules: Optional[list]):
+        self.index = index
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_shard_worker,
+            args=(child_conn, park.name, list(park.habitats), dinosaurs, rules),
+            name=f"jurassic-shard-{index}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        # Serializes request/reply pairs and keeps control messages in order
+        self.lock = threading.Lock()
+
+    def send(self, command: str, payload):
+        with self.lock:
+            self.conn.send((command, payload))
+
+    def evaluate(self, batch: list) -> list:
+        with self.lock:
+            self.conn.send(("evaluate", batch))
+            return self.conn.recv()
+
+    def stop(self):
+        try:
+            self.send("stop", None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.terminate()
+
+# == SHARDED EVALUATOR ==
+# Events are routed by habitat (temperature, motion) or dinosaur (heart rate)
+# so that every reading of one entity is evaluated by the same worker, in
+# arrival order.
+
+class ShardedEvaluator:
+    def __init__(self, park: Park, dinosaurs: list, workers: int, rules: Optional[list] = None):
+        ctx = mp.get_context("spawn")
+        self.shards = [_Shard(i, ctx, park, list(dinosaurs), rules) for i in range(workers)]
+        logger.info(f"Sharded evaluation enabled with {workers} worker processes.")
+
+    def _shard_of(self, reading: SensorReading) -> int:
+        if reading.sensor_type == SensorType.HEART_RATE:
+            key = reading.dinosaur_id
+        else:
+            key = reading.habitat_id
+        return hash(key) % len(self.shards)
+
+    def _split(self, batch: list) -> Tuple[list, list]:
+        parts = [[] for _ in self.shards]
+        positions = [[] for _ in self.shards]
+        for i, reading in enumerate(batch):
+            shard = self._shard_of(reading)
+            parts[shard].append(reading)
+            positions[shard].append(i)
+        return parts, positions
+
+    @staticmethod
+    def _merge(results: list, positions: list) -> List[Tuple[int, Alert]]:
+        alerts = []
+        for shard_alerts, shard_positions in zip(results, positions):
+            alerts.extend((shard_positions[k], alert) for k, alert in shard_alerts)
+        alerts.sort(key=lambda pair: pair[0])
+        return alerts
+
+    async def evaluate(self, batch: list) -> List[Tuple[int, Alert]]:
+        loop = asyncio.get_running_loop()
+        parts, positions = self._split(batch)
+        results = await asyncio.gather(*(
+            loop.run_in_executor(None, shard.evaluate, part) if part else asyncio.sleep(0, result=[])
+            for shard, part in zip(self.shards, parts)
+        ))
+        return self._merge(results, positions)
+
+    def evaluate_sync(self, batch: list) -> List[Tuple[int, Alert]]:
+        parts, positions = self._split(batch)
+        for shard in self.shards:
+            shard.lock.acquire()
+        try:
+            # Send everything first so all workers run in parallel
+            for shard, part in zip(self.shards, parts):
+                if part:
+                    shard.conn.send(("evaluate", part))
+            results = [shard.conn.recv() if part else [] for shard, part in zip(self.shards, parts)]
+        finally:
+            for shard in self.shards:
+                shard.lock.release()
+        return self._merge(results, positions)
+
+    # == REPLICA UPDATES ==
+
+    def _broadcast(self, command: str, payload):
+        for shard in self.shards:
+            shard.send(command, payload)
+
+    def upsert_habitat(self, habitat):
+        self._broadcast("upsert_habitat", habitat)
+
+    def remove_habitat(self, habitat_id):
+        self._broadcast("remove_habitat", habitat_id)
+
+    def register_dinosaur(self, dino):
+        self._broadcast("register_dinosaur", dino)
+
+    def unregister_dinosaur(self, dino_id):
+        self._broadcast("unregister_dinosaur", dino_id)
+
+    def load_rules(self, definitions: list):
+        self._broadcast("load_rules", definitions)
+
+    def shutdown(self):
+        for shard in self.shards:
+            shard.stop()
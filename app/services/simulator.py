@@ -1,15 +1,33 @@
 import random
-from uuid import uuid4
+import threading
+import time
+from typing import Optional
+from uuid import UUID
+import numpy as np
 import reactivex as rx
 from reactivex import operators as ops
+from reactivex.disposable import Disposable
 
-from app.models.infrastructure import Park
-from app.models.sensors import MotionSensor, TemperatureSensor, HeartRateSensor
+from app.models.infrastructure import Park, Habitat, HabitatDimensions
+from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.events import MotionReading, TemperatureReading, HeartRateReading, SensorReading, pack_position
+from app.services.ingestion import decode_ndjson
+
+# Share of temperature / motion / heart-rate readings in load mode
+LOAD_SENSOR_MIX = (0.4, 0.3, 0.3)
+REPLAY_TICK = 0.01
+REPLAY_CHUNK_LINES = 1000
+# Matches the ingest buffer's default max_batch_size
+REPLAY_MAX_BATCH = 5_000
 
 class SensorSimulator:
-    def __init__(self, park: Park, dinosaurs: list):
+    def __init__(self, park: Park, dinosaurs: list, seed: Optional[int] = None, sensors_per_habitat: int = 1):
         self.park = park
         self.dinosaurs = dinosaurs
+        # Seeded generators make every run (and every incident) reproducible
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
+        self.sensors_per_habitat = sensors_per_habitat
 
     def create_temperature_stream(self, interval_sec: float = 2.0):
         return rx.interval(interval_sec).pipe(
@@ -27,58 +45,220 @@ class SensorSimulator:
         )
 
 
-    def _generate_random_temp(self) -> TemperatureSensor:
-        habitat = random.choice(self.park.habitats)
+    def _generate_random_temp(self) -> TemperatureReading:
+        habitat = self.rng.choice(self.park.habitats)
         
-        variation = random.uniform(-2, 2)
-        if random.random() < 0.05: 
+        variation = self.rng.uniform(-2, 2)
+        if self.rng.random() < 0.05: 
             variation = 15.0
             
-        return TemperatureSensor(
+        return TemperatureReading(
             id=f"temp-{habitat.name[:3].replace(' ', '')}",
             habitat_id=habitat.id,
-            sensor_type="temperature",
             value=round(habitat.mean_temperature + variation, 2),
             unit="celsius"
         )
 
-    def _generate_random_motion(self) -> MotionSensor:
-        habitat = random.choice(self.park.habitats)
-        is_detected = random.choice([True, False])
+    def _generate_random_motion(self) -> MotionReading:
+        habitat = self.rng.choice(self.park.habitats)
+        is_detected = self.rng.choice([True, False])
         
-        z = random.uniform(0, habitat.size.z + 5) 
-        coords = f"{random.randint(0, 100)},{random.randint(0, 100)},{int(z)}"
+        # Inside the footprint; z may exceed the height to simulate breaches
+        x = int(self.rng.uniform(0, habitat.size.x))
+        y = int(self.rng.uniform(0, habitat.size.y))
+        z = self.rng.uniform(0, habitat.size.z + 5)
         
-        return MotionSensor(
+        return MotionReading(
             id=f"motion-{habitat.name[:3].replace(' ', '')}",
             habitat_id=habitat.id,
-            sensor_type="motion",
             is_detected=is_detected,
-            sensitivity=random.randint(1, 10),
-            coordinates=coords if is_detected else None
+            sensitivity=self.rng.randint(1, 10),
+            position=pack_position(x, y, int(z)) if is_detected else None
         )
 
-    def _generate_random_bpm(self) -> HeartRateSensor:
-        dino = random.choice(self.dinosaurs)
+    def _generate_random_bpm(self) -> HeartRateReading:
+        dino = self.rng.choice(self.dinosaurs)
+        habitat = self.park.get_dinosaur_habitat(dino.id)
         
-        bpm = int(random.normalvariate(dino.heart_rate, 5))
+        bpm = int(self.rng.normalvariate(dino.heart_rate, 5))
         stress = "Low"
         
-        if random.random() < 0.02:
+        if self.rng.random() < 0.02:
             bpm = int(dino.heart_rate * 1.8)
             stress = "High"
 
-        return HeartRateSensor(
+        return HeartRateReading(
             id=f"bio-{dino.name.replace(' ', '')}",
-            habitat_id=uuid4(), 
-            sensor_type="heart_rate",
+            habitat_id=habitat.id if habitat else None,
             dinosaur_id=str(dino.id),
             bpm=bpm,
             stress_level=stress
         )
+
+    # == LOAD GENERATION ==
+    # Emits lists of readings: `events_per_sec * tick_sec` per tick, drawn in
+    # bulk from the seeded NumPy generator.
+
+    def create_load_stream(self, events_per_sec: float, tick_sec: float = 0.1):
+        carry = [0.0]
+
+        def next_batch(_):
+            carry[0] += events_per_sec * tick_sec
+            size = int(carry[0])
+            carry[0] -= size
+            return self.generate_batch(size)
+
+        return rx.interval(tick_sec).pipe(
+            ops.map(next_batch),
+            ops.filter(lambda batch: len(batch) > 0)
+        )
+
+    def generate_batch(self, size: int, now: Optional[float] = None) -> list[SensorReading]:
+        park = self.park
+        if size <= 0 or not park.habitats:
+            return []
+        now = time.time() if now is None else now
+        rng = self.np_rng
+        habitats = park.habitats
+        dinosaurs = self.dinosaurs or [None]
+
+        kinds = rng.choice(3, size=size, p=LOAD_SENSOR_MIX).tolist()
+        h_idx = rng.integers(0, len(habitats), size).tolist()
+        d_idx = rng.integers(0, len(dinosaurs), size).tolist()
+        sensor_idx = rng.integers(0, self.sensors_per_habitat, size).tolist()
+
+        variation = rng.uniform(-2, 2, size)
+        variation[rng.random(size) < 0.05] = 15.0
+        variation = variation.tolist()
+        detected = (rng.random(size) < 0.5).tolist()
+        sensitivity = rng.integers(1, 11, size).tolist()
+        xy_frac = rng.random((size, 2)).tolist()
+        z_frac = rng.random(size).tolist()
+        bpm_noise = rng.normal(0, 5, size).tolist()
+        stressed = (rng.random(size) < 0.02).tolist()
+
+        batch = []
+        for i in range(size):
+            kind = kinds[i]
+            if kind == 2 and dinosaurs[0] is not None:
+                dino = dinosaurs[d_idx[i]]
+                habitat = park.get_dinosaur_habitat(dino.id)
+                if stressed[i]:
+                    bpm, stress = int(dino.heart_rate * 1.8), "High"
+                else:
+                    bpm, stress = int(dino.heart_rate + bpm_noise[i]), "Low"
+                batch.append(HeartRateReading(
+                    f"bio-{dino.name.replace(' ', '')}", habitat.id if habitat else None,
+                    str(dino.id), bpm, stress, now
+                ))
+                continue
+
+            habitat = habitats[h_idx[i]]
+            tag = f"{habitat.name[:3].replace(' ', '')}-{sensor_idx[i]}"
+            if kind == 0:
+                batch.append(TemperatureReading(
+                    f"temp-{tag}", habitat.id, round(habitat.mean_temperature + variation[i], 2), "celsius", None, now
+                ))
+            else:
+                z = int(z_frac[i] * (habitat.size.z + 5))
+                position = None
+                if detected[i]:
+                    x, y = int(xy_frac[i][0] * habitat.size.x), int(xy_frac[i][1] * habitat.size.y)
+                    position = pack_position(x, y, z)
+                batch.append(MotionReading(
+                    f"motion-{tag}", habitat.id, detected[i], sensitivity[i], None, now, position=position
+                ))
+        return batch
+
+    # == REPLAY ==
+    # Re-emits a recorded NDJSON file (sorted by timestamp) at `speed` times
+    # the original pace; speed <= 0 replays as fast as possible. Readings are
+    # grouped into lists of everything due in the same REPLAY_TICK. A list is
+    # emitted once the next reading falls in a later tick, at the end of each
+    # file chunk and at REPLAY_MAX_BATCH readings, so a replay running behind
+    # real time still streams.
+
+    def create_replay_stream(self, path: str, speed: float = 1.0, rebase_timestamps: bool = True):
+        def subscribe(observer, scheduler=None):
+            stop = threading.Event()
+
+            def run():
+                try:
+                    start_wall = time.time()
+                    first_ts = None
+                    pending = []
+                    pending_due = 0.0
+                    for readings in _read_ndjson_chunks(path):
+                        for reading in readings:
+                            if first_ts is None:
+                                first_ts = reading.timestamp
+                            due = start_wall + (reading.timestamp - first_ts) / speed if speed > 0 else time.time()
+                            if pending and due - pending_due > REPLAY_TICK:
+                                observer.on_next(pending)
+                                pending = []
+                            delay = due - time.time()
+                            if delay > REPLAY_TICK and stop.wait(delay):
+                                return
+                            if rebase_timestamps:
+                                reading.timestamp = due
+                            if not pending:
+                                pending_due = due
+                            pending.append(reading)
+                            if len(pending) >= REPLAY_MAX_BATCH:
+                                observer.on_next(pending)
+                                pending = []
+                        if pending:
+                            observer.on_next(pending)
+                            pending = []
+                        if stop.is_set():
+                            return
+                    observer.on_completed()
+                except Exception as e:
+                    observer.on_error(e)
+
+            threading.Thread(target=run, name="jurassic-replay", daemon=True).start()
+            return Disposable(stop.set)
+
+        return rx.create(subscribe)
     
-    def add_dinosaur(self, dino):
-        self.dinosaurs.append(dino)
+    # Subscribed to the StateStore: picks up the new park and dinosaur set
+    def on_state_change(self, snapshot, change):
+        self.park = snapshot.park
+        self.dinosaurs = list(snapshot.dinosaurs.values())
+
+def _read_ndjson_chunks(path: str):
+    with open(path, "rb") as f:
+        lines = []
+        for line in f:
+            lines.append(line)
+            if len(lines) >= REPLAY_CHUNK_LINES:
+                yield decode_ndjson(b"".join(lines))
+                lines = []
+        if lines:
+            yield decode_ndjson(b"".join(lines))
+
+# == SYNTHETIC PARKS ==
+
+def build_synthetic_park(habitats: int, dinosaurs_per_habitat: int = 1, seed: Optional[int] = None):
+    rng = random.Random(seed)
+    new_id = lambda: UUID(int=rng.getrandbits(128), version=4)
 
-    def remove_dinosaur(self, dino_id):
-        self.dinosaurs = [d for d in self.dinosaurs if str(d.id) != str(dino_id)]
\ No newline at end of file
+    park = Park(name=f"Synthetic Park ({habitats} habitats)")
+    dinos = []
+    for h in range(habitats):
+        residents = [
+            Dinosaur(
+                id=new_id(), name=f"Dino-{h}-{d}", species="Synthetic", category=DinoCategory.TERRESTRIAL,
+                health_points=100, heart_rate=rng.randint(30, 120)
+            )
+            for d in range(dinosaurs_per_habitat)
+        ]
+        park.add_habitat(Habitat(
+            id=new_id(),
+            name=f"Habitat {h}",
+            size=HabitatDimensions(x=rng.randint(50, 1500), y=rng.randint(50, 1500), z=rng.randint(10, 80)),
+            mean_temperature=round(rng.uniform(15, 32), 1),
+            dinosaur_ids=[d.id for d in residents]
+        ))
+        dinos.extend(residents)
+    return park, dinos
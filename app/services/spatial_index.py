@@ -0,0 +1,80 @@
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.models.events import NO_POSITION
+
+# == HABITAT BOUNDS INDEX ==
+# Habitat coordinates are local: a habitat is the axis-aligned box
+# [0, size.x] x [0, size.y] x [0, size.z]. The index keeps every box in one
+# (habitats + 1, 3) extents array, with a trailing NaN row for unknown
+# habitats, so bounds checks for a whole batch are a gather plus a few array
+# comparisons. The fence of each habitat is split into a grid of zones of
+# PERIMETER_ZONE_LENGTH meters per wall ("North-1", "East-3", ...).
+
+PERIMETER_ZONE_LENGTH = 100.0
+WALLS = ("West", "East", "South", "North")
+
+def decode_positions(positions: Iterable[Optional[bytes]]) -> np.ndarray:
+    packed = b"".join(p if p is not None else NO_POSITION for p in positions)
+    return np.frombuffer(packed, dtype="<f8").reshape(-1, 3)
+
+# Rows with any coordinate outside their box; NaN positions are never out
+def out_of_bounds(xyz: np.ndarray, extents: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore"):
+        return ((xyz < 0) | (xyz > extents)).any(axis=1)
+
+# Nearest fence wall, zone number along it (1-based) and distance in meters,
+# measured in the horizontal plane to each wall segment (not its infinite
+# line), so points beyond a corner are measured to the corner post
+def nearest_perimeter(xyz: np.ndarray, extents: np.ndarray,
+                      zone_length: float = PERIMETER_ZONE_LENGTH) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    x, y = xyz[:, 0], xyz[:, 1]
+    width, length = extents[:, 0], extents[:, 1]
+    # Overshoot past the ends of the South/North (along x) and West/East (along y) walls
+    with np.errstate(invalid="ignore"):
+        off_x = x - np.clip(x, 0, width)
+        off_y = y - np.clip(y, 0, length)
+    distances = np.stack([
+        np.hypot(x, off_y), np.hypot(x - width, off_y),
+        np.hypot(off_x, y), np.hypot(off_x, y - length),
+    ], axis=1)
+    valid = ~np.isnan(distances).any(axis=1)
+    walls = np.where(valid, np.argmin(np.where(np.isnan(distances), np.inf, distances), axis=1), -1)
+    distance = np.where(valid, distances.min(axis=1, initial=np.inf, where=~np.isnan(distances)), np.nan)
+
+    # West/East walls run along y, South/North along x
+    along = np.where(walls < 2, y, x)
+    wall_length = np.where(walls < 2, length, width)
+    with np.errstate(invalid="ignore"):
+        zones = np.clip(along, 0, wall_length) // zone_length
+        last = np.maximum(np.ceil(wall_length / zone_length) - 1, 0)
+    zones = np.where(valid, np.minimum(zones, last) + 1, 0).astype(np.int64)
+    return walls, zones, distance
+
+def zone_labels(walls: np.ndarray, zones: np.ndarray) -> List[Optional[str]]:
+    return [f"{WALLS[w]}-{z}" if w >= 0 else None for w, z in zip(walls.tolist(), zones.tolist())]
+
+class HabitatBoundsIndex:
+    def __init__(self, habitats: Iterable, zone_length: float = PERIMETER_ZONE_LENGTH):
+        habitats = list(habitats)
+        self.zone_length = zone_length
+        self._rows = {h.id: k for k, h in enumerate(habitats)}
+        self.extents = np.array(
+            [[h.size.x, h.size.y, h.size.z] for h in habitats] + [[np.nan] * 3], dtype=np.float64
+        )
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rows_for(self, habitat_ids: Iterable) -> np.ndarray:
+        missing = len(self._rows)
+        rows = self._rows
+        return np.fromiter((rows.get(h, missing) for h in habitat_ids), dtype=np.int64)
+
+    def out_of_bounds(self, habitat_ids: Iterable, xyz: np.ndarray) -> np.ndarray:
+        return out_of_bounds(xyz, self.extents[self.rows_for(habitat_ids)])
+
+    def nearest_zones(self, habitat_ids: Iterable, xyz: np.ndarray) -> Tuple[List[Optional[str]], np.ndarray]:
+        walls, zones, distance = nearest_perimeter(xyz, self.extents[self.rows_for(habitat_ids)], self.zone_length)
+        return zone_labels(walls, zones), distance
@@ -1,109 +1,539 @@
 import asyncio
 import logging
+import threading
+import time
 from datetime import datetime
-import reactivex as rx
-from reactivex import operators as ops
-from reactivex.subject import Subject
-from reactivex.scheduler.eventloop import AsyncIOScheduler
+from typing import Optional
+import numpy as np
 
-from app.services.evaluator import RuleEvaluator
-from app.models.sensors import SensorEvent
+from app.core.metrics import MetricsRegistry, RATE_WINDOWS
+from app.core.metrics_history import MetricsHistory, HISTORY_INTERVAL
+from app.core.state import HABITAT_ADDED, HABITAT_REMOVED, DINOSAUR_REMOVED, RESET
+from app.services.rule_engine import RuleEngine, RuleLoadError
+from app.services.ingest_buffer import IngestBuffer, IngestSettings, LANES, classify
+from app.services.sharded_evaluator import ShardedEvaluator
+from app.services.alert_bus import AlertBus
+from app.services.alert_processor import AlertProcessor, AlertProcessingSettings
+from app.services.aggregates import WindowedAggregator
+from app.services.anomaly import AnomalyDetector, AnomalySettings
+from app.services.watchdog import SensorWatchdog, WatchdogSettings
+from app.services.event_store import STORE_GAUGES
+from app.models.alert import AlertSeverity
+from app.models.events import SensorReading
 
 logger = logging.getLogger("JurassicReactor")
 
+# Seconds between checks of the rules file for changes
+RULES_POLL_INTERVAL = 2.0
+
 class JurassicStreamManager:
-    def __init__(self, park_context, dinos_context):
-        self.park = park_context
-        self.dinos_map = {str(d.id): d for d in dinos_context}
+    def __init__(self, park_context, dinos_context, ingest_settings: Optional[IngestSettings] = None, workers: int = 0,
+                 event_store=None, rules: Optional[RuleEngine] = None,
+                 alert_settings: Optional[AlertProcessingSettings] = None,
+                 anomaly_settings: Optional[AnomalySettings] = None,
+                 watchdog_settings: Optional[WatchdogSettings] = None):
+        # (park, dinos_map) pair, replaced as a whole on every state change
+        self._context = (park_context, {str(d.id): d for d in dinos_context})
+
+        # Compiled alert rules; hot-reloaded when their file changes
+        self.rules = rules or RuleEngine.from_file(park_context)
+        self._rules_task = None
+
+        # Optional persistence stage (EventStore), fed after every batch
+        self.event_store = event_store
+
+        # workers > 0 moves rule evaluation to a pool of shard processes
+        self.workers = workers
+        self.sharded = None
         
-        self.incoming_stream = Subject()
-        self.scheduler = None
+        self.alert_bus = AlertBus()
+        # Optional callable receiving the published alerts of every batch
+        # (cluster partitions forward them to the coordinator)
+        self.alert_sink = None
+
+        # Dedup / hysteresis / rate limits / correlation between rules and the bus
+        self.alert_processor = AlertProcessor(park_context, alert_settings)
+
+        # Rolling 1m/5m/1h statistics, updated once per batch
+        self.habitat_temperature = WindowedAggregator(value_range=(-30.0, 70.0))
+        self.dinosaur_bpm = WindowedAggregator(value_range=(0.0, 400.0))
+        # Learned per-habitat / per-dinosaur baselines, alerting next to the rules
+        self.anomalies = AnomalyDetector(anomaly_settings)
+        # Last-seen, battery and clock health of every sensor_id
+        self.watchdog = SensorWatchdog(watchdog_settings)
+        self._watchdog_task = None
+
+        # Bounded ingest stage, drained in adaptive batches on the event loop
+        self.buffer = IngestBuffer(ingest_settings, on_ready=self._signal_ready)
+        self.loop = None
+        self._loop_thread = None
+        self._ready = None
+        self._drain_task = None
 
         self.stats = {
-            "total_events_processed": 0,
-            "total_alerts_triggered": 0,
             "start_time": datetime.now(),
             "last_batch_size": 0,
-            "current_avg_bpm": 0
+            # Mean bpm of the last batch with heart rates; None until the first
+            "current_avg_bpm": None
         }
 
+        # Single source for /api/metrics and the Prometheus /metrics endpoint
+        self.metrics = MetricsRegistry()
+        self._processed = self.metrics.counter("events_processed_total", "Readings evaluated")
+        self._rejected = self.metrics.counter("events_rejected_total", "Readings refused at ingest (no credits)")
+        self._alerts = {}
+        # Per priority lane, indexed like LANES
+        self._queue_wait = [self._stage_histogram("queue_wait", lane=lane) for lane in LANES]
+        self._batch_formation = [self._stage_histogram("batch_formation", lane=lane) for lane in LANES]
+        self._lane_latency = [
+            self.metrics.histogram("lane_latency_seconds", "Reading arrival to its batch processed", lane=lane)
+            for lane in LANES
+        ]
+        self._alert_emission = self._stage_histogram("alert_emission")
+        self._event_to_alert = self.metrics.histogram("event_to_alert_seconds", "Reading timestamp to alert published")
+        self._register_gauges()
+
+        # Fixed-size multi-resolution history for /api/metrics/history
+        self.history = MetricsHistory()
+        self._history_task = None
+
     def initialize(self):
-        loop = asyncio.get_event_loop()
-        self.scheduler = AsyncIOScheduler(loop)
-
-        self.incoming_stream.pipe(
-            ops.buffer_with_time_or_count(timespan=2.0, count=10),
-            ops.filter(lambda batch: len(batch) > 0),
-            ops.observe_on(self.scheduler)
-        ).subscribe(
-            on_next=lambda batch: self._process_batch(batch),
-            on_error=lambda e: logger.error(f"Stream Error: {e}")
-        )
-        logger.info("Reactive Stream Initialized.")
-
-    def on_sensor_data(self, data: SensorEvent):
-        self.incoming_stream.on_next(data)
+        self.loop = asyncio.get_event_loop()
+        self._loop_thread = threading.get_ident()
+        self._ready = asyncio.Event()
+        if self.workers > 0:
+            self.sharded = ShardedEvaluator(self.park, list(self.dinos_map.values()), self.workers, self.rules.definitions)
+        self._drain_task = self.loop.create_task(self._drain_loop())
+        self._history_task = self.loop.create_task(self._sample_history())
+        if self.rules.path:
+            self._rules_task = self.loop.create_task(self._watch_rules())
+        if self.watchdog.settings.enabled:
+            self._watchdog_task = self.loop.create_task(self._watch_sensors())
+        logger.info(f"Reactive Stream Initialized (policy: {self.buffer.settings.overflow_policy.value}).")
+
+    def shutdown(self):
+        if self._drain_task:
+            self._drain_task.cancel()
+            self._drain_task = None
+        if self._rules_task:
+            self._rules_task.cancel()
+            self._rules_task = None
+        if self._history_task:
+            self._history_task.cancel()
+            self._history_task = None
+        if self._watchdog_task:
+            self._watchdog_task.cancel()
+            self._watchdog_task = None
+        if self.sharded:
+            self.sharded.shutdown()
+            self.sharded = None
+
+    # Classified into a priority lane here: possible breaches and lost vital
+    # signs are taken ahead of routine readings and temperature telemetry
+    def on_sensor_data(self, data: SensorReading):
+        # Never block the event loop thread, even under the BLOCK policy
+        self.buffer.put(data, classify(data), can_block=threading.get_ident() != self._loop_thread)
+
+    def on_sensor_batch(self, readings: list[SensorReading]):
+        for reading in readings:
+            self.on_sensor_data(reading)
+
+    def _signal_ready(self):
+        if self.loop is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._ready.set()
+        else:
+            self.loop.call_soon_threadsafe(self._ready.set)
+
+    async def _drain_loop(self):
+        while True:
+            self._ready.clear()
+            wait = self.buffer.time_until_flush()
+
+            if wait is None or wait > 0:
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            arrivals = []
+            lane, batch = self.buffer.take_batch(arrivals)
+            if batch:
+                self._record_queue_wait(lane, arrivals)
+                started = time.perf_counter()
+                try:
+                    if self.sharded:
+                        await self._process_batch_sharded(batch)
+                    else:
+                        self._process_batch(batch)
+                except Exception as e:
+                    logger.error(f"Stream Error: {e}")
+                self.buffer.record_processing(len(batch), time.perf_counter() - started)
+                self._lane_latency[lane].record_many(time.monotonic() - np.asarray(arrivals))
+            # Let API requests run between batches
+            await asyncio.sleep(0)
+
+    # == BULK INGESTION ==
+
+    def available_credits(self) -> int:
+        return self.buffer.free_slots()
+
+    def try_ingest(self, readings: list[SensorReading]) -> bool:
+        if not self.buffer.put_batch(readings):
+            self._rejected.inc(len(readings))
+            return False
+        return True
         
-    def register_dinosaur(self, dino):
-        self.dinos_map[str(dino.id)] = dino
+    # == STATE ==
+    # Subscribed to the StateStore. Batches read park and dinosaurs from one
+    # _context tuple, so swapping in a new snapshot is atomic for them.
+
+    @property
+    def park(self):
+        return self._context[0]
+
+    @property
+    def dinos_map(self) -> dict:
+        return self._context[1]
+
+    def on_state_change(self, snapshot, change):
+        self._context = (snapshot.park, snapshot.dinosaurs)
+        self.alert_processor.park = snapshot.park
+
+        if change.kind == HABITAT_REMOVED:
+            for habitat_id in change.habitat_ids:
+                self.habitat_temperature.forget(habitat_id)
+                self.anomalies.forget_habitat(habitat_id)
+            self.watchdog.forget_habitats(change.habitat_ids)
+        elif change.kind == DINOSAUR_REMOVED:
+            self.dinosaur_bpm.forget(change.dinosaur_id)
+            self.anomalies.forget_dinosaur(change.dinosaur_id)
+            self.watchdog.forget_dinosaur(change.dinosaur_id)
+
+        # Habitat scopes and bounds are resolved at compile time
+        if change.kind in (HABITAT_ADDED, HABITAT_REMOVED, RESET):
+            self.rules.rebind(snapshot.park)
+        else:
+            self.rules.park = snapshot.park
+
+        if self.sharded:
+            self._sync_shards(snapshot, change)
 
-    def unregister_dinosaur(self, dino_id):
-        if str(dino_id) in self.dinos_map:
-            del self.dinos_map[str(dino_id)]
+    def _sync_shards(self, snapshot, change):
+        for habitat_id in change.habitat_ids:
+            habitat = snapshot.park.get_habitat(habitat_id)
+            if habitat is None:
+                self.sharded.remove_habitat(habitat_id)
+            else:
+                self.sharded.upsert_habitat(habitat)
+        if change.dinosaur_id is not None:
+            dino = snapshot.dinosaurs.get(change.dinosaur_id)
+            if dino is None:
+                self.sharded.unregister_dinosaur(change.dinosaur_id)
+            else:
+                self.sharded.register_dinosaur(dino)
 
-    def _process_batch(self, batch: list[SensorEvent]):
+    # == RULES ==
+
+    def reload_rules(self):
+        definitions = self.rules.reload()
+        if self.sharded:
+            self.sharded.load_rules(definitions)
+
+    def replace_rules(self, definitions):
+        self.rules.replace(definitions)
+        if self.sharded:
+            self.sharded.load_rules(definitions)
+
+    async def _watch_rules(self):
+        while True:
+            await asyncio.sleep(RULES_POLL_INTERVAL)
+            if not self.rules.changed_on_disk():
+                continue
+            try:
+                self.reload_rules()
+            except RuleLoadError as e:
+                logger.error(f"Rules reload failed, keeping v{self.rules.version}: {e}")
+
+    def _process_batch(self, batch: list[SensorReading]):
+        findings = self._record_batch(batch)
+        timings = {}
+        park, dinos_map = self._context
+        alerts = self.rules.evaluate_batch(batch, park, dinos_map, timings)
+        self._record_evaluation(timings)
+        self._publish_alerts(batch, self._add_findings(batch, alerts, *findings))
+
+    async def _process_batch_sharded(self, batch: list[SensorReading]):
+        findings = self._record_batch(batch)
+        started = time.perf_counter()
+        alerts = await self.sharded.evaluate(batch)
+        self._record_evaluation({"sharded": time.perf_counter() - started})
+        self._publish_alerts(batch, self._add_findings(batch, alerts, *findings))
+
+    # Updates counters, rolling aggregates, anomaly baselines and sensor
+    # health; returns the (sensor health, anomaly) findings
+    def _record_batch(self, batch: list[SensorReading]) -> tuple:
         count = len(batch)
-        self.stats["total_events_processed"] += count
+        self._processed.inc(count)
         self.stats["last_batch_size"] = count
         
-        bpm_readings = [r.bpm for r in batch if r.sensor_type == "heart_rate"]
+        temp_index, temp_keys, temp_values, bpm_index, bpm_keys, bpm_values = [], [], [], [], [], []
+        for i, r in enumerate(batch):
+            if r.sensor_type == "temperature":
+                temp_index.append(i)
+                temp_keys.append(r.habitat_id)
+                temp_values.append((r.value - 32) * 5/9 if r.unit == "fahrenheit" else r.value)
+            elif r.sensor_type == "heart_rate":
+                bpm_index.append(i)
+                bpm_keys.append(r.dinosaur_id)
+                bpm_values.append(r.bpm)
         
-        if bpm_readings:
-            avg_bpm = sum(bpm_readings) / len(bpm_readings)
+        if bpm_values:
+            avg_bpm = sum(bpm_values) / len(bpm_values)
             self.stats["current_avg_bpm"] = round(avg_bpm, 1)
+
+        self.habitat_temperature.update(temp_keys, temp_values)
+        self.dinosaur_bpm.update(bpm_keys, bpm_values)
         
         logger.info(f"Processing Batch of {count} events...")
-        
-        for reading in batch:
-            self._analyze_reading(reading)
 
-    def _analyze_reading(self, reading: SensorEvent):
-        alert = None
-        
-        if reading.sensor_type == "temperature":
-            habitat = next((h for h in self.park.habitats if h.id == reading.habitat_id), None)
-            if habitat:
-                alert = RuleEvaluator.evaluate_temperature(reading, habitat)
-        
-        elif reading.sensor_type == "motion":
-            habitat = next((h for h in self.park.habitats if h.id == reading.habitat_id), None)
-            if habitat:
-                alert = RuleEvaluator.evaluate_motion(reading, habitat)
-                
-        elif reading.sensor_type == "heart_rate":
-            dino = self.dinos_map.get(reading.dinosaur_id)
-            if dino:
-                alert = RuleEvaluator.evaluate_heart_rate(reading, dino)
-
-        if alert:
-            self.stats["total_alerts_triggered"] += 1
-            logger.critical(f"==> ALERT! [{alert.severity}]: {alert.message}")
-        else:
-            logger.debug(f"OK: {reading.sensor_type}")
+        started = time.perf_counter()
+        anomalies = self.anomalies.observe(batch, (temp_index, temp_keys, temp_values), (bpm_index, bpm_keys, bpm_values),
+                                           *self._context)
+        checked = time.perf_counter()
+        health = self.watchdog.observe(batch, time.time())
+        self._record_evaluation({"anomaly": checked - started, "watchdog": time.perf_counter() - checked})
+        return health, anomalies
+
+    # Rule alerts win, then sensor health, then anomalies: a reading keeps at
+    # most one alert (AlertProcessor keys them by position)
+    def _add_findings(self, batch: list[SensorReading], alerts: list, health: list, anomalies: list) -> list:
+        if not health and not anomalies:
+            return alerts
+        park, dinos_map = self._context
+        taken = {i for i, _ in alerts}
+        extra = self.watchdog.alerts(batch, [f for f in health if f[0] not in taken], park, dinos_map)
+        taken.update(i for i, _ in extra)
+        extra += self.anomalies.alerts(batch, [a for a in anomalies if a[0] not in taken], park, dinos_map)
+        if not extra:
+            return alerts
+        merged = alerts + extra
+        merged.sort(key=lambda pair: pair[0])
+        return merged
+
+    def _publish_alerts(self, batch: list[SensorReading], alerts: list):
+        started = time.perf_counter()
+        alerts = self.alert_processor.process(batch, alerts)
+        for _, alert in alerts:
+            self._emit_alert(alert)
+        if alerts and self.alert_sink:
+            self.alert_sink([alert for _, alert in alerts])
+
+        if self.event_store:
+            self.event_store.append(batch, alerts)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"OK: {len(batch) - len(alerts)} readings")
+
+        if alerts:
+            now = time.time()
+            self._event_to_alert.record_many([now - batch[i].timestamp for i, _ in alerts])
+        self._alert_emission.record(time.perf_counter() - started)
+
+    # == SENSOR WATCHDOG ==
+    # Stale sensors have no reading to hang their alert on, so the timing
+    # wheel is advanced every tick and its alerts are published on their own
+
+    async def _watch_sensors(self):
+        while True:
+            await asyncio.sleep(self.watchdog.settings.tick)
+            park, dinos_map = self._context
+            alerts = self.watchdog.expire(time.time(), park, dinos_map)
+            if alerts:
+                self._publish_sensor_alerts(alerts)
+
+    def _publish_sensor_alerts(self, alerts: list):
+        alerts = self.alert_processor.process_alerts(alerts)
+        for alert in alerts:
+            self._emit_alert(alert)
+        if alerts and self.alert_sink:
+            self.alert_sink(alerts)
+        if alerts and self.event_store:
+            self.event_store.append([], [(None, alert) for alert in alerts])
+
+    def list_sensors(self, status=None, habitat_id=None, after=None, limit=100) -> dict:
+        return self.watchdog.list_sensors(time.time(), status, habitat_id, after, limit)
+
+    def _emit_counter(self, severity):
+        counter = self._alerts.get(severity)
+        if counter is None:
+            counter = self._alerts[severity] = self.metrics.counter(
+                "alerts_total", "Alerts published", severity=severity.value
+            )
+        return counter
+
+    def _emit_alert(self, alert):
+        self._emit_counter(alert.severity).inc()
+        logger.critical(f"==> ALERT! [{alert.severity}]: {alert.message}")
+        self.alert_bus.publish(alert)
+
+    def get_habitat_stats(self, habitat):
+        return {
+            "habitat_id": str(habitat.id),
+            "temperature": self.habitat_temperature.snapshot(habitat.id),
+            "dinosaurs": {
+                str(dino_id): self.dinosaur_bpm.snapshot(str(dino_id))
+                for dino_id in habitat.dinosaur_ids
+            }
+        }
+
+    # == METRICS ==
+
+    def _stage_histogram(self, stage: str, **labels):
+        return self.metrics.histogram("stage_latency_seconds", "Time spent per pipeline stage", stage=stage, **labels)
+
+    def _register_gauges(self):
+        gauge = self.metrics.gauge
+        gauge("uptime_seconds", lambda: (datetime.now() - self.stats["start_time"]).total_seconds())
+        gauge("queue_depth", lambda: self.buffer.depth, "Readings waiting in the ingest buffer")
+        gauge("queue_capacity", lambda: self.buffer.settings.capacity)
+        for index, lane in enumerate(LANES):
+            gauge("lane_queue_depth", lambda index=index: self.buffer.lane_depth(index),
+                  "Readings waiting per priority lane", lane=lane)
+        gauge("arrival_rate", lambda: self.buffer.arrival_rate, "Smoothed ingest rate (readings/s)")
+        gauge("batch_target", lambda: self.buffer.target_batch_size)
+        gauge("last_batch_size", lambda: self.stats["last_batch_size"])
+        for reason in ("oldest", "low_priority", "blocked"):
+            gauge("dropped_events", lambda key=f"dropped_{reason}": self.buffer.stats[key],
+                  "Readings dropped by the overflow policy", reason=reason)
+        gauge("alert_subscribers", lambda: len(self.alert_bus.subscribers))
+        gauge("sensors_tracked", lambda: len(self.watchdog), "Sensor ids seen by the watchdog")
+        gauge("sensors_stale", lambda: int(self.watchdog.stale.sum()), "Sensors silent for longer than stale_after")
+        processor = self.alert_processor
+        gauge("alert_states", lambda: len(processor.states), "Sensors with an active alert")
+        gauge("open_incidents", lambda: len(processor.incidents))
+        for reason, key in (("dedup", "alerts_suppressed_dedup"), ("rate_limit", "alerts_rate_limited"),
+                            ("correlated", "alerts_correlated")):
+            gauge("alerts_suppressed", lambda key=key: processor.stats[key],
+                  "Alerts withheld by the alert processor", reason=reason)
+        if self.event_store:
+            for name, description in STORE_GAUGES:
+                gauge(name, lambda name=name: self.event_store.get_metrics()[name], description)
+
+    def _record_queue_wait(self, lane: int, arrivals: list):
+        waits = time.monotonic() - np.asarray(arrivals)
+        self._queue_wait[lane].record_many(waits)
+        # Age of the oldest reading when its batch was cut
+        self._batch_formation[lane].record(float(waits.max()))
+
+    def _record_evaluation(self, timings: dict):
+        for sensor_type, seconds in timings.items():
+            self._stage_histogram("evaluation", sensor_type=sensor_type).record(seconds)
+
+    def render_prometheus(self) -> str:
+        return self.metrics.render_prometheus()
+
+    # (cumulative counters, gauges) recorded into the history every second
+    def history_sample(self):
+        counters = {"throughput": self._processed.total, "alert_rate": sum(c.total for c in self._alerts.values())}
+        gauges = {"batch_size": self.stats["last_batch_size"], "avg_bpm": self.stats["current_avg_bpm"]}
+        return counters, gauges
+
+    async def _sample_history(self):
+        while True:
+            self.history.sample(*self.history_sample())
+            await asyncio.sleep(HISTORY_INTERVAL)
+
+    # == CHECKPOINTS ==
+    # Counters, rolling aggregates and history survive restarts through the
+    # Checkpointer. capture_state() copies the aggregates in chunks and
+    # yields to the event loop between them.
+
+    def _export_counters(self) -> dict:
+        return {
+            "processed": self._processed.total,
+            "rejected": self._rejected.total,
+            "alerts": {severity.value: counter.total for severity, counter in self._alerts.items()},
+            "avg_bpm": self.stats["current_avg_bpm"],
+        }
+
+    async def capture_state(self) -> dict:
+        aggregates = {}
+        for name in ("habitat_temperature", "dinosaur_bpm"):
+            aggregator = getattr(self, name)
+            parts = []
+            for part in aggregator.iter_export():
+                parts.append(part)
+                await asyncio.sleep(0)
+            aggregates[name] = aggregator.merge_exports(parts)
+        return {"counters": self._export_counters(), "history": self.history.export_state(),
+                "anomalies": self.anomalies.export_state(), "watchdog": self.watchdog.export_state(), **aggregates}
+
+    def export_state(self) -> dict:
+        return {
+            "counters": self._export_counters(),
+            "history": self.history.export_state(),
+            "anomalies": self.anomalies.export_state(),
+            "watchdog": self.watchdog.export_state(),
+            "habitat_temperature": self.habitat_temperature.export_state(),
+            "dinosaur_bpm": self.dinosaur_bpm.export_state(),
+        }
+
+    def restore_state(self, state: dict):
+        counters = state.get("counters", {})
+        self._processed.total = counters.get("processed", 0)
+        self._rejected.total = counters.get("rejected", 0)
+        for severity, total in counters.get("alerts", {}).items():
+            self._emit_counter(AlertSeverity(severity)).total = total
+        self.stats["current_avg_bpm"] = counters.get("avg_bpm")
+        if "history" in state:
+            self.history.restore_state(state["history"])
+        if "anomalies" in state:
+            self.anomalies.restore_state(state["anomalies"])
+        if "watchdog" in state:
+            self.watchdog.restore_state(state["watchdog"], time.time())
+        for name in ("habitat_temperature", "dinosaur_bpm"):
+            if name in state:
+                getattr(self, name).restore_state(state[name])
+
+    def get_latency_metrics(self) -> dict:
+        latencies = {}
+        histograms = list(self.metrics.series("stage_latency_seconds").items())
+        histograms += [((("stage", "event_to_alert"),), self._event_to_alert)]
+        histograms += [((("stage", "lane_latency"), ("lane", lane)), histogram)
+                       for lane, histogram in zip(LANES, self._lane_latency)]
+        for labels, histogram in histograms:
+            name = "_".join(value for _, value in sorted(labels, key=lambda pair: pair[0] != "stage"))
+            for q in (50, 99):
+                value = histogram.percentile(q)
+                latencies[f"{name}_p{q}_ms"] = round(value * 1e3, 3) if value is not None else None
+        return latencies
 
     def get_system_metrics(self):
-        now = datetime.now()
-        uptime = (now - self.stats["start_time"]).total_seconds()
-        
-        tps = 0
-        if uptime > 0:
-            tps = self.stats["total_events_processed"] / uptime
+        uptime = (datetime.now() - self.stats["start_time"]).total_seconds()
+        alert_counters = list(self._alerts.values())
+        rates = {}
+        for label, window in RATE_WINDOWS.items():
+            rates[f"throughput_{label}"] = round(self._processed.rate(window), 2)
+            rates[f"alert_rate_{label}"] = round(sum(c.rate(window) for c in alert_counters), 2)
 
         return {
             "uptime_seconds": round(uptime, 2),
-            "total_processed": self.stats["total_events_processed"],
-            "total_alerts": self.stats["total_alerts_triggered"],
-            "current_throughput_tps": round(tps, 2),
+            "total_processed": self._processed.total,
+            "total_alerts": sum(c.total for c in alert_counters),
+            # Windowed (last 10s) so stalls show up immediately
+            "current_throughput_tps": rates["throughput_10s"],
+            **rates,
             "last_batch_size": self.stats["last_batch_size"],
-            "avg_bpm": self.stats["current_avg_bpm"]
-        }
\ No newline at end of file
+            "total_rejected": self._rejected.total,
+            "avg_bpm": self.stats["current_avg_bpm"],
+            **self.buffer.get_metrics(),
+            **self.alert_bus.get_metrics(),
+            **self.alert_processor.get_metrics(),
+            **self.anomalies.get_metrics(),
+            **self.watchdog.get_metrics(),
+            **(self.event_store.get_metrics() if self.event_store else {}),
+            **self.get_latency_metrics()
+        }
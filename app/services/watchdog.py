@@ -0,0 +1,523 @@
+import bisect
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Set, Tuple
+from uuid import UUID
+import numpy as np
+from pydantic import BaseModel, Field
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import SensorReading
+
+logger = logging.getLogger("JurassicReactor")
+
+INITIAL_SLOTS = 64
+
+# Per-reading health findings, highest precedence last
+DRAINING, CLOCK_SKEW, BATTERY_LOW, BATTERY_CRITICAL = 1, 2, 3, 4
+
+STATUSES = ("ok", "stale", "low_battery", "clock_skew")
+OK, STALE, LOW_BATTERY, SKEWED = range(len(STATUSES))
+
+# == SETTINGS ==
+
+class WatchdogSettings(BaseModel):
+    enabled: bool = True
+    stale_after: float = Field(120.0, gt=0, description="Seconds of silence before a sensor is reported stale")
+    forget_after: float = Field(86400.0, gt=0, description="Seconds of silence before a stale sensor is dropped")
+    max_sensors: int = Field(1_000_000, gt=0, description="Sensor ids tracked at most; readings of further new ids go unchecked")
+    tick: float = Field(1.0, gt=0, description="Timing wheel resolution in seconds")
+    battery_low: float = Field(20.0, ge=0, le=100)
+    battery_critical: float = Field(5.0, ge=0, le=100)
+    battery_horizon: float = Field(24.0, gt=0, description="Hours left at the current drain that raise a draining alert")
+    trend_interval: float = Field(300.0, gt=0, description="Seconds between two battery drain estimates")
+    trend_alpha: float = Field(0.3, gt=0, le=1, description="EWMA weight of each drain estimate")
+    max_clock_skew: float = Field(120.0, gt=0, description="Seconds between a reading's timestamp and its arrival")
+
+# == TIMING WHEEL ==
+# Hierarchical timing wheel: `levels` rings of `slots` buckets, where a
+# bucket of level l spans slots**l ticks. An entry goes to the finest level
+# whose range covers its delay; every tick pops one level-0 bucket, and when
+# a level wraps the next bucket of the level above is re-filed into the
+# finer ones (coarsest first). Scheduling and expiry are O(1) per entry,
+# whatever the number of timers. Delays past the horizon (~194 days at 1s
+# ticks) fire at the horizon; callers re-check their deadline anyway.
+#
+# Keys are ints below 2**KEY_BITS. Each entry is packed into a single int,
+# (due - origin) << KEY_BITS | key, so the buckets hold no GC-tracked
+# objects and a million timers do not slow down garbage collection.
+
+KEY_BITS = 32
+KEY_MASK = (1 << KEY_BITS) - 1
+
+class TimingWheel:
+    def __init__(self, tick: int, slots: int = 256, levels: int = 3):
+        self.slots = slots
+        self.levels = levels
+        self.spans = [slots ** level for level in range(levels + 1)]
+        self.buckets = [[[] for _ in range(slots)] for _ in range(levels)]
+        self.origin = self.tick = tick
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def schedule(self, due: int, key: int):
+        self.size += 1
+        self._file(max(due, self.tick + 1), key)
+
+    # Vectorized schedule(): entries are grouped by bucket, then appended per bucket
+    def schedule_many(self, dues: np.ndarray, keys: np.ndarray):
+        self.size += len(keys)
+        delays = np.clip(dues - self.tick, 1, self.spans[-1] - 1)
+        dues = self.tick + delays
+        levels = np.searchsorted(self.spans[1:], delays, side="right")
+        buckets = levels * self.slots + (dues // np.array(self.spans)[levels]) % self.slots
+        order = np.argsort(buckets, kind="stable")
+        buckets = buckets[order]
+        entries = (((dues[order] - self.origin) << KEY_BITS) | keys[order]).tolist()
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]]).tolist() + [len(entries)]
+        for start, end in zip(starts, starts[1:]):
+            level, index = divmod(int(buckets[start]), self.slots)
+            self.buckets[level][index].extend(entries[start:end])
+
+    def _file(self, due: int, key: int):
+        delay = min(due - self.tick, self.spans[-1] - 1)
+        due = self.tick + delay
+        level = 0
+        while delay >= self.spans[level + 1]:
+            level += 1
+        self.buckets[level][(due // self.spans[level]) % self.slots].append(((due - self.origin) << KEY_BITS) | key)
+
+    # Moves the wheel up to `tick` and returns the (dues, keys) that expired
+    def advance(self, tick: int) -> Tuple[np.ndarray, np.ndarray]:
+        slots, spans, origin = self.slots, self.spans, self.origin
+        if tick - self.tick >= spans[-1]:
+            # Jumped past the horizon (e.g. a suspended host): everything is due
+            expired = [entry for ring in self.buckets for bucket in ring for entry in bucket]
+            self.buckets = [[[] for _ in range(slots)] for _ in range(self.levels)]
+            self.tick = tick
+        else:
+            expired = []
+            while self.tick < tick:
+                self.tick += 1
+                now = self.tick
+                for level in range(self.levels - 1, 0, -1):
+                    if now % spans[level]:
+                        continue
+                    ring = self.buckets[level]
+                    index = (now // spans[level]) % slots
+                    bucket, ring[index] = ring[index], []
+                    for entry in bucket:
+                        self._file((entry >> KEY_BITS) + origin, entry & KEY_MASK)
+                ring = self.buckets[0]
+                index = now % slots
+                if ring[index]:
+                    expired.extend(ring[index])
+                    ring[index] = []
+        self.size -= len(expired)
+        entries = np.array(expired, dtype=np.int64)
+        return (entries >> KEY_BITS) + origin, entries & KEY_MASK
+
+# == WATCHDOG ==
+# Liveness, battery and clock health of every sensor_id, in NumPy arrays
+# indexed by sensor slot. The batch path only touches the arrays: readings
+# set last_seen, so a reporting sensor costs no timer work at all. Each
+# sensor has a single wheel entry; when it expires, the sensor's deadline is
+# checked against last_seen and either pushed back or turned into a stale
+# alert (and, after forget_after, the sensor is dropped).
+#
+# Battery drain is estimated every trend_interval from the level change
+# since the previous estimate (%/h, EWMA); a recharge resets it.
+#
+# At most max_sensors ids are tracked: past that, new ids are not
+# registered (and counted in readings_untracked) until forgotten sensors
+# free their slots. Slots are also indexed by habitat and dinosaur, so
+# removing either does not scan the whole table.
+
+class SensorWatchdog:
+    def __init__(self, settings: Optional[WatchdogSettings] = None, now: Optional[float] = None):
+        self.settings = settings or WatchdogSettings()
+        self.wheel = TimingWheel(self._elapsed_ticks(time.time() if now is None else now))
+
+        self.index: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.capacity = 0
+        self.ids: List[Optional[str]] = []
+        self.types: List[Optional[str]] = []
+        self.habitats: List[Optional[UUID]] = []
+        self.dinosaurs: List[Optional[str]] = []
+        self.last_seen = np.zeros(0)
+        self.battery = np.zeros(0)
+        self.ref_battery = np.zeros(0)
+        self.ref_time = np.zeros(0)
+        self.drain = np.zeros(0)
+        self.skew = np.zeros(0)
+        self.stale = np.zeros(0, dtype=bool)
+        self.due = np.zeros(0, dtype=np.int64)
+        self._grow(INITIAL_SLOTS)
+        # habitat_id / dinosaur_id -> slots of its sensors
+        self._by_habitat: Dict[UUID, Set[int]] = {}
+        self._by_dinosaur: Dict[str, Set[int]] = {}
+        # (sorted ids, their slots) for paging, rebuilt after sensors come or go
+        self._order = None
+
+        self.stats = {"sensors_went_stale": 0, "sensors_recovered": 0, "sensors_forgotten": 0, "readings_untracked": 0}
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    # Deadlines round up to a tick and the wheel only advances over whole
+    # elapsed ticks, so nothing fires before its deadline
+    def _tick(self, deadline: float) -> int:
+        return math.ceil(deadline / self.settings.tick)
+
+    def _elapsed_ticks(self, now: float) -> int:
+        return math.floor(now / self.settings.tick)
+
+    def _grow(self, capacity: int):
+        extra = capacity - self.capacity
+        pad = lambda a: np.concatenate([a, np.zeros(extra, dtype=a.dtype)])
+        self.last_seen, self.ref_battery = pad(self.last_seen), pad(self.ref_battery)
+        # NaN marks free slots, so they never count as low battery
+        self.battery = np.concatenate([self.battery, np.full(extra, math.nan)])
+        self.ref_time, self.drain, self.skew = pad(self.ref_time), pad(self.drain), pad(self.skew)
+        self.stale, self.due = pad(self.stale), pad(self.due)
+        for column in (self.ids, self.types, self.habitats, self.dinosaurs):
+            column.extend([None] * extra)
+        self.capacity = capacity
+
+    def _allocate(self, sensor_id: str) -> int:
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot = len(self.index)
+            if slot >= self.capacity:
+                self._grow(self.capacity * 2)
+        self.index[sensor_id] = slot
+        self.ids[slot] = sensor_id
+        self._order = None
+        return slot
+
+    def _slot(self, reading: SensorReading, now: float) -> int:
+        slot = self.index.get(reading.id)
+        return self._register(reading, now) if slot is None else slot
+
+    # -1 once max_sensors ids are tracked
+    def _register(self, reading: SensorReading, now: float) -> int:
+        if len(self.index) >= self.settings.max_sensors:
+            if not self.stats["readings_untracked"]:
+                logger.warning(f"Watchdog tracking {len(self.index)} sensors, the max_sensors limit; new ids go unchecked")
+            self.stats["readings_untracked"] += 1
+            return -1
+        slot = self._allocate(reading.id)
+        self.types[slot] = reading.sensor_type.value
+        self._attach(slot, reading.habitat_id, getattr(reading, "dinosaur_id", None))
+        self.last_seen[slot] = self.ref_time[slot] = now
+        self.battery[slot] = self.ref_battery[slot] = reading.battery_level
+        self.drain[slot] = math.nan
+        self.skew[slot] = 0.0
+        self._schedule(slot, now + self.settings.stale_after)
+        return slot
+
+    def _schedule(self, slot: int, deadline: float):
+        due = self._tick(deadline)
+        self.due[slot] = due
+        self.wheel.schedule(due, slot)
+
+    def _schedule_many(self, slots: np.ndarray, deadlines: np.ndarray):
+        if len(slots):
+            dues = np.ceil(deadlines / self.settings.tick).astype(np.int64)
+            self.due[slots] = dues
+            self.wheel.schedule_many(dues, slots)
+
+    def _attach(self, slot: int, habitat_id: Optional[UUID], dino_id: Optional[str]):
+        self.habitats[slot] = habitat_id
+        self.dinosaurs[slot] = dino_id
+        if habitat_id is not None:
+            self._by_habitat.setdefault(habitat_id, set()).add(slot)
+        if dino_id is not None:
+            self._by_dinosaur.setdefault(dino_id, set()).add(slot)
+
+    def _detach(self, slot: int):
+        for owners, key in ((self._by_habitat, self.habitats[slot]), (self._by_dinosaur, self.dinosaurs[slot])):
+            slots = owners.get(key)
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del owners[key]
+
+    def _forget(self, slot: int):
+        self._detach(slot)
+        del self.index[self.ids[slot]]
+        self.ids[slot] = self.types[slot] = self.habitats[slot] = self.dinosaurs[slot] = None
+        # Its pending wheel entry no longer matches and is dropped on expiry
+        self.due[slot] = -1
+        self.stale[slot] = False
+        self.battery[slot] = math.nan
+        self._free.append(slot)
+        self._order = None
+
+    # Returns (position, finding, slot) for the readings with a battery or
+    # clock problem; alerts() turns the ones no rule fired on into Alerts
+    def observe(self, batch: list[SensorReading], now: float) -> list:
+        if not self.settings.enabled or not batch:
+            return []
+        s = self.settings
+        n = len(batch)
+        get = self.index.get
+        slot_list = [get(r.id, -1) for r in batch]
+        positions = None
+        if -1 in slot_list:
+            slot_list = [slot if slot >= 0 else self._slot(r, now) for r, slot in zip(batch, slot_list)]
+            if -1 in slot_list:
+                # Untracked ids (past max_sensors) are left out
+                positions = [i for i, slot in enumerate(slot_list) if slot >= 0]
+                if not positions:
+                    return []
+                batch = [batch[i] for i in positions]
+                slot_list = [slot_list[i] for i in positions]
+                n = len(batch)
+        slots = np.array(slot_list, dtype=np.int64)
+        battery = np.fromiter((r.battery_level for r in batch), dtype=np.float64, count=n)
+        skew = np.fromiter((r.timestamp for r in batch), dtype=np.float64, count=n) - now
+
+        # Latest reading of each sensor in the batch
+        unique, last = np.unique(slots[::-1], return_index=True)
+        last = n - 1 - last
+        recovered = unique[self.stale[unique]]
+        if len(recovered):
+            self._recover(recovered, now)
+        self.last_seen[unique] = now
+        self.skew[unique] = skew[last]
+        self._update_drain(unique, battery[last], now)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            hours_left = self.battery[slots] / self.drain[slots]
+        finding = np.zeros(n, dtype=np.int8)
+        finding[hours_left < s.battery_horizon] = DRAINING
+        finding[np.abs(skew) > s.max_clock_skew] = CLOCK_SKEW
+        finding[battery < s.battery_low] = BATTERY_LOW
+        finding[battery < s.battery_critical] = BATTERY_CRITICAL
+        hits = np.flatnonzero(finding)
+        at = hits.tolist() if positions is None else [positions[k] for k in hits.tolist()]
+        return list(zip(at, finding[hits].tolist(), slots[hits].tolist()))
+
+    def _update_drain(self, slots: np.ndarray, battery: np.ndarray, now: float):
+        self.battery[slots] = battery
+        elapsed = now - self.ref_time[slots]
+        ready = elapsed >= self.settings.trend_interval
+        if not ready.any():
+            return
+        slots, battery, elapsed = slots[ready], battery[ready], elapsed[ready]
+        rate = (self.ref_battery[slots] - battery) / elapsed * 3600.0
+        # A recharge or a new battery restarts the estimate
+        rate[rate < 0] = math.nan
+        previous = self.drain[slots]
+        self.drain[slots] = np.where(np.isnan(previous), rate, previous + self.settings.trend_alpha * (rate - previous))
+        self.ref_battery[slots] = battery
+        self.ref_time[slots] = now
+
+    def _recover(self, slots: np.ndarray, now: float):
+        self.stale[slots] = False
+        self.stats["sensors_recovered"] += len(slots)
+        for slot in slots.tolist():
+            # The pending entry is the forget deadline; bring liveness back forward
+            self._schedule(slot, now + self.settings.stale_after)
+            logger.info(f"Sensor {self.ids[slot]} reporting again after {now - self.last_seen[slot]:.0f}s")
+
+    def alerts(self, batch: list[SensorReading], findings: list, park, dinos_map: dict) -> list:
+        alerts = []
+        for i, finding, slot in findings:
+            reading = batch[i]
+            where = self._location(slot, park, dinos_map)
+            if finding >= BATTERY_LOW:
+                critical = finding == BATTERY_CRITICAL
+                alert = Alert(
+                    sensor_id=reading.id,
+                    habitat_id=reading.habitat_id,
+                    severity=AlertSeverity.HIGH if critical else AlertSeverity.MEDIUM,
+                    message=f"Battery {'critical' if critical else 'low'} on {reading.id} ({where}): "
+                            f"{reading.battery_level:.0f}%",
+                    triggered_value=round(reading.battery_level, 1),
+                    rule="sensor_battery_low"
+                )
+            elif finding == CLOCK_SKEW:
+                skew = reading.timestamp - self.last_seen[slot]
+                alert = Alert(
+                    sensor_id=reading.id,
+                    habitat_id=reading.habitat_id,
+                    severity=AlertSeverity.LOW,
+                    message=f"Clock skew on {reading.id} ({where}): timestamp {abs(skew):.0f}s "
+                            f"{'ahead of' if skew > 0 else 'behind'} arrival",
+                    triggered_value=round(float(skew), 1),
+                    rule="sensor_clock_skew"
+                )
+            else:
+                drain = float(self.drain[slot])
+                alert = Alert(
+                    sensor_id=reading.id,
+                    habitat_id=reading.habitat_id,
+                    severity=AlertSeverity.LOW,
+                    message=f"Battery draining on {reading.id} ({where}): {reading.battery_level:.0f}% at "
+                            f"{drain:.1f}%/h, empty in ~{reading.battery_level / drain:.0f}h",
+                    triggered_value=round(drain, 2),
+                    rule="sensor_battery_draining"
+                )
+            alerts.append((i, alert))
+        return alerts
+
+    def _location(self, slot: int, park, dinos_map: dict) -> str:
+        dino = dinos_map.get(self.dinosaurs[slot]) if self.dinosaurs[slot] else None
+        if dino is not None:
+            return dino.name
+        habitat = park.get_habitat(self.habitats[slot]) if self.habitats[slot] else None
+        return habitat.name if habitat else "unassigned"
+
+    # Advances the wheel to `now`; returns the stale alerts of the sensors that went silent
+    def expire(self, now: float, park, dinos_map: dict) -> List[Alert]:
+        s = self.settings
+        dues, slots = self.wheel.advance(self._elapsed_ticks(now))
+        if not len(slots):
+            return []
+        slots = slots[self.due[slots] == dues]
+        silent = now - self.last_seen[slots]
+        stale = self.stale[slots]
+        limit = np.where(stale, s.forget_after, s.stale_after)
+        waiting = silent < limit
+        # Heard from since they were scheduled (or stale but not yet forgotten)
+        self._schedule_many(slots[waiting], self.last_seen[slots[waiting]] + limit[waiting])
+
+        for slot in slots[stale & ~waiting].tolist():
+            self._forget(slot)
+            self.stats["sensors_forgotten"] += 1
+
+        went = ~stale & ~waiting
+        silent, slots = silent[went], slots[went]
+        self.stale[slots] = True
+        self.stats["sensors_went_stale"] += len(slots)
+        self._schedule_many(slots, self.last_seen[slots] + s.forget_after)
+        return [self._stale_alert(slot, seconds, park, dinos_map) for slot, seconds in zip(slots.tolist(), silent.tolist())]
+
+    def _stale_alert(self, slot: int, silent: float, park, dinos_map: dict) -> Alert:
+        sensor_type = self.types[slot]
+        # A dead motion sensor leaves a blind spot in the perimeter
+        return Alert(
+            sensor_id=self.ids[slot],
+            habitat_id=self.habitats[slot],
+            severity=AlertSeverity.HIGH if sensor_type == "motion" else AlertSeverity.MEDIUM,
+            message=f"Sensor {self.ids[slot]} ({sensor_type}, {self._location(slot, park, dinos_map)}) "
+                    f"silent for {silent:.0f}s",
+            triggered_value=round(float(silent)),
+            rule="sensor_stale"
+        )
+
+    def forget_habitats(self, habitat_ids):
+        for habitat_id in habitat_ids:
+            for slot in list(self._by_habitat.get(habitat_id, ())):
+                self._forget(slot)
+
+    def forget_dinosaur(self, dino_id: str):
+        for slot in list(self._by_dinosaur.get(dino_id, ())):
+            self._forget(slot)
+
+    # == STATUS ==
+
+    def _status(self, slots: np.ndarray) -> np.ndarray:
+        status = np.full(len(slots), OK, dtype=np.int8)
+        status[np.abs(self.skew[slots]) > self.settings.max_clock_skew] = SKEWED
+        status[self.battery[slots] < self.settings.battery_low] = LOW_BATTERY
+        status[self.stale[slots]] = STALE
+        return status
+
+    def _sorted(self):
+        if self._order is None:
+            ids = sorted(self.index)
+            self._order = (ids, np.array([self.index[i] for i in ids], dtype=np.int64))
+        return self._order
+
+    def _describe(self, slot: int, status: int, now: float) -> dict:
+        drain = float(self.drain[slot])
+        battery = float(self.battery[slot])
+        known = not math.isnan(drain)
+        return {
+            "sensor_id": self.ids[slot],
+            "sensor_type": self.types[slot],
+            "habitat_id": str(self.habitats[slot]) if self.habitats[slot] else None,
+            "dinosaur_id": self.dinosaurs[slot],
+            "status": STATUSES[status],
+            "last_seen": round(float(self.last_seen[slot]), 3),
+            "silent_seconds": round(now - float(self.last_seen[slot]), 1),
+            "battery_level": round(battery, 1),
+            "battery_drain_per_hour": round(drain, 3) if known else None,
+            "battery_hours_left": round(battery / drain, 1) if known and drain > 0 else None,
+            "clock_skew_seconds": round(float(self.skew[slot]), 3),
+        }
+
+    # Page of sensors ordered by id, starting after the `after` cursor
+    def list_sensors(self, now: float, status: Optional[str] = None, habitat_id: Optional[UUID] = None,
+                     after: Optional[str] = None, limit: int = 100) -> dict:
+        ids, slots = self._sorted()
+        codes = self._status(slots)
+        mask = np.ones(len(slots), dtype=bool)
+        if habitat_id is not None:
+            mask &= np.isin(slots, list(self._by_habitat.get(habitat_id, ())))
+        summary = dict(zip(STATUSES, np.bincount(codes[mask], minlength=len(STATUSES)).tolist()))
+        if status is not None:
+            mask &= codes == STATUSES.index(status)
+        start = bisect.bisect_right(ids, after) if after is not None else 0
+        matches = np.flatnonzero(mask[start:])[:limit + 1] + start
+        page = matches[:limit].tolist()
+        return {
+            "total": int(mask.sum()),
+            "summary": summary,
+            "sensors": [self._describe(int(slots[k]), int(codes[k]), now) for k in page],
+            "next": ids[page[-1]] if len(matches) > limit else None,
+        }
+
+    # == CHECKPOINTS ==
+    # Restored sensors are taken as seen at restore time: the downtime does
+    # not count as silence. Stale ones stay stale without alerting again.
+
+    def export_state(self) -> dict:
+        slots = np.array(list(self.index.values()), dtype=np.int64)
+        return {
+            "ids": list(self.index),
+            "types": [self.types[slot] for slot in slots.tolist()],
+            "habitats": [str(self.habitats[slot]) if self.habitats[slot] else "" for slot in slots.tolist()],
+            "dinosaurs": [self.dinosaurs[slot] or "" for slot in slots.tolist()],
+            "last_seen": self.last_seen[slots], "battery": self.battery[slots], "drain": self.drain[slots],
+            "stale": self.stale[slots],
+        }
+
+    def restore_state(self, state: dict, now: float):
+        s = self.settings
+        for k, sensor_id in enumerate(state["ids"]):
+            if sensor_id in self.index:
+                continue
+            if len(self.index) >= s.max_sensors:
+                break
+            slot = self._allocate(sensor_id)
+            self.types[slot] = state["types"][k]
+            self._attach(slot, UUID(state["habitats"][k]) if state["habitats"][k] else None, state["dinosaurs"][k] or None)
+            self.battery[slot] = self.ref_battery[slot] = state["battery"][k]
+            self.drain[slot] = state["drain"][k]
+            self.ref_time[slot] = now
+            self.skew[slot] = 0.0
+            self.stale[slot] = state["stale"][k]
+            if self.stale[slot]:
+                self.last_seen[slot] = state["last_seen"][k]
+                self._schedule(slot, max(self.last_seen[slot] + s.forget_after, now + s.stale_after))
+            else:
+                self.last_seen[slot] = now
+                self._schedule(slot, now + s.stale_after)
+
+    def get_metrics(self) -> dict:
+        return {
+            "sensors_tracked": len(self.index),
+            "sensors_stale": int(self.stale.sum()),
+            "sensors_low_battery": int((self.battery < self.settings.battery_low).sum()),
+            "sensor_timers": len(self.wheel),
+            **self.stats,
+        }
@@ -1,71 +1,117 @@
 let chartInstance = null;
 let bpmChartInstance = null;
 
+// == HABITATS (versioned polling) ==
+// Keeps a local copy keyed by id and only asks for what changed since the
+// last seen park version; an unchanged park answers 304 with no body.
+
+const habitatState = { epoch: null, version: null, etag: null, byId: new Map() };
+
 async function fetchHabitats() {
     const container = document.getElementById('habitat-grid');
     if (!container) return; 
 
     try {
-        const response = await fetch('/api/habitats');
-        const habitats = await response.json();
-        
-        container.innerHTML = ''; 
-
-        habitats.forEach(habitat => {
-            const card = document.createElement('div');
-            card.className = 'habitat-card';
-            
-            card.onclick = () => window.location.href = `/habitat/${habitat.id}`;
-            
-            card.innerHTML = `
-                <button class="delete-btn" onclick="deleteHabitat('${habitat.id}', event)">✖</button>
-                <h3>${habitat.name}</h3>
-                <div class="card-stats">
-                    <p>🌡️ ${habitat.mean_temperature}°C</p>
-                    <p>🦖 ${habitat.dinosaur_ids.length} Dinos</p>
-                </div>
-                <div class="status-indicator status-active">● Monitoring Active</div>
-            `;
-            container.appendChild(card);
-        });
+        const url = habitatState.version === null
+            ? '/api/habitats?since_version=-1'
+            : `/api/habitats?since_version=${habitatState.version}`;
+        const headers = habitatState.etag ? { 'If-None-Match': habitatState.etag } : {};
+        const response = await fetch(url, { headers, cache: 'no-store' });
+        if (response.status === 304) return;
+
+        const delta = await response.json();
+        if (habitatState.epoch !== null && delta.epoch !== habitatState.epoch && !delta.reset) {
+            // Server restarted: versions are not comparable, start over
+            habitatState.version = null;
+            habitatState.etag = null;
+            return fetchHabitats();
+        }
+        if (delta.reset) habitatState.byId.clear();
+        delta.removed.forEach(id => habitatState.byId.delete(id));
+        delta.changed.forEach(habitat => habitatState.byId.set(habitat.id, habitat));
+        habitatState.epoch = delta.epoch;
+        habitatState.version = delta.version;
+        habitatState.etag = response.headers.get('ETag');
+
+        renderHabitats(container, [...habitatState.byId.values()]);
     } catch (error) {
         console.error('Error fetching habitats:', error);
     }
 }
 
-async function fetchAlertsTicker() {
-    const container = document.getElementById('alerts-container');
-    if (!container) return;
+function renderHabitats(container, habitats) {
+    container.innerHTML = ''; 
 
-    try {
-        const response = await fetch('/api/logs');
-        const data = await response.json();
+    habitats.forEach(habitat => {
+        const card = document.createElement('div');
+        card.className = 'habitat-card';
         
-        container.innerHTML = '';
+        card.onclick = () => window.location.href = `/habitat/${habitat.id}`;
         
-        const alerts = data.logs.filter(line => line.includes("ALERT!"));
+        card.innerHTML = `
+            <button class="delete-btn" onclick="deleteHabitat('${habitat.id}', event)">✖</button>
+            <h3>${habitat.name}</h3>
+            <div class="card-stats">
+                <p>🌡️ ${habitat.mean_temperature}°C</p>
+                <p>🦖 ${habitat.dinosaur_ids.length} Dinos</p>
+            </div>
+            <div class="status-indicator status-active">● Monitoring Active</div>
+        `;
+        container.appendChild(card);
+    });
+}
 
-        if (alerts.length === 0) {
-            container.innerHTML = '<div class="alert-item" style="background:#2ecc71; color:white"> System Normal. No active threats.</div>';
-            return;
-        }
+// == LIVE ALERTS (Server-Sent Events) ==
+
+const MAX_TICKER_ALERTS = 5;
+let recentAlerts = [];
+
+function renderAlertsTicker() {
+    const container = document.getElementById('alerts-container');
+    if (!container) return;
+
+    container.innerHTML = '';
+
+    if (recentAlerts.length === 0) {
+        container.innerHTML = '<div class="alert-item" style="background:#2ecc71; color:white"> System Normal. No active threats.</div>';
+        return;
+    }
+
+    recentAlerts.forEach(alert => {
+        const div = document.createElement('div');
+        div.className = 'alert-item';
+
+        if (alert.severity === "critical") div.classList.add('alert-critical');
+        else if (alert.severity === "high") div.classList.add('alert-high');
+        else div.classList.add('alert-low');
 
-        alerts.slice(-5).reverse().forEach(alert => {
-            const div = document.createElement('div');
-            div.className = 'alert-item';
-            
-            if (alert.includes("critical")) div.classList.add('alert-critical');
-            else if (alert.includes("high")) div.classList.add('alert-high');
-            else div.classList.add('alert-low');
-
-            div.textContent = alert.substring(20); 
-            container.appendChild(div);
-        });
-    } catch (e) { console.error(e); }
+        const time = new Date(alert.timestamp + 'Z').toLocaleTimeString();
+        div.textContent = `${time} [${alert.severity.toUpperCase()}]: ${alert.message}`;
+        container.appendChild(div);
+    });
+}
+
+function subscribeAlerts() {
+    if (!document.getElementById('alerts-container')) return;
+
+    renderAlertsTicker();
+    const source = new EventSource('/api/alerts/stream');
+
+    source.addEventListener('alert', event => {
+        recentAlerts.unshift(JSON.parse(event.data));
+        recentAlerts = recentAlerts.slice(0, MAX_TICKER_ALERTS);
+        renderAlertsTicker();
+    });
+    // EventSource reconnects on its own after network errors
+    source.onerror = e => console.error('Alert stream error:', e);
 }
 
 // == METRICS PAGE LOGIC ==
 
+const MAX_LOG_LINES = 50;
+let logCursor = null;
+let logLines = [];
+
 async function updateMetricsPage() {
     if (!window.isMetricsPage) return; 
 
@@ -77,21 +123,43 @@ async function updateMetricsPage() {
         document.getElementById('metric-total').innerText = data.total_processed;
         document.getElementById('metric-alerts').innerText = data.total_alerts;
         document.getElementById('metric-tps').innerText = data.current_throughput_tps;
+        renderLatencyTable(data);
 
-        const logResponse = await fetch('/api/logs');
+        const logResponse = await fetch(logCursor === null ? '/api/logs' : `/api/logs?since=${logCursor}`);
         const logData = await logResponse.json();
+        logCursor = logData.cursor;
+        logLines = logLines.concat(logData.logs).slice(-MAX_LOG_LINES);
+
         const logViewer = document.getElementById('full-log-viewer');
-        if (logViewer) {
-            logViewer.innerText = logData.logs.join('\n');
+        if (logViewer && logData.logs.length > 0) {
+            logViewer.innerText = logLines.join('\n');
             logViewer.scrollTop = logViewer.scrollHeight; 
         }
 
-        updateChart(data.current_throughput_tps);
-        updateBpmChart(data.avg_bpm);
+        await updateHistoryCharts();
 
     } catch (e) { console.error("Metrics error:", e); }
 }
 
+// Rows come from the *_p50_ms / *_p99_ms keys of /api/metrics
+function renderLatencyTable(data) {
+    const body = document.getElementById('latency-table-body');
+    if (!body) return;
+
+    const stages = Object.keys(data)
+        .filter(key => key.endsWith('_p50_ms'))
+        .map(key => key.slice(0, -'_p50_ms'.length));
+    if (stages.length === 0) return;
+
+    const format = value => value === null || value === undefined ? '-' : value.toFixed(2);
+    body.innerHTML = stages.map(stage => `
+        <tr>
+            <td>${stage.replace(/_/g, ' ')}</td>
+            <td>${format(data[stage + '_p50_ms'])}</td>
+            <td>${format(data[stage + '_p99_ms'])}</td>
+        </tr>`).join('');
+}
+
 function initChart() {
     const ctx = document.getElementById('throughputChart');
     if (!ctx) return;
@@ -119,18 +187,32 @@ function initChart() {
     });
 }
 
-function updateChart(tpsValue) {
-    if (!chartInstance) return;
-    const now = new Date().toLocaleTimeString();
-
-    chartInstance.data.labels.push(now);
-    chartInstance.data.datasets[0].data.push(tpsValue);
+// Both charts are drawn from /api/metrics/history, so they survive page
+// reloads and cover the range picked in the selector
+const HISTORY_POINTS = 120;
+
+async function updateHistoryCharts() {
+    if (!chartInstance && !bpmChartInstance) return;
+
+    const select = document.getElementById('history-range');
+    const span = select ? parseInt(select.value, 10) : 600;
+    const start = Date.now() / 1000 - span;
+    const response = await fetch(`/api/metrics/history?series=throughput,avg_bpm&start=${start}&points=${HISTORY_POINTS}`);
+    if (!response.ok) return;
+    const history = await response.json();
+
+    const label = t => span > 86400
+        ? new Date(t * 1000).toLocaleString([], {month: 'short', day: 'numeric', hour: '2-digit', minute: '2-digit'})
+        : new Date(t * 1000).toLocaleTimeString();
+    setChartSeries(chartInstance, history.series.throughput, label);
+    setChartSeries(bpmChartInstance, history.series.avg_bpm, label);
+}
 
-    if (chartInstance.data.labels.length > 20) {
-        chartInstance.data.labels.shift();
-        chartInstance.data.datasets[0].data.shift();
-    }
-    chartInstance.update();
+function setChartSeries(chart, points, label) {
+    if (!chart || !points) return;
+    chart.data.labels = points.map(([t]) => label(t));
+    chart.data.datasets[0].data = points.map(([, value]) => value);
+    chart.update();
 }
 
 function initBpmChart() {
@@ -167,22 +249,6 @@ function initBpmChart() {
     });
 }
 
-function updateBpmChart(bpmValue) {
-    if (!bpmChartInstance) return;
-
-    const now = new Date().toLocaleTimeString();
-
-    bpmChartInstance.data.labels.push(now);
-    bpmChartInstance.data.datasets[0].data.push(bpmValue);
-
-    if (bpmChartInstance.data.labels.length > 30) {
-        bpmChartInstance.data.labels.shift();
-        bpmChartInstance.data.datasets[0].data.shift();
-    }
-
-    bpmChartInstance.update();
-}
-
 // == MANAGEMENT OF MODALS AND FORMS ==
 
 function openModal(id) {
@@ -284,10 +350,9 @@ if (window.isMetricsPage) {
 
 setInterval(() => {
     fetchHabitats();     
-    fetchAlertsTicker(); 
     updateMetricsPage(); 
 }, 2000);
 
 fetchHabitats();
-fetchAlertsTicker();
+subscribeAlerts();
 updateMetricsPage();
\ No newline at end of file
@@ -0,0 +1,101 @@
+import sys
+import os
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.infrastructure import Park, Habitat, HabitatDimensions
+from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.events import TemperatureReading, MotionReading, HeartRateReading
+from app.services.rule_engine import RuleEngine
+
+# The compiled RuleEngine (default rules file) called once per reading vs
+# once per batch. Also checks that both raise exactly the same alerts.
+
+BATCH_SIZES = [10, 1_000, 10_000, 50_000]
+N_HABITATS = 50
+
+def build_park(n_habitats: int):
+    rng = random.Random(7)
+    park = Park(name="Bench Park")
+    dinos = {}
+    for i in range(n_habitats):
+        dino = Dinosaur(
+            name=f"Dino-{i}", species="Velociraptor", category=DinoCategory.TERRESTRIAL,
+            health_points=100, heart_rate=rng.randint(30, 120)
+        )
+        park.add_habitat(Habitat(
+            name=f"Habitat-{i}",
+            size=HabitatDimensions(x=100, y=100, z=rng.randint(10, 80)),
+            mean_temperature=rng.uniform(15, 30),
+            dinosaur_ids=[dino.id]
+        ))
+        dinos[str(dino.id)] = dino
+    return park, dinos
+
+def build_batch(park: Park, dinos: dict, count: int, seed: int = 42):
+    rng = random.Random(seed)
+    dino_list = list(dinos.values())
+    batch = []
+    for _ in range(count):
+        habitat = rng.choice(park.habitats)
+        kind = rng.random()
+        if kind < 0.33:
+            unit = rng.choice(["celsius", "fahrenheit"])
+            value = habitat.mean_temperature + rng.uniform(-8, 8)
+            if unit == "fahrenheit":
+                value = value * 9/5 + 32
+            batch.append(TemperatureReading(
+                id="temp-bench", habitat_id=habitat.id,
+                value=value, unit=unit
+            ))
+        elif kind < 0.66:
+            coords = rng.choice([
+                f"{rng.randint(-10, 110)},{rng.randint(-10, 110)},{rng.uniform(0, habitat.size.z + 5)}",
+                "A1-North", "1,2", None
+            ])
+            batch.append(MotionReading(
+                id="motion-bench", habitat_id=habitat.id,
+                is_detected=rng.random() < 0.5, sensitivity=rng.randint(1, 10), coordinates=coords
+            ))
+        else:
+            dino = rng.choice(dino_list)
+            batch.append(HeartRateReading(
+                id="bio-bench", habitat_id=habitat.id,
+                dinosaur_id=str(dino.id), bpm=max(1, int(rng.normalvariate(dino.heart_rate * 1.2, 20))),
+                stress_level=rng.choice(["Low", "High"])
+            ))
+    return batch
+
+def per_reading_evaluate(engine: RuleEngine, batch, park: Park, dinos: dict):
+    alerts = []
+    for i, reading in enumerate(batch):
+        alerts.extend((i, alert) for _, alert in engine.evaluate_batch([reading], park, dinos))
+    return alerts
+
+def signature(alerts):
+    return [(i, a.sensor_id, a.severity, a.message, a.triggered_value) for i, a in alerts]
+
+def run():
+    park, dinos = build_park(N_HABITATS)
+    engine = RuleEngine.from_file(park)
+    print(f"{'batch':>8} {'alerts':>8} {'single ms':>10} {'batch ms':>10} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        batch = build_batch(park, dinos, size)
+
+        start = time.perf_counter()
+        expected = per_reading_evaluate(engine, batch, park, dinos)
+        single_ms = (time.perf_counter() - start) * 1e3
+
+        start = time.perf_counter()
+        result = engine.evaluate_batch(batch, park, dinos)
+        batch_ms = (time.perf_counter() - start) * 1e3
+
+        if signature(expected) != signature(result):
+            raise SystemExit(f"MISMATCH at batch size {size}")
+
+        print(f"{size:>8} {len(result):>8} {single_ms:>10.2f} {batch_ms:>10.2f} {single_ms / batch_ms:>7.1f}x")
+
+if __name__ == "__main__":
+    run()
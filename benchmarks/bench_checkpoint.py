@@ -0,0 +1,47 @@
+import sys
+import os
+import logging
+import shutil
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.state import StateStore
+from app.services.checkpoint import Checkpointer
+from app.services.simulator import build_synthetic_park
+
+# Warm-restart cost across park sizes: writing a checkpoint (columnar
+# encode + fsync) and booting from it (mmap + decode + journal replay).
+# The 100k-dinosaur park should come back in about half a second.
+
+PARK_SIZES = [(100, 10), (1_000, 10), (10_000, 10)]
+
+def run():
+    logging.disable(logging.CRITICAL)
+    print(f"{'habitats':>10} {'dinos':>8} {'MB':>7} {'write ms':>10} {'load ms':>10}")
+    for habitats, per_habitat in PARK_SIZES:
+        directory = tempfile.mkdtemp(prefix="jurassic-checkpoint-")
+        try:
+            store = StateStore()
+            store.load(*build_synthetic_park(habitats, per_habitat, seed=42))
+            checkpointer = Checkpointer(directory)
+            snapshot = store.snapshot()
+
+            start = time.perf_counter()
+            checkpointer._write_checkpoint(snapshot, None)
+            written = time.perf_counter() - start
+            checkpointer.close()
+
+            start = time.perf_counter()
+            restored = Checkpointer(directory).load()
+            loaded = time.perf_counter() - start
+            assert len(restored.dinosaurs) == len(snapshot.dinosaurs)
+
+            size = os.path.getsize(checkpointer.snapshot_path) / 1e6
+            print(f"{habitats:>10} {len(snapshot.dinosaurs):>8} {size:>7.1f} {written * 1e3:>10.1f} {loaded * 1e3:>10.1f}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,57 @@
+import sys
+import os
+import time
+import tracemalloc
+from uuid import uuid4
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.sensors import TemperatureSensor, MotionSensor, HeartRateSensor
+from app.models.events import TemperatureReading, MotionReading, HeartRateReading
+
+# Pydantic sensor models vs the slotted readings in app/models/events.py:
+# construction throughput and retained memory per event.
+
+N = 100_000
+HABITAT_ID = uuid4()
+DINO_ID = str(uuid4())
+
+FACTORIES = {
+    "temperature": (
+        lambda: TemperatureSensor(id="temp-T-R", habitat_id=HABITAT_ID, sensor_type="temperature", value=27.5, unit="celsius"),
+        lambda: TemperatureReading(id="temp-T-R", habitat_id=HABITAT_ID, value=27.5, unit="celsius"),
+    ),
+    "motion": (
+        lambda: MotionSensor(id="motion-Rap", habitat_id=HABITAT_ID, sensor_type="motion", is_detected=True, sensitivity=7, coordinates="10,20,5"),
+        lambda: MotionReading(id="motion-Rap", habitat_id=HABITAT_ID, is_detected=True, sensitivity=7, coordinates="10,20,5"),
+    ),
+    "heart_rate": (
+        lambda: HeartRateSensor(id="bio-Rexy", habitat_id=uuid4(), sensor_type="heart_rate", dinosaur_id=DINO_ID, bpm=62, stress_level="Low"),
+        lambda: HeartRateReading(id="bio-Rexy", habitat_id=HABITAT_ID, dinosaur_id=DINO_ID, bpm=62, stress_level="Low"),
+    ),
+}
+
+def measure(factory):
+    start = time.perf_counter()
+    for _ in range(N):
+        factory()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = [factory() for _ in range(N)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+
+    return N / elapsed, (after - before) / N
+
+def run():
+    print(f"{'sensor':>12} {'model':>9} {'events/s':>12} {'bytes/event':>12}")
+    for sensor_type, (pydantic_factory, compact_factory) in FACTORIES.items():
+        for label, factory in (("pydantic", pydantic_factory), ("compact", compact_factory)):
+            rate, size = measure(factory)
+            print(f"{sensor_type:>12} {label:>9} {rate:>12,.0f} {size:>12.0f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,46 @@
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.event_store import EventStore
+from bench_batch_evaluation import build_park, build_batch
+
+# Sustained insert rate of EventStore (SQLite WAL, batched executemany on a
+# writer thread) and latency of indexed time-range / per-sensor queries.
+
+BATCHES = 100
+BATCH_SIZE = 5_000
+
+def run():
+    park, dinos = build_park(50)
+    batches = [build_batch(park, dinos, BATCH_SIZE, seed=i) for i in range(10)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events.db"))
+
+        start = time.perf_counter()
+        for i in range(BATCHES):
+            store.append(batches[i % len(batches)], [])
+        store.close()
+        elapsed = time.perf_counter() - start
+        total = BATCHES * BATCH_SIZE
+        print(f"insert: {total:,} readings in {elapsed:.2f}s -> {total / elapsed:,.0f} readings/s "
+              f"(dropped batches: {store.stats['batches_dropped']})")
+
+        habitat = park.habitats[0]
+        t = time.perf_counter()
+        rows = store.query_readings(0, time.time() + 1, habitat_id=habitat.id, limit=1000)
+        print(f"habitat query: {len(rows)} rows in {(time.perf_counter() - t) * 1e3:.1f} ms")
+
+        t = time.perf_counter()
+        rows = store.query_readings(0, time.time() + 1, sensor_id="bio-bench", limit=1000)
+        print(f"sensor query: {len(rows)} rows in {(time.perf_counter() - t) * 1e3:.1f} ms")
+
+        size = os.path.getsize(os.path.join(tmp, "events.db"))
+        print(f"db size: {size / 1e6:.1f} MB ({size / total:.0f} bytes/reading)")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,70 @@
+import sys
+import os
+import logging
+import random
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.infrastructure import Park, Habitat, HabitatDimensions
+from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.events import TemperatureReading, MotionReading
+from app.services.stream_manager import JurassicStreamManager
+
+# Per-event cost of the manager's rule evaluation across park sizes. With
+# the Park registry the habitat lookup is a dict hit, so the numbers should
+# stay flat from 3 to 10k habitats.
+
+PARK_SIZES = [3, 100, 1_000, 10_000]
+EVENTS = 20_000
+
+def build_park(n_habitats: int):
+    park = Park(name=f"Bench Park ({n_habitats})")
+    dinos = []
+    for i in range(n_habitats):
+        dino = Dinosaur(
+            name=f"Dino-{i}", species="T-Rex", category=DinoCategory.TERRESTRIAL,
+            health_points=100, heart_rate=60
+        )
+        park.add_habitat(Habitat(
+            name=f"Habitat-{i}",
+            size=HabitatDimensions(x=100, y=100, z=20),
+            mean_temperature=25.0,
+            dinosaur_ids=[dino.id]
+        ))
+        dinos.append(dino)
+    return park, dinos
+
+def build_events(park: Park, count: int):
+    rng = random.Random(42)
+    events = []
+    for _ in range(count):
+        habitat = rng.choice(park.habitats)
+        if rng.random() < 0.5:
+            events.append(TemperatureReading(
+                id="temp-bench", habitat_id=habitat.id,
+                value=habitat.mean_temperature + rng.uniform(-2, 2)
+            ))
+        else:
+            events.append(MotionReading(
+                id="motion-bench", habitat_id=habitat.id,
+                is_detected=True, sensitivity=rng.randint(1, 8), coordinates="10,10,5"
+            ))
+    return events
+
+def run():
+    logging.disable(logging.CRITICAL)
+    print(f"{'habitats':>10} {'events':>8} {'us/event':>10}")
+    for size in PARK_SIZES:
+        park, dinos = build_park(size)
+        manager = JurassicStreamManager(park, dinos)
+        events = build_events(park, EVENTS)
+
+        start = time.perf_counter()
+        manager.rules.evaluate_batch(events, manager.park, manager.dinos_map)
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>10} {EVENTS:>8} {elapsed / EVENTS * 1e6:>10.2f}")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,57 @@
+import sys
+import os
+import logging
+import random
+import statistics
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.services.stream_manager import JurassicStreamManager
+from bench_batch_evaluation import build_park, build_batch
+
+# Event-loop blocking time of JurassicStreamManager._process_batch with
+# logging disabled, with synchronous handlers and with the queued writer.
+# Every batch logs one INFO line plus one CRITICAL line per alert. The loop
+# idles briefly between batches, as it does while awaiting the next one.
+
+BATCHES = 2_000
+BATCH_SIZE = 100
+IDLE_BETWEEN_BATCHES = 0.002
+
+def measure(manager, batches) -> list:
+    timings = []
+    for batch in batches:
+        start = time.perf_counter()
+        manager._process_batch(batch)
+        timings.append((time.perf_counter() - start) * 1e6)
+        time.sleep(IDLE_BETWEEN_BATCHES)
+    return timings
+
+def run():
+    park, dinos = build_park(50)
+    rng = random.Random(1)
+    batches = [build_batch(park, dinos, BATCH_SIZE, seed=rng.random()) for _ in range(BATCHES)]
+    manager = JurassicStreamManager(park, list(dinos.values()))
+
+    real_stdout = sys.stdout
+    print(f"{'mode':>8} {'p50 us':>9} {'p99 us':>9} {'max us':>9} {'total ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for mode in ("off", "sync", "async"):
+            sys.stdout = devnull
+            setup_logging(async_mode=(mode == "async"), log_file=os.path.join(tmp, f"{mode}.log"))
+            logging.disable(logging.CRITICAL if mode == "off" else logging.NOTSET)
+
+            timings = measure(manager, batches)
+            shutdown_logging()
+            sys.stdout = real_stdout
+
+            q = statistics.quantiles(timings, n=100)
+            print(f"{mode:>8} {q[49]:>9.1f} {q[98]:>9.1f} {max(timings):>9.1f} {sum(timings) / 1e3:>9.1f}")
+
+    logging.disable(logging.NOTSET)
+
+if __name__ == "__main__":
+    run()
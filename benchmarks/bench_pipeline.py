@@ -0,0 +1,204 @@
+import sys
+import os
+import argparse
+import asyncio
+import contextlib
+import json
+import subprocess
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.logging_config import setup_logging, shutdown_logging
+from app.core.state import state_store
+from app.api.routes import router
+from app.services.ingest_buffer import IngestBuffer, IngestSettings, OverflowPolicy
+from app.services.simulator import SensorSimulator, build_synthetic_park
+from app.services.stream_manager import JurassicStreamManager
+
+# End-to-end benchmark of ingest -> IngestBuffer -> evaluate_batch -> alert
+# bus, run in-process against the real manager. One JSON line per scenario
+# (park size x event rate) so runs can be diffed across commits:
+#
+#   python benchmarks/bench_pipeline.py --output before.jsonl
+#   python benchmarks/bench_pipeline.py --output after.jsonl --compare before.jsonl
+#
+# rate 0 saturates the pipeline (BLOCK policy) to find its maximum throughput.
+# Readings are stamped when enqueued, so latency covers queue wait + batching
+# + evaluation up to the alert being published.
+
+FEED_TICK = 0.01
+API_INTERVAL = 0.05
+INFLIGHT_SAMPLE = 50_000
+
+def percentile(values, q):
+    return round(float(np.percentile(values, q)) * 1e3, 3) if values else None
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+# == FEEDER ==
+
+def feed(manager, simulator, rate, duration, sent, stop):
+    deadline = time.perf_counter() + duration
+    next_tick = time.perf_counter()
+    per_tick = max(1, int(rate * FEED_TICK)) if rate > 0 else 1_000
+    carry = 0.0
+    while not stop.is_set() and time.perf_counter() < deadline:
+        if rate > 0:
+            carry += rate * FEED_TICK
+            size = int(carry)
+            carry -= size
+        else:
+            size = per_tick
+        manager.on_sensor_batch(simulator.generate_batch(size))
+        sent[0] += size
+        if rate > 0:
+            next_tick += FEED_TICK
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+# == SCENARIO ==
+
+async def run_scenario(habitats, rate, duration, seed):
+    park, dinos = build_synthetic_park(habitats, 2, seed=seed)
+    simulator = SensorSimulator(park, dinos, seed=seed, sensors_per_habitat=4)
+    policy = OverflowPolicy.BLOCK if rate == 0 else OverflowPolicy.DROP_LOWEST_PRIORITY
+    manager = JurassicStreamManager(park, dinos, IngestSettings(overflow_policy=policy))
+
+    latencies = []
+    publish = manager._publish_alerts
+
+    def timed_publish(batch, alerts):
+        now = time.time()
+        latencies.extend(now - batch[pos].timestamp for pos, _ in alerts)
+        publish(batch, alerts)
+
+    manager._publish_alerts = timed_publish
+    manager.initialize()
+    state_store.load(park, dinos)
+    state_store.manager, state_store.simulator, state_store.event_store = manager, simulator, None
+
+    app = FastAPI()
+    app.include_router(router)
+    api = {"/api/metrics": [], "/api/habitats": []}
+
+    sent, stop = [0], threading.Event()
+    feeder = threading.Thread(target=feed, args=(manager, simulator, rate, duration, sent, stop), daemon=True)
+    start = time.perf_counter()
+    feeder.start()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        while feeder.is_alive():
+            for path, samples in api.items():
+                t = time.perf_counter()
+                await client.get(path)
+                samples.append(time.perf_counter() - t)
+            await asyncio.sleep(API_INTERVAL)
+
+    # Let the queue drain before reading the counters
+    while manager.buffer.depth and time.perf_counter() - start < duration * 3:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    manager.shutdown()
+
+    metrics = manager.get_system_metrics()
+    return {
+        "habitats": habitats,
+        "rate_target": rate,
+        "duration_s": round(elapsed, 3),
+        "events_sent": sent[0],
+        "events_processed": metrics["total_processed"],
+        "events_per_sec": round(metrics["total_processed"] / elapsed, 1),
+        "dropped_events": metrics["dropped_events"],
+        "max_queue_depth": metrics["max_depth"],
+        "alerts": metrics["total_alerts"],
+        "alert_latency_p50_ms": percentile(latencies, 50),
+        "alert_latency_p99_ms": percentile(latencies, 99),
+        "alert_latency_max_ms": percentile(latencies, 100),
+        "api_metrics_p50_ms": percentile(api["/api/metrics"], 50),
+        "api_metrics_p99_ms": percentile(api["/api/metrics"], 99),
+        "api_habitats_p50_ms": percentile(api["/api/habitats"], 50),
+        "api_habitats_p99_ms": percentile(api["/api/habitats"], 99),
+    }
+
+# Retained bytes per queued event: the reading object plus its buffer slot
+def inflight_bytes(habitats, seed):
+    park, dinos = build_synthetic_park(habitats, 2, seed=seed)
+    simulator = SensorSimulator(park, dinos, seed=seed)
+    buffer = IngestBuffer(IngestSettings(capacity=INFLIGHT_SAMPLE * 2))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for reading in simulator.generate_batch(INFLIGHT_SAMPLE):
+        buffer.put(reading)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return round(retained / INFLIGHT_SAMPLE, 1)
+
+# == REPORT ==
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["habitats"], r["rate_target"]): r for r in map(json.loads, f) if r.get("habitats")}
+    for r in results:
+        old = baseline.get((r["habitats"], r["rate_target"]))
+        if not old:
+            continue
+        for key in ("events_per_sec", "alert_latency_p99_ms", "api_metrics_p99_ms", "bytes_per_inflight_event"):
+            if old.get(key) and r.get(key) is not None:
+                change = (r[key] - old[key]) / old[key] * 100
+                print(f"  {r['habitats']:>5} habitats @ {r['rate_target']:>6}/s  {key:<26} "
+                      f"{old[key]:>10} -> {r[key]:>10} ({change:+.1f}%)", file=sys.stderr)
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--habitats", default="10,100,1000")
+    parser.add_argument("--rates", default="1000,10000,0")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    parser.add_argument("--compare")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp()
+    with contextlib.redirect_stdout(sys.stderr):
+        setup_logging(async_mode=True, log_file=os.path.join(log_dir, "bench.log"), console=False)
+
+    commit = git_commit()
+    results = []
+    for habitats in map(int, args.habitats.split(",")):
+        per_event = inflight_bytes(habitats, args.seed)
+        for rate in map(int, args.rates.split(",")):
+            result = asyncio.run(run_scenario(habitats, rate, args.duration, args.seed))
+            result.update(commit=commit, bytes_per_inflight_event=per_event)
+            results.append(result)
+            print(f"{habitats:>5} habitats @ {rate or 'max':>6}/s: {result['events_per_sec']:>10,.0f} ev/s, "
+                  f"alert p50/p99 {result['alert_latency_p50_ms']}/{result['alert_latency_p99_ms']} ms, "
+                  f"api p99 {result['api_metrics_p99_ms']} ms, dropped {result['dropped_events']}", file=sys.stderr)
+
+    shutdown_logging()
+    lines = "".join(json.dumps(r) + "\n" for r in results)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(lines)
+    else:
+        sys.stdout.write(lines)
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    run()
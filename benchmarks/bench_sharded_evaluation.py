@@ -0,0 +1,51 @@
+import sys
+import os
+import logging
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rule_engine import RuleEngine
+from app.services.sharded_evaluator import ShardedEvaluator
+from bench_batch_evaluation import build_park, build_batch, signature
+
+# Throughput of in-loop RuleEngine.evaluate_batch vs ShardedEvaluator
+# with 1..N worker processes. Scaling is bounded by os.cpu_count().
+
+BATCH_SIZE = 50_000
+ROUNDS = 5
+N_HABITATS = 1_000
+
+def throughput(evaluate, batches) -> float:
+    start = time.perf_counter()
+    for batch in batches:
+        evaluate(batch)
+    return sum(len(b) for b in batches) / (time.perf_counter() - start)
+
+def run():
+    logging.disable(logging.CRITICAL)
+    park, dinos = build_park(N_HABITATS)
+    batches = [build_batch(park, dinos, BATCH_SIZE, seed=i) for i in range(ROUNDS)]
+    engine = RuleEngine.from_file(park)
+    expected = signature(engine.evaluate_batch(batches[0], park, dinos))
+
+    cores = os.cpu_count() or 1
+    print(f"cpu_count={cores}")
+    print(f"{'workers':>8} {'events/s':>12} {'scaling':>8}")
+
+    baseline = throughput(lambda b: engine.evaluate_batch(b, park, dinos), batches)
+    print(f"{'in-loop':>8} {baseline:>12,.0f} {1.0:>7.2f}x")
+
+    worker_counts = sorted({1, 2, 4, cores})
+    for workers in worker_counts:
+        sharded = ShardedEvaluator(park, list(dinos.values()), workers)
+        try:
+            if signature(sharded.evaluate_sync(batches[0])) != expected:
+                raise SystemExit(f"MISMATCH with {workers} workers")
+            rate = throughput(sharded.evaluate_sync, batches)
+        finally:
+            sharded.shutdown()
+        print(f"{workers:>8} {rate:>12,.0f} {rate / baseline:>7.2f}x")
+
+if __name__ == "__main__":
+    run()
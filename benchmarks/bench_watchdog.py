@@ -0,0 +1,61 @@
+import sys
+import os
+import logging
+import time
+import uuid
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.events import TemperatureReading
+from app.models.infrastructure import Park
+from app.services.watchdog import SensorWatchdog, WatchdogSettings
+
+# Sensor watchdog cost as the number of sensors grows: the batch path
+# (observe) and the timing wheel tick (expire) should stay flat, since
+# neither scans the sensor table. Every sensor reports once per
+# stale_after, so each tick pushes back 1/stale_after of the deadlines.
+
+SENSOR_COUNTS = [10_000, 100_000, 1_000_000]
+BATCH_SIZE = 1667
+TICKS = 300
+
+def run():
+    logging.disable(logging.CRITICAL)
+    settings = WatchdogSettings()
+    park = Park(name="Bench")
+    habitat = uuid.uuid4()
+    rng = np.random.default_rng(42)
+    print(f"{'sensors':>10} {'observe ms':>11} {'tick ms':>9} {'tick max':>9} {'page ms':>8}")
+    for count in SENSOR_COUNTS:
+        start_time = 1_000_000.0
+        watchdog = SensorWatchdog(settings, now=start_time)
+        ids = [f"temp-{i}" for i in range(count)]
+        # Spread first sightings over one stale_after period
+        for k in range(0, count, 5000):
+            now = start_time + k / count * settings.stale_after
+            watchdog.observe([TemperatureReading(i, habitat, 20.0, timestamp=now) for i in ids[k:k + 5000]], now)
+
+        batches = [[TemperatureReading(ids[j], habitat, 20.0) for j in rng.integers(0, count, BATCH_SIZE)]
+                   for _ in range(20)]
+        observe, ticks = [], []
+        for tick in range(TICKS):
+            now = start_time + settings.stale_after + tick
+            started = time.perf_counter()
+            watchdog.observe(batches[tick % len(batches)], now)
+            observe.append(time.perf_counter() - started)
+            # Everyone else reported just before this tick
+            watchdog.last_seen[:count] = now - 1
+            started = time.perf_counter()
+            watchdog.expire(now, park, {})
+            ticks.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        watchdog.list_sensors(now, limit=100)
+        page = time.perf_counter() - started
+        print(f"{count:>10} {np.mean(observe) * 1e3:>11.2f} {np.mean(ticks) * 1e3:>9.2f} "
+              f"{np.max(ticks) * 1e3:>9.1f} {page * 1e3:>8.1f}")
+
+if __name__ == "__main__":
+    run()
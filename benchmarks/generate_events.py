@@ -0,0 +1,46 @@
+import sys
+import os
+import argparse
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.simulator import SensorSimulator, build_synthetic_park
+from app.services.ingestion import encode_ndjson
+
+# Writes a reproducible NDJSON event file for replay mode
+# (JURASSIC_SIM_MODE=replay). Same seed + habitats -> byte-identical file.
+# Timestamps advance at --rate events/s from --start.
+
+TICK = 0.1
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("output")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=5_000)
+    parser.add_argument("--habitats", type=int, default=50)
+    parser.add_argument("--dinos-per-habitat", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", type=float, default=1_700_000_000.0)
+    args = parser.parse_args()
+
+    park, dinos = build_synthetic_park(args.habitats, args.dinos_per_habitat, seed=args.seed)
+    simulator = SensorSimulator(park, dinos, seed=args.seed, sensors_per_habitat=4)
+
+    per_tick = max(1, int(args.rate * TICK))
+    written = 0
+    now = args.start
+    t = time.perf_counter()
+    with open(args.output, "wb") as f:
+        while written < args.events:
+            batch = simulator.generate_batch(min(per_tick, args.events - written), now=now)
+            f.write(encode_ndjson(batch))
+            written += len(batch)
+            now += TICK
+
+    elapsed = time.perf_counter() - t
+    print(f"wrote {written:,} events ({now - args.start:.1f}s of traffic) to {args.output} in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,98 @@
+import sys
+import os
+import argparse
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Local load generator for POST /api/ingest.
+# Start the server first (python app/main.py), then:
+#   python benchmarks/load_ingest.py --seconds 10 --batch 1000 --workers 4
+
+def fetch_habitats(url):
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80)
+    conn.request("GET", "/api/habitats")
+    habitats = json.loads(conn.getresponse().read())
+    conn.close()
+    return habitats
+
+def build_body(habitats, batch_size: int, seed: int, fmt: str) -> tuple[bytes, str]:
+    rng = random.Random(seed)
+    events = []
+    for _ in range(batch_size):
+        habitat = rng.choice(habitats)
+        if rng.random() < 0.5:
+            events.append({
+                "id": f"temp-{habitat['name'][:3]}", "habitat_id": habitat["id"],
+                "sensor_type": "temperature", "value": habitat["mean_temperature"] + rng.uniform(-2, 2)
+            })
+        else:
+            events.append({
+                "id": f"motion-{habitat['name'][:3]}", "habitat_id": habitat["id"],
+                "sensor_type": "motion", "is_detected": rng.random() < 0.5,
+                "sensitivity": rng.randint(1, 8), "coordinates": "10,10,2"
+            })
+
+    if fmt == "msgpack":
+        import msgpack
+        return msgpack.packb(events), "application/msgpack"
+    return "\n".join(json.dumps(e) for e in events).encode("utf-8"), "application/x-ndjson"
+
+def worker(url, body, content_type, deadline, totals, lock):
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80)
+    accepted = rejected = 0
+    while time.perf_counter() < deadline:
+        conn.request("POST", "/api/ingest", body=body, headers={"Content-Type": content_type})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        if response.status == 202:
+            accepted += payload["accepted"]
+        elif response.status == 429:
+            rejected += 1
+            time.sleep(0.05)
+        else:
+            raise SystemExit(f"Unexpected status {response.status}: {payload}")
+    conn.close()
+    with lock:
+        totals["accepted"] += accepted
+        totals["rejected_requests"] += rejected
+
+def run():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--format", choices=["ndjson", "msgpack"], default="ndjson")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    habitats = fetch_habitats(url)
+    totals = {"accepted": 0, "rejected_requests": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    threads = []
+    for i in range(args.workers):
+        body, content_type = build_body(habitats, args.batch, i, args.format)
+        t = threading.Thread(target=worker, args=(url, body, content_type, deadline, totals, lock))
+        t.start()
+        threads.append(t)
+    for t in threads:
+        t.join()
+
+    print(json.dumps({
+        "format": args.format,
+        "batch": args.batch,
+        "workers": args.workers,
+        "events_per_sec": round(totals["accepted"] / args.seconds),
+        "rejected_requests": totals["rejected_requests"],
+    }))
+
+if __name__ == "__main__":
+    run()
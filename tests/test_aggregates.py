@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.aggregates import SWEEP_INTERVAL, WindowedAggregator
+
+def test_window_statistics():
+    aggregator = WindowedAggregator(value_range=(0.0, 100.0))
+    aggregator.update(["a"] * 4 + ["b"], [10.0, 20.0, 30.0, 40.0, 50.0], now=1000.0)
+
+    stats = aggregator.snapshot("a", now=1010.0)
+    assert stats["1m"]["count"] == 4
+    assert stats["1m"]["mean"] == 25.0
+    assert (stats["1m"]["min"], stats["1m"]["max"]) == (10.0, 40.0)
+    assert stats["1m"]["variance"] == pytest.approx(125.0)
+    # Older than one minute: only the longer windows still hold it
+    stats = aggregator.snapshot("a", now=1100.0)
+    assert stats["1m"]["count"] == 0 and stats["5m"]["count"] == 4
+    assert aggregator.snapshot("missing") is None
+
+def test_idle_entities_are_evicted_and_their_slots_reused():
+    aggregator = WindowedAggregator(value_range=(0.0, 100.0))
+    aggregator.update(["a", "b"], [10.0, 20.0], now=0.0)
+    aggregator.update(["a"], [30.0], now=3000.0)
+    slot_b = aggregator.slots["b"]
+
+    # b has been silent for longer than the 1h window
+    aggregator.update(["c"], [40.0], now=3700.0)
+    assert set(aggregator.slots) == {"a", "c"}
+    assert aggregator.slots["c"] == slot_b
+    assert aggregator.snapshot("b", now=3700.0) is None
+    assert aggregator.snapshot("c", now=3700.0)["1h"]["count"] == 1
+    assert aggregator.snapshot("a", now=3700.0)["1h"]["count"] == 1
+
+def test_one_off_ids_do_not_grow_the_aggregator():
+    aggregator = WindowedAggregator(value_range=(0.0, 100.0))
+    now = 0.0
+    for n in range(5):
+        aggregator.update([f"stray-{n}-{i}" for i in range(1000)], [1.0] * 1000, now=now)
+        now += 3600.0 + SWEEP_INTERVAL
+    assert len(aggregator.slots) == 1000
+    assert aggregator.capacity == 1024
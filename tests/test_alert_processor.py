@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import TemperatureReading
+from app.models.infrastructure import Habitat, HabitatDimensions, Park
+from app.services import alert_processor
+from app.services.alert_processor import AlertProcessingSettings, AlertProcessor
+
+LOW, MEDIUM, HIGH, CRITICAL = AlertSeverity.LOW, AlertSeverity.MEDIUM, AlertSeverity.HIGH, AlertSeverity.CRITICAL
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    def set_time(seconds):
+        now[0] = seconds
+    monkeypatch.setattr(alert_processor, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return set_time
+
+@pytest.fixture
+def park():
+    park = Park(name="Test")
+    park.add_habitat(Habitat(name="Paddock", size=HabitatDimensions(x=10, y=10, z=5), mean_temperature=20.0))
+    return park
+
+def processor(park, **settings):
+    settings.setdefault("rate_limits", {})
+    return AlertProcessor(park, AlertProcessingSettings(**settings))
+
+def alert(sensor_id, rule="overheating", severity=MEDIUM, habitat_id=None):
+    return Alert(sensor_id=sensor_id, habitat_id=habitat_id, severity=severity, message=rule,
+                 triggered_value=1, rule=rule)
+
+def reading(sensor_id):
+    return TemperatureReading(sensor_id, None, 20.0)
+
+# One reading per entry: an Alert for a reading that fired, a sensor id for an in-range one
+def run(processor, *entries):
+    batch = [reading(e if isinstance(e, str) else e.sensor_id) for e in entries]
+    fired = [(i, e) for i, e in enumerate(entries) if not isinstance(e, str)]
+    return [(i, a.rule, a.severity) for i, a in processor.process(batch, fired)]
+
+def test_dedup_until_escalation_or_window(clock, park):
+    p = processor(park, dedup_window=60.0)
+    clock(0.0)
+    assert run(p, alert("t1")) == [(0, "overheating", MEDIUM)]
+    clock(1.0)
+    assert run(p, alert("t1"), alert("t2")) == [(1, "overheating", MEDIUM)]
+    assert p.stats["alerts_suppressed_dedup"] == 1
+    # Escalation is notified right away, the same level again is not
+    clock(2.0)
+    assert run(p, alert("t1", severity=HIGH), alert("t1", severity=HIGH)) == [(0, "overheating", HIGH)]
+    clock(61.0)
+    assert run(p, alert("t1", severity=HIGH)) == []
+    clock(62.5)
+    assert run(p, alert("t1", severity=HIGH)) == [(0, "overheating", HIGH)]
+    # Another rule of the same sensor is tracked on its own
+    assert run(p, alert("t1", rule="freezing")) == [(0, "freezing", MEDIUM)]
+
+def test_alert_clears_after_enough_in_range_readings(clock, park):
+    p = processor(park, dedup_window=60.0, clear_after=3)
+    clock(0.0)
+    assert run(p, alert("t1"), "t1", "t1") == [(0, "overheating", MEDIUM)]
+    # A re-trigger restarts the count
+    assert run(p, alert("t1"), "t1", "t1") == []
+    assert p.stats["alerts_cleared"] == 0
+    assert len(p.states) == 1
+
+    assert run(p, "t1", alert("t1")) == [(1, "overheating", MEDIUM)]
+    assert p.stats["alerts_cleared"] == 1
+
+    run(p, "t1", "t1", "t1", "t2")
+    assert p.stats["alerts_cleared"] == 2
+    assert len(p.states) == 0
+
+def test_rate_limits_per_severity(clock, park):
+    p = processor(park, rate_limits={LOW: 2.0, CRITICAL: 0.0})
+    clock(0.0)
+    assert run(p, *(alert(f"t{i}", severity=LOW) for i in range(4))) == [
+        (0, "overheating", LOW), (1, "overheating", LOW)
+    ]
+    assert p.stats["alerts_rate_limited"] == 2
+    # No limit on critical
+    assert len(run(p, *(alert(f"c{i}", severity=CRITICAL) for i in range(10)))) == 10
+
+    # Half a second refills one token; a limited sensor was never notified, so it is not deduped
+    clock(0.5)
+    assert run(p, alert("t2", severity=LOW), alert("t3", severity=LOW)) == [(0, "overheating", LOW)]
+    clock(1.5)
+    assert run(p, alert("t3", severity=LOW)) == [(0, "overheating", LOW)]
+
+def test_motion_and_heart_rate_alerts_become_one_incident(clock, park):
+    p = processor(park, correlation_window=10.0)
+    habitat_id = park.habitats[0].id
+    other = uuid4()
+
+    clock(0.0)
+    [(_, breach)] = p.process([reading("m1")], [(0, alert("m1", "perimeter_breach", CRITICAL, habitat_id))])
+    assert breach.incident_id is not None
+
+    clock(5.0)
+    [(_, incident)] = p.process([reading("h1")], [(0, alert("h1", "stress", HIGH, habitat_id))])
+    assert (incident.rule, incident.severity, incident.incident_id) == ("correlated_incident", CRITICAL, breach.incident_id)
+    assert "Paddock" in incident.message
+    assert p.stats["incidents_opened"] == 1
+
+    # Further alerts of the open incident are folded into it; other habitats are not
+    clock(12.0)
+    assert run(p, alert("m2", "perimeter_breach", CRITICAL, habitat_id), alert("h2", "stress", HIGH, other)) == [
+        (1, "stress", HIGH)
+    ]
+    assert p.stats["alerts_correlated"] == 2
+
+    # correlation_window after its last alert, the incident is closed
+    clock(22.5)
+    [(_, fresh)] = p.process([reading("h3")], [(0, alert("h3", "stress", HIGH, habitat_id))])
+    assert fresh.rule == "stress" and fresh.incident_id != breach.incident_id
@@ -0,0 +1,44 @@
+from uuid import uuid4
+
+from app.models.events import HeartRateReading, TemperatureReading
+from app.services.anomaly import SPIKE, AnomalyDetector, AnomalySettings
+from app.services.simulator import build_synthetic_park
+
+def columns(batch):
+    temperature, heart_rate = ([], [], []), ([], [], [])
+    for i, reading in enumerate(batch):
+        if reading.sensor_type == "temperature":
+            target, key, value = temperature, reading.habitat_id, reading.value
+        else:
+            target, key, value = heart_rate, reading.dinosaur_id, reading.bpm
+        target[0].append(i)
+        target[1].append(key)
+        target[2].append(value)
+    return temperature, heart_rate
+
+def test_baselines_only_for_entities_of_the_park():
+    park, dinos = build_synthetic_park(1, 1, seed=11)
+    dinos_map = {str(d.id): d for d in dinos}
+    habitat_id, dino_id = park.habitats[0].id, str(dinos[0].id)
+    detector = AnomalyDetector(AnomalySettings(warmup=5))
+
+    for step in range(20):
+        batch = [
+            TemperatureReading("stray-t", uuid4(), 20.0),
+            TemperatureReading("t", habitat_id, 20.0 + 0.1 * (step % 3)),
+            HeartRateReading("stray-h", None, f"ghost-{step}", 80),
+            HeartRateReading("h", habitat_id, dino_id, 80 + step % 3),
+        ]
+        assert detector.observe(batch, *columns(batch), park, dinos_map) == []
+    assert list(detector.temperature.slots) == [habitat_id]
+    assert list(detector.heart_rate.slots) == [dino_id]
+
+    # Firings still point at the right readings once strays are filtered out
+    batch = [
+        HeartRateReading("stray-h", None, "ghost", 400),
+        TemperatureReading("stray-t", uuid4(), 90.0),
+        TemperatureReading("t", habitat_id, 45.0),
+    ]
+    fired = detector.observe(batch, *columns(batch), park, dinos_map)
+    assert [(position, series, kind) for position, series, kind, *_ in fired] == [(2, "temperature", SPIKE)]
+    assert len(detector.temperature) == len(detector.heart_rate) == 1
@@ -0,0 +1,26 @@
+import uuid
+
+from app.models.dinosaur import Dinosaur, DinoCategory
+from app.models.infrastructure import Habitat, HabitatDimensions
+from app.services.checkpoint import decode_park, encode_park, read_snapshot, write_snapshot
+from app.services.simulator import build_synthetic_park
+
+def test_park_round_trips_through_snapshot(tmp_path):
+    park, dinos = build_synthetic_park(20, 3, seed=7)
+    dinos.append(Dinosaur(name="Blue", species="Velociraptor", category=DinoCategory.AERIAL,
+                          health_points=42, heart_rate=90))
+    # A member with no registered dinosaur survives the round trip too
+    stray = uuid.uuid4()
+    park.add_habitat(Habitat(name="Paddock ñ", size=HabitatDimensions(x=10.5, y=20, z=3),
+                             mean_temperature=-1.5, dinosaur_ids=[dinos[-1].id, stray]))
+    registry = {str(d.id): d for d in dinos}
+
+    path = str(tmp_path / "park.snapshot")
+    write_snapshot(path, {"park": encode_park(park, registry)})
+    restored, restored_registry = decode_park(read_snapshot(path)["park"])
+
+    assert restored.model_dump() == park.model_dump()
+    assert {k: d.model_dump() for k, d in restored_registry.items()} == {k: d.model_dump() for k, d in registry.items()}
+    assert all(type(d.id) is uuid.UUID and type(d.category) is DinoCategory for d in restored_registry.values())
+    assert restored.get_dinosaur_habitat(stray).name == "Paddock ñ"
+    assert restored.get_habitat(str(park.habitats[0].id)) is restored.habitats[0]
@@ -0,0 +1,141 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.models.events import TemperatureReading
+from app.services.cluster import ClusterCoordinator, HashRing, merge_metrics
+from app.services.ingest_buffer import IngestSettings
+from app.services.ingestion import IngestUnavailableError
+from app.services.rule_engine import RuleEngine
+from app.services.simulator import build_synthetic_park
+
+CAPACITY = 5
+
+# == HASH RING ==
+
+KEYS = [uuid4() for _ in range(500)]
+
+def owners(ring):
+    return {key: ring.owner(key) for key in KEYS}
+
+def test_ring_empty_has_no_owner():
+    assert HashRing().owner(KEYS[0]) is None
+
+def test_ring_spreads_keys_over_every_node():
+    placed = owners(HashRing(["a", "b", "c"]))
+    assert set(placed.values()) == {"a", "b", "c"}
+    # Placement depends only on the members, not on the order they joined
+    assert owners(HashRing(["c", "a", "b"])) == placed
+
+def test_ring_join_and_leave_only_move_the_keys_of_that_node():
+    ring = HashRing(["a", "b", "c"])
+    before = owners(ring)
+
+    ring.add("d")
+    joined = owners(ring)
+    moved = {key for key in KEYS if joined[key] != before[key]}
+    assert moved and all(joined[key] == "d" for key in moved)
+
+    ring.remove("d")
+    assert owners(ring) == before
+
+    ring.remove("b")
+    left = owners(ring)
+    assert all(left[key] == before[key] for key in KEYS if before[key] != "b")
+    assert "b" not in left.values()
+
+# == METRICS MERGING ==
+
+def test_merge_metrics_averages_only_partitions_with_samples():
+    merged = merge_metrics([
+        {"total_processed": 10, "avg_bpm": 80.0, "queue_wait_p99_ms": 2.0},
+        {"total_processed": 5, "avg_bpm": 60.0, "queue_wait_p99_ms": 7.5},
+        {"total_processed": 0, "avg_bpm": None, "queue_wait_p99_ms": None},
+    ])
+    assert merged == {"total_processed": 15, "avg_bpm": 70.0, "queue_wait_p99_ms": 7.5}
+
+# == COORDINATOR ==
+
+@pytest.fixture
+def cluster():
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    park, dinos = build_synthetic_park(12, 1, seed=5)
+    coordinator = ClusterCoordinator(park, dinos, 2, IngestSettings(capacity=CAPACITY),
+                                     rules=RuleEngine(park, definitions=[]))
+    coordinator.initialize()
+    yield coordinator
+    coordinator.shutdown()
+    loop.run_until_complete(asyncio.sleep(0))
+    loop.close()
+    asyncio.set_event_loop(None)
+
+def habitat_of(cluster, name):
+    return next(habitat_id for habitat_id, owner in cluster.owners.items() if owner == name)
+
+def readings(habitat_id, count):
+    return [TemperatureReading(f"t-{habitat_id}-{i}", habitat_id, 20.0) for i in range(count)]
+
+def test_refused_reservation_releases_the_other_partitions_credits(cluster):
+    a, b = sorted(cluster.partitions)
+    in_a, in_b = habitat_of(cluster, a), habitat_of(cluster, b)
+
+    # b reserves its share first, then a cannot fit its own
+    assert not cluster.try_ingest(readings(in_b, 2) + readings(in_a, CAPACITY + 1))
+    assert cluster._rejected.total == CAPACITY + 3
+    assert cluster._routed.total == 0
+    assert cluster.partitions[b].credits == CAPACITY
+
+    # Nothing of the refused request is left reserved on b: a full share fits
+    assert cluster.try_ingest(readings(in_b, CAPACITY))
+    assert cluster._routed.total == CAPACITY
+
+def test_request_spanning_partitions_is_committed_on_each(cluster):
+    a, b = sorted(cluster.partitions)
+    assert cluster.try_ingest(readings(habitat_of(cluster, a), 2) + readings(habitat_of(cluster, b), 3))
+    assert cluster._routed.total == 5
+    assert cluster._rejected.total == 0
+
+def test_unroutable_readings_are_not_accepted(cluster):
+    with pytest.raises(IngestUnavailableError) as error:
+        cluster.try_ingest(readings(uuid4(), 3))
+    assert error.value.accepted == 0
+    assert cluster._unroutable.total == 3
+    assert cluster.try_ingest([])
+
+def test_commit_failure_is_reported(cluster, monkeypatch):
+    a, b = sorted(cluster.partitions)
+    offer = ClusterCoordinator._offer
+
+    def failing_commit(partition, command, payload):
+        if command == "commit" and partition.name == a:
+            return False
+        return offer(partition, command, payload)
+    monkeypatch.setattr(cluster, "_offer", failing_commit)
+
+    with pytest.raises(IngestUnavailableError) as error:
+        cluster.try_ingest(readings(habitat_of(cluster, b), 2) + readings(habitat_of(cluster, a), 3))
+    assert error.value.accepted == 2
+    assert cluster._routed.total == 2
+    assert cluster._unroutable.total == 3
+    # Its reservation was given back
+    assert cluster.partitions[a].credits == CAPACITY
+
+def test_workers_joining_and_leaving_move_only_their_habitats(cluster):
+    before = dict(cluster.owners)
+
+    name = cluster.add_worker()
+    joined = dict(cluster.owners)
+    moved = [habitat_id for habitat_id in before if joined[habitat_id] != before[habitat_id]]
+    assert all(joined[habitat_id] == name for habitat_id in moved)
+    assert cluster.stats["habitats_moved"] == len(moved)
+    assert joined == {habitat.id: cluster.ring.owner(habitat.id) for habitat in cluster.park.habitats}
+
+    # The new partition serves its habitats right away
+    if moved:
+        assert cluster.try_ingest(readings(moved[0], CAPACITY))
+
+    cluster.remove_worker(name)
+    assert cluster.owners == before
+    assert name not in cluster.partitions
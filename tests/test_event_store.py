@@ -0,0 +1,108 @@
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.models.alert import Alert, AlertSeverity
+from app.models.events import HeartRateReading, MotionReading, TemperatureReading
+from app.services.event_store import EventStore
+
+START = 1_000_000.0
+END = START + 100
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"))
+    yield store
+    if store._thread.is_alive():
+        store.close()
+
+def alert(sensor_id, habitat_id, seconds):
+    timestamp = datetime.fromtimestamp(START + seconds, tz=timezone.utc)
+    return Alert(timestamp=timestamp, sensor_id=sensor_id, habitat_id=habitat_id, severity=AlertSeverity.HIGH,
+                 message=f"{sensor_id} alert", triggered_value=30.5)
+
+def test_appended_batches_round_trip_through_the_filters(store):
+    paddock, aviary = uuid4(), uuid4()
+    batch = [
+        TemperatureReading("t1", paddock, 21.5, timestamp=START + 1, battery_level=80.0),
+        MotionReading("m1", aviary, True, 7, "1,2,3", timestamp=START + 2),
+        HeartRateReading("h1", paddock, "rex", 90, stress_level="Low", timestamp=START + 3),
+        TemperatureReading("t1", paddock, 22.0, timestamp=START + 4),
+    ]
+    store.append(batch, [(0, alert("t1", paddock, 1))])
+    store.append([], [(None, alert("m1", aviary, 2)), (None, alert("x", None, 3))])
+    store.close()
+
+    readings = store.query_readings(START, END)
+    assert [(r["sensor_id"], r["timestamp"]) for r in readings] == [
+        ("t1", START + 1), ("m1", START + 2), ("h1", START + 3), ("t1", START + 4)
+    ]
+    assert readings[0] == {"timestamp": START + 1, "sensor_id": "t1", "sensor_type": "temperature",
+                           "habitat_id": str(paddock), "value": 21.5, "unit": "celsius", "battery_level": 80.0}
+    assert readings[1]["is_detected"] is True and readings[1]["coordinates"] == "1,2,3"
+    assert readings[2]["dinosaur_id"] == "rex" and readings[2]["stress_level"] == "Low"
+
+    assert [r["sensor_id"] for r in store.query_readings(START, END, habitat_id=paddock)] == ["t1", "h1", "t1"]
+    assert [r["value"] for r in store.query_readings(START, END, habitat_id=paddock, sensor_id="t1")] == [21.5, 22.0]
+    assert [r["sensor_id"] for r in store.query_readings(START, END, sensor_type="motion")] == ["m1"]
+    assert store.query_readings(START, END, habitat_id=aviary, sensor_id="t1") == []
+    # The end of the range is exclusive
+    assert len(store.query_readings(START + 2, START + 4)) == 2
+    assert len(store.query_readings(START, END, limit=1)) == 1
+
+    alerts = store.query_alerts(START, END)
+    assert [(a["sensor_id"], a.get("habitat_id")) for a in alerts] == [
+        ("t1", str(paddock)), ("m1", str(aviary)), ("x", None)
+    ]
+    assert alerts[0]["severity"] == "high" and alerts[0]["triggered_value"] == "30.5"
+    assert [a["sensor_id"] for a in store.query_alerts(START, END, habitat_id=aviary)] == ["m1"]
+    assert [a["sensor_id"] for a in store.query_alerts(START, END, sensor_id="t1", severity="high")] == ["t1"]
+    assert store.query_alerts(START, END, severity="critical") == []
+    assert store.stats["readings_written"] == 4 and store.stats["alerts_written"] == 3
+
+def test_full_queue_drops_are_counted_and_logged_once(tmp_path, caplog):
+    store = EventStore(str(tmp_path / "events.db"), max_pending_batches=1)
+    writing, gate = threading.Event(), threading.Event()
+    write = store._write
+    store._write = lambda conn, items: (writing.set(), gate.wait(5), write(conn, items))
+    habitat = uuid4()
+
+    def batch(sensor_id):
+        return [TemperatureReading(sensor_id, habitat, 20.0, timestamp=START)]
+
+    # Wait for the writer to hold the first batch, then fill the queue
+    store.append(batch("a"), [])
+    assert writing.wait(5)
+    with caplog.at_level(logging.WARNING, logger="JurassicReactor"):
+        for sensor_id in "bcd":
+            store.append(batch(sensor_id), [])
+    gate.set()
+    store.close()
+
+    assert store.stats["batches_dropped"] == 2
+    metrics = store.get_metrics()
+    assert metrics["store_batches_dropped"] == 2
+    assert metrics["store_batches_dropped_rate"] > 0
+    assert [r.levelno for r in caplog.records] == [logging.WARNING]
+    assert "1 batches dropped so far" in caplog.text
+    assert [r["sensor_id"] for r in store.query_readings(START, END)] == ["a", "b"]
+
+def test_failed_writes_count_the_lost_rows(store, caplog):
+    conn = sqlite3.connect(store.path)
+    conn.execute("DROP TABLE alerts")
+    conn.close()
+
+    with caplog.at_level(logging.ERROR, logger="JurassicReactor"):
+        store.append([TemperatureReading("t1", None, 20.0, timestamp=START)], [(0, alert("t1", None, 0))])
+        store.close()
+
+    assert store.stats["write_failures"] == 1
+    assert store.get_metrics()["store_rows_lost"] == 2
+    assert "1 readings and 1 alerts lost" in caplog.text
+    # The transaction was rolled back as a whole
+    assert store.query_readings(START, END) == []
+    assert store.stats["readings_written"] == 0
@@ -0,0 +1,75 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import routes
+from app.core.state import StateStore
+from app.models import infrastructure
+from app.models.infrastructure import Habitat, HabitatDimensions, Park
+
+def habitat(name):
+    return Habitat(name=name, size=HabitatDimensions(x=10, y=10, z=5), mean_temperature=20.0)
+
+@pytest.fixture
+def store(monkeypatch):
+    park = Park(name="Test")
+    for name in ("Paddock", "Aviary"):
+        park.add_habitat(habitat(name))
+    store = StateStore()
+    store.load(park, [])
+    monkeypatch.setattr(routes, "state_store", store)
+    return store
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+def test_matching_etag_gets_304(store, client):
+    response = client.get("/api/habitats")
+    assert response.status_code == 200
+    assert [h["name"] for h in response.json()] == ["Paddock", "Aviary"]
+    etag = response.headers["ETag"]
+
+    for header in (etag, f"W/{etag}", f'"stale", {etag}'):
+        cached = client.get("/api/habitats", headers={"If-None-Match": header})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == etag
+
+    store.add_habitat(habitat("Lagoon"))
+    response = client.get("/api/habitats", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 3
+
+def test_since_version_falls_back_to_full_resync_below_tombstone_floor(store, client, monkeypatch):
+    monkeypatch.setattr(infrastructure, "MAX_TOMBSTONES", 2)
+    start = int(client.get("/api/habitats").headers["X-Park-Version"])
+
+    lagoon = habitat("Lagoon")
+    store.add_habitat(lagoon)
+    delta = client.get("/api/habitats", params={"since_version": start}).json()
+    assert delta["reset"] is False
+    assert [h["name"] for h in delta["changed"]] == ["Lagoon"]
+    assert delta["removed"] == []
+
+    # Three removals with room for two tombstones: the oldest one is dropped
+    removed = []
+    for _ in range(3):
+        removed.append(store.park.habitats[0].id)
+        store.remove_habitat(removed[-1])
+    floor = store.park._delta_floor
+    assert floor > start
+
+    delta = client.get("/api/habitats", params={"since_version": floor}).json()
+    assert delta["reset"] is False
+    assert delta["removed"] == [str(h) for h in removed[1:]]
+
+    for since in (start, floor - 1, store.park.version + 1):
+        delta = client.get("/api/habitats", params={"since_version": since}).json()
+        assert delta["reset"] is True
+        assert delta["removed"] == []
+        assert [h["name"] for h in delta["changed"]] == [h.name for h in store.park.habitats]
+        assert delta["version"] == store.park.version
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import router
+from app.core.state import state_store
+from app.services.ingest_buffer import IngestSettings
+from app.services.simulator import build_synthetic_park
+from app.services.stream_manager import JurassicStreamManager
+
+@pytest.fixture
+def manager(monkeypatch):
+    park, dinos = build_synthetic_park(2, 1, seed=3)
+    # Not initialized: nothing drains the buffer unless the test does
+    manager = JurassicStreamManager(park, dinos, IngestSettings(capacity=5))
+    monkeypatch.setattr(state_store, "manager", manager)
+    return manager
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def ndjson(count, habitat_id):
+    return "\n".join(
+        json.dumps({"sensor_type": "temperature", "id": f"t-{i}", "habitat_id": habitat_id, "value": 20.0})
+        for i in range(count)
+    )
+
+def post(client, body):
+    return client.post("/api/ingest", content=body, headers={"content-type": "application/x-ndjson"})
+
+def test_ingest_returns_429_with_retry_after_when_credits_run_out(manager, client):
+    habitat_id = str(manager.park.habitats[0].id)
+
+    response = post(client, ndjson(3, habitat_id))
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 3, "credits": 2}
+
+    # More than the credits left: refused as a whole, nothing queued
+    response = post(client, ndjson(3, habitat_id))
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert response.json()["credits"] == 2
+    assert manager.buffer.depth == 3
+    assert manager._rejected.total == 3
+
+    response = post(client, ndjson(2, habitat_id))
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2, "credits": 0}
+    assert post(client, ndjson(1, habitat_id)).status_code == 429
+    assert manager._rejected.total == 4
+
+    # Draining the buffer hands the credits back
+    lane, batch = manager.buffer.take_batch()
+    assert len(batch) == 5
+    assert manager.available_credits() == 5
+    response = post(client, ndjson(5, habitat_id))
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 5, "credits": 0}
@@ -0,0 +1,179 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.models.events import HeartRateReading, MotionReading, TemperatureReading
+from app.services import ingest_buffer
+from app.services.ingest_buffer import BULK, CRITICAL, NORMAL, IngestBuffer, IngestSettings, LanePolicy, OverflowPolicy
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Arrival times the test controls, so "oldest" never depends on timer resolution
+    now = [0.0]
+    def tick(seconds=0.001):
+        now[0] += seconds
+    monkeypatch.setattr(ingest_buffer, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return tick
+
+def bulk(name):
+    return TemperatureReading(name, None, 20.0)
+
+def normal(name):
+    return HeartRateReading(name, None, "dino", 80)
+
+def critical(name):
+    return MotionReading(name, None, True)
+
+def fill(buffer, clock, *readings):
+    for reading in readings:
+        assert buffer.put(reading)
+        clock()
+
+def queued(buffer, lane):
+    return [reading.id for _, reading in buffer._lanes[lane].queue]
+
+def test_classify_lanes():
+    assert ingest_buffer.classify(bulk("t")) == BULK
+    assert ingest_buffer.classify(normal("h")) == NORMAL
+    assert ingest_buffer.classify(MotionReading("m", None, False)) == NORMAL
+    assert ingest_buffer.classify(critical("m")) == CRITICAL
+    assert ingest_buffer.classify(HeartRateReading("h", None, "dino", 0)) == CRITICAL
+    assert ingest_buffer.classify(HeartRateReading("h", None, "dino", 80, "High")) == CRITICAL
+
+def test_drop_oldest_evicts_oldest_reading_of_any_lane(clock):
+    buffer = IngestBuffer(IngestSettings(capacity=3, overflow_policy=OverflowPolicy.DROP_OLDEST))
+    fill(buffer, clock, critical("c1"), bulk("b1"), normal("n1"))
+
+    fill(buffer, clock, bulk("b2"))
+    assert queued(buffer, CRITICAL) == []
+    assert queued(buffer, BULK) == ["b1", "b2"]
+
+    fill(buffer, clock, critical("c2"))
+    assert queued(buffer, BULK) == ["b2"]
+    assert buffer.depth == 3
+    assert buffer.stats["dropped_oldest"] == 2
+    assert buffer.stats["dropped_low_priority"] == 0
+
+def test_drop_lowest_priority(clock):
+    buffer = IngestBuffer(IngestSettings(capacity=3, overflow_policy=OverflowPolicy.DROP_LOWEST_PRIORITY))
+    fill(buffer, clock, bulk("b1"), normal("n1"), normal("n2"))
+
+    # A higher lane pushes out the lowest one
+    fill(buffer, clock, critical("c1"))
+    assert queued(buffer, BULK) == []
+    assert buffer.stats["dropped_low_priority"] == 1
+
+    # Below everything queued: the newcomer is refused
+    assert not buffer.put(bulk("b2"))
+    assert buffer.stats["dropped_low_priority"] == 2
+    assert queued(buffer, BULK) == []
+
+    # Same lane as the lowest queued: its own oldest reading goes, counted as such
+    fill(buffer, clock, normal("n3"))
+    assert queued(buffer, NORMAL) == ["n2", "n3"]
+    assert queued(buffer, CRITICAL) == ["c1"]
+    assert buffer.stats["dropped_low_priority"] == 2
+    assert buffer.stats["dropped_oldest"] == 1
+    assert buffer.depth == 3
+    assert buffer.get_metrics()["dropped_events"] == 3
+
+def test_block_refuses_without_waiting_when_it_cannot_block():
+    buffer = IngestBuffer(IngestSettings(capacity=1, overflow_policy=OverflowPolicy.BLOCK))
+    assert buffer.put(bulk("b1"))
+    assert not buffer.put(bulk("b2"), can_block=False)
+    assert buffer.stats["blocked_puts"] == 1
+    assert buffer.stats["dropped_blocked"] == 1
+    assert queued(buffer, BULK) == ["b1"]
+
+def test_block_waits_for_the_consumer():
+    buffer = IngestBuffer(IngestSettings(capacity=1, overflow_policy=OverflowPolicy.BLOCK, block_timeout=5.0))
+    assert buffer.put(bulk("b1"))
+
+    results = []
+    producer = threading.Thread(target=lambda: results.append(buffer.put(bulk("b2"))))
+    producer.start()
+    deadline = time.monotonic() + 5.0
+    while buffer.stats["blocked_puts"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    lane, batch = buffer.take_batch()
+    assert (lane, [reading.id for reading in batch]) == (BULK, ["b1"])
+    producer.join(timeout=5.0)
+    assert results == [True]
+    assert queued(buffer, BULK) == ["b2"]
+    assert buffer.stats["dropped_blocked"] == 0
+
+def test_block_times_out():
+    buffer = IngestBuffer(IngestSettings(capacity=1, overflow_policy=OverflowPolicy.BLOCK, block_timeout=0.01))
+    assert buffer.put(bulk("b1"))
+    assert not buffer.put(bulk("b2"))
+    assert buffer.stats["dropped_blocked"] == 1
+
+def test_critical_lane_preempts_queued_readings(clock):
+    buffer = IngestBuffer()
+    fill(buffer, clock, bulk("b1"), normal("n1"), critical("c1"))
+
+    lane, batch = buffer.take_batch()
+    assert lane == CRITICAL
+    assert [reading.id for reading in batch] == ["c1"]
+    assert buffer.take_batch()[0] == NORMAL
+    assert buffer.take_batch()[0] == BULK
+    assert buffer.take_batch() == (None, [])
+
+def test_critical_stream_does_not_starve_other_lanes(clock):
+    buffer = IngestBuffer()
+    fill(buffer, clock, bulk("b1"), normal("n1"))
+
+    served = []
+    for i in range(4):
+        # A new critical reading arrives before every batch
+        fill(buffer, clock, critical(f"c{i}"))
+        served.append(buffer.take_batch()[0])
+    assert served == [CRITICAL, NORMAL, CRITICAL, BULK]
+    assert queued(buffer, CRITICAL) == ["c3"]
+
+    # Alone, critical batches may follow each other
+    assert buffer.take_batch()[0] == CRITICAL
+
+def test_batch_size_capped_by_critical_latency_target(clock):
+    buffer = IngestBuffer(IngestSettings(
+        critical_latency_target=0.05,
+        critical=LanePolicy(max_batch_size=10_000, max_batch_latency=0.0),
+    ))
+    # 0.1 ms per reading: 0.05 s worth is 500 readings
+    buffer.record_processing(100, 0.01)
+    assert buffer.cost_per_reading == pytest.approx(1e-4)
+
+    fill(buffer, clock, *(bulk(f"b{i}") for i in range(1_200)))
+    fill(buffer, clock, *(critical(f"c{i}") for i in range(600)))
+
+    lane, batch = buffer.take_batch()
+    assert (lane, len(batch)) == (CRITICAL, 600)
+    lane, batch = buffer.take_batch()
+    assert (lane, len(batch)) == (BULK, 500)
+    assert buffer.lane_depth(BULK) == 700
+
+def test_batch_size_cap_never_goes_below_min_batch_size(clock):
+    buffer = IngestBuffer(IngestSettings(normal=LanePolicy(min_batch_size=20)))
+    # So slow that not even one reading fits the latency target
+    buffer.record_processing(1, 1.0)
+    fill(buffer, clock, *(normal(f"n{i}") for i in range(50)))
+
+    lane, batch = buffer.take_batch()
+    assert (lane, len(batch)) == (NORMAL, 20)
+
+def test_put_batch_is_all_or_nothing():
+    buffer = IngestBuffer(IngestSettings(capacity=5))
+    assert buffer.put(bulk("b1"))
+
+    # 1 queued + 2 reserved elsewhere leaves room for 2
+    assert not buffer.put_batch([normal("n1"), normal("n2"), critical("c1")], reserved=2)
+    assert buffer.depth == 1
+    assert buffer.stats["max_depth"] == 1
+
+    assert buffer.put_batch([normal("n1"), critical("c1")], reserved=2)
+    assert queued(buffer, NORMAL) == ["n1"]
+    assert queued(buffer, CRITICAL) == ["c1"]
+    assert buffer.free_slots() == 2
@@ -0,0 +1,132 @@
+import json
+
+import pytest
+
+from app.models.alert import AlertSeverity
+from app.models.dinosaur import DinoCategory, Dinosaur
+from app.models.events import HeartRateReading, TemperatureReading
+from app.models.infrastructure import Habitat, HabitatDimensions, Park
+from app.services.rule_engine import RuleEngine, RuleLoadError, parse_rules
+
+RULES = [
+    {"name": "overheating", "sensor_type": "temperature",
+     "when": [{"field": "value_c", "op": ">", "ref": "habitat.mean_temperature", "offset": 5.0}],
+     "severity": "medium", "message": "Hot in {habitat.name}: {value_c:.1f}C", "triggered": "value_c"},
+    # Replaces the global rule of the same name in the aviary
+    {"name": "overheating", "sensor_type": "temperature", "habitats": ["Aviary"],
+     "when": [{"field": "value_c", "op": ">", "ref": "habitat.mean_temperature", "scale": 2.0}],
+     "severity": "high", "message": "Aviary too hot: {value_c:.1f}C", "triggered": "value_c"},
+    {"name": "stress", "sensor_type": "heart_rate",
+     "when": [{"field": "bpm", "op": ">", "ref": "dinosaur.heart_rate", "scale": 1.5}],
+     "escalate": [{"when": [{"field": "stress_level", "value": "High"}], "severity": "critical"}],
+     "severity": "high", "message": "{dinosaur.name} stressed: {bpm}", "triggered": "bpm"},
+    {"name": "vital_signs_lost", "sensor_type": "heart_rate", "priority": 10,
+     "when": [{"field": "bpm", "value": 0}],
+     "severity": "critical", "message": "VITAL SIGNS LOST: {dinosaur.name}", "triggered": "bpm"},
+]
+
+def make_park(*names):
+    park = Park(name="Test")
+    for name in names:
+        park.add_habitat(Habitat(name=name, size=HabitatDimensions(x=100, y=100, z=10), mean_temperature=20.0))
+    return park
+
+@pytest.fixture
+def park():
+    return make_park("Paddock", "Aviary")
+
+@pytest.fixture
+def rex():
+    return Dinosaur(name="Rex", species="T-Rex", category=DinoCategory.TERRESTRIAL, heart_rate=100)
+
+def evaluate(engine, park, batch, dinos=()):
+    alerts = engine.evaluate_batch(batch, park, {str(d.id): d for d in dinos})
+    return [(i, alert.rule, alert.severity) for i, alert in alerts]
+
+def habitat(park, name):
+    return next(h.id for h in park.habitats if h.name == name)
+
+def test_dispatch_uses_scoped_rules_per_habitat(park):
+    engine = RuleEngine(park, definitions=parse_rules({"rules": RULES}))
+    paddock, aviary = habitat(park, "Paddock"), habitat(park, "Aviary")
+    batch = [
+        TemperatureReading("t1", paddock, 26.0),
+        TemperatureReading("t2", aviary, 26.0),
+        TemperatureReading("t3", aviary, 41.0),
+        TemperatureReading("t4", paddock, 80.0, unit="fahrenheit"),
+        TemperatureReading("t5", paddock, 24.0),
+    ]
+    assert evaluate(engine, park, batch) == [
+        (0, "overheating", AlertSeverity.MEDIUM),
+        (2, "overheating", AlertSeverity.HIGH),
+        (3, "overheating", AlertSeverity.MEDIUM),
+    ]
+    alert = engine.evaluate_batch(batch[:1], park, {})[0][1]
+    assert alert.message == "Hot in Paddock: 26.0C"
+    assert alert.triggered_value == 26.0
+
+def test_ref_scale_and_escalation(park, rex):
+    engine = RuleEngine(park, definitions=parse_rules({"rules": RULES}))
+    paddock, dino = habitat(park, "Paddock"), str(rex.id)
+    batch = [
+        HeartRateReading("h1", paddock, dino, 150),
+        HeartRateReading("h2", paddock, dino, 151),
+        HeartRateReading("h3", paddock, dino, 151, stress_level="High"),
+        HeartRateReading("h4", paddock, dino, 0, stress_level="High"),
+        HeartRateReading("h5", paddock, "unknown", 300),
+    ]
+    assert evaluate(engine, park, batch, [rex]) == [
+        (1, "stress", AlertSeverity.HIGH),
+        (2, "stress", AlertSeverity.CRITICAL),
+        (3, "vital_signs_lost", AlertSeverity.CRITICAL),
+    ]
+
+def test_rows_without_the_referenced_context_never_match(park, rex):
+    rules = parse_rules({"rules": [
+        {"name": "odd", "sensor_type": "temperature", "when": [{"field": "dinosaur.heart_rate", "op": "!=", "value": 0}],
+         "severity": "low", "message": "odd", "triggered": "value"},
+        {"name": "homeless", "sensor_type": "heart_rate",
+         "when": [{"field": "bpm", "op": ">", "ref": "habitat.mean_temperature"}],
+         "severity": "low", "message": "homeless", "triggered": "bpm"},
+    ]})
+    engine = RuleEngine(park, definitions=rules)
+    batch = [
+        TemperatureReading("t1", habitat(park, "Paddock"), 30.0),
+        HeartRateReading("h1", None, str(rex.id), 90),
+        HeartRateReading("h2", habitat(park, "Paddock"), str(rex.id), 90),
+    ]
+    assert evaluate(engine, park, batch, [rex]) == [(2, "homeless", AlertSeverity.LOW)]
+
+def test_rebind_keeps_compiled_rules_and_resolves_new_habitats():
+    park = make_park("Paddock")
+    engine = RuleEngine(park, definitions=parse_rules({"rules": RULES}))
+    compiled = engine.compiled
+    aviary_rule = [rule for rule in compiled.rules if rule.definition.habitats][0]
+
+    park = make_park("Paddock", "Aviary")
+    engine.rebind(park)
+    assert engine.compiled is not compiled
+    assert engine.compiled.rules == compiled.rules
+    assert engine.version == compiled.version
+    assert aviary_rule in engine.compiled.rules_for(aviary_rule.definition.sensor_type, habitat(park, "Aviary"))
+    batch = [TemperatureReading("t", habitat(park, "Aviary"), 41.0)]
+    assert evaluate(engine, park, batch) == [(0, "overheating", AlertSeverity.HIGH)]
+
+def test_reload_swaps_rules_and_keeps_them_on_errors(tmp_path, park):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": RULES[:1]}))
+    engine = RuleEngine.from_file(park, str(path))
+    batch = [TemperatureReading("t", habitat(park, "Aviary"), 30.0)]
+    assert evaluate(engine, park, batch) == [(0, "overheating", AlertSeverity.MEDIUM)]
+
+    path.write_text(json.dumps({"rules": RULES[:2]}))
+    engine.reload()
+    assert engine.version == 1
+    assert evaluate(engine, park, batch) == []
+
+    path.write_text("{not json")
+    with pytest.raises(RuleLoadError):
+        engine.reload()
+    assert engine.version == 1
+    assert len(engine.definitions) == 2
+    assert not engine.changed_on_disk()
@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.models.events import format_position, pack_position, parse_coordinates
+from app.services.spatial_index import nearest_perimeter, zone_labels
+
+# 100 m (x, West -> East) by 200 m (y, South -> North) habitat
+EXTENTS = (100.0, 200.0, 10.0)
+
+def nearest(points, extents=EXTENTS):
+    xyz = np.array([[x, y, 0.0] for x, y in points])
+    walls, zones, distance = nearest_perimeter(xyz, np.tile(extents, (len(points), 1)))
+    return zone_labels(walls, zones), distance.tolist()
+
+@pytest.mark.parametrize("point, zone, distance", [
+    # Beyond each side
+    ((-30, 150), "West-2", 30),
+    ((130, 50), "East-1", 30),
+    ((50, -40), "South-1", 40),
+    ((50, 300), "North-1", 100),
+    # Beyond each corner: distance to the corner post
+    ((-30, -40), "West-1", 50),
+    ((130, -40), "East-1", 50),
+    ((-30, 240), "West-2", 50),
+    ((130, 240), "East-2", 50),
+    # Inside, nearest wall wins
+    ((10, 50), "West-1", 10),
+    ((60, 195), "North-1", 5),
+])
+def test_nearest_perimeter_measures_to_wall_segments(point, zone, distance):
+    zones, distances = nearest([point])
+    assert zones == [zone]
+    assert distances[0] == pytest.approx(distance)
+
+def test_nearest_perimeter_far_side_of_square_habitat():
+    zones, distances = nearest([(450, 100)], extents=(300.0, 300.0, 10.0))
+    assert zones == ["East-2"]
+    assert distances[0] == pytest.approx(150)
+
+def test_nearest_perimeter_unknown_position():
+    zones, distances = nearest([(math.nan, math.nan)])
+    assert zones == [None]
+    assert math.isnan(distances[0])
+
+def test_format_position_round_trips():
+    position = pack_position(1234567.25, 0.1, 50.0)
+    text = format_position(position)
+    assert text == "1234567.25,0.1,50"
+    assert parse_coordinates(text) == position
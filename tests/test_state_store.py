@@ -0,0 +1,80 @@
+from app.core.state import DINOSAUR_ADDED, HABITAT_ADDED, HABITAT_REMOVED, RESET, StateStore
+from app.models.dinosaur import DinoCategory, Dinosaur
+from app.models.infrastructure import Habitat, HabitatDimensions, Park
+
+def habitat(name):
+    return Habitat(name=name, size=HabitatDimensions(x=10, y=10, z=5), mean_temperature=20.0)
+
+def make_store():
+    park = Park(name="Test")
+    park.add_habitat(habitat("Paddock"))
+    park.add_habitat(habitat("Aviary"))
+    store = StateStore()
+    store.load(park, [])
+    return store
+
+def test_crud_publishes_new_snapshot_and_leaves_old_ones_alone():
+    store = make_store()
+    changes = []
+    store.subscribe(lambda snapshot, change: changes.append((snapshot, change.kind, change.version, change.habitat_ids)))
+
+    before = store.snapshot()
+    paddock, aviary = before.park.habitats
+    names = [h.name for h in before.park.habitats]
+
+    lagoon = habitat("Lagoon")
+    after = store.add_habitat(lagoon)
+    assert store.snapshot() is after
+    assert after.version == before.version + 1
+    assert [h.name for h in after.park.habitats] == names + ["Lagoon"]
+    # The old snapshot is untouched
+    assert [h.name for h in before.park.habitats] == names
+    assert before.park.get_habitat(lagoon.id) is None
+
+    rex = Dinosaur(name="Rex", species="T-Rex", category=DinoCategory.TERRESTRIAL, heart_rate=100)
+    store.add_dinosaur(rex, paddock.id)
+    latest = store.snapshot()
+    assert latest.park.get_habitat(paddock.id).dinosaur_ids == [rex.id]
+    assert str(rex.id) in latest.dinosaurs
+    # Only the touched habitat is copied; readers of `after` still see it empty
+    assert after.park.get_habitat(paddock.id).dinosaur_ids == []
+    assert str(rex.id) not in after.dinosaurs
+    assert latest.park.get_habitat(aviary.id) is after.park.get_habitat(aviary.id)
+
+    assert store.remove_habitat(aviary.id)
+    assert store.snapshot().park.get_habitat(aviary.id) is None
+    assert latest.park.get_habitat(aviary.id) is not None
+
+    assert [(kind, version, ids) for _, kind, version, ids in changes] == [
+        (HABITAT_ADDED, 2, (lagoon.id,)),
+        (DINOSAUR_ADDED, 3, (paddock.id,)),
+        (HABITAT_REMOVED, 4, (aviary.id,)),
+    ]
+    # Each subscriber call got the snapshot it describes
+    assert [snapshot.version for snapshot, *_ in changes] == [2, 3, 4]
+
+def test_subscribers_fan_out_in_order_and_survive_a_failing_one():
+    store = make_store()
+    seen = []
+
+    def broken(snapshot, change):
+        raise RuntimeError("boom")
+
+    store.subscribe(lambda snapshot, change: seen.append(("first", change.version)))
+    store.subscribe(broken)
+    unsubscribe = store.subscribe(lambda snapshot, change: seen.append(("last", change.version)))
+
+    store.add_habitat(habitat("Lagoon"))
+    unsubscribe()
+    store.add_habitat(habitat("Marsh"))
+    assert seen == [("first", 2), ("last", 2), ("first", 3)]
+
+def test_load_resets_everything():
+    store = make_store()
+    seen = []
+    store.subscribe(lambda snapshot, change: seen.append((change.kind, len(change.habitat_ids))))
+    park = Park(name="Other")
+    park.add_habitat(habitat("Only"))
+    snapshot = store.load(park, [])
+    assert snapshot.park is park
+    assert seen == [(RESET, 1)]
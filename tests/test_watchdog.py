@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from app.models.events import HeartRateReading, TemperatureReading
+from app.models.infrastructure import Park
+from app.services.watchdog import BATTERY_LOW, SensorWatchdog, WatchdogSettings
+
+START = 1_000_000.0
+
+def watchdog(**settings):
+    return SensorWatchdog(WatchdogSettings(**settings), now=START)
+
+def temperature(sensor_id, habitat_id, battery=100.0):
+    return TemperatureReading(sensor_id, habitat_id, 20.0, timestamp=START, battery_level=battery)
+
+def test_new_ids_past_max_sensors_are_not_tracked():
+    dog = watchdog(max_sensors=2)
+    habitat = uuid4()
+    batch = [temperature("a", habitat), temperature("b", habitat), temperature("c", habitat, battery=3.0),
+             temperature("a", habitat, battery=10.0)]
+
+    findings = dog.observe(batch, START)
+    assert sorted(dog.index) == ["a", "b"]
+    assert dog.stats["readings_untracked"] == 1
+    # Positions still refer to the original batch
+    assert [(position, finding) for position, finding, _ in findings] == [(3, BATTERY_LOW)]
+    assert len(dog.wheel) == 2
+
+    # A forgotten sensor frees room for a new one
+    dog.forget_habitats([habitat])
+    dog.observe([temperature("c", habitat)], START)
+    assert list(dog.index) == ["c"]
+
+def test_forgetting_uses_the_habitat_and_dinosaur_index():
+    dog = watchdog()
+    kept, removed = uuid4(), uuid4()
+    dog.observe([
+        temperature("t-kept", kept),
+        temperature("t-removed", removed),
+        HeartRateReading("h-rex", kept, "rex", 80, timestamp=START),
+        HeartRateReading("h-blue", removed, "blue", 80, timestamp=START),
+    ], START)
+
+    dog.forget_habitats([removed])
+    assert sorted(dog.index) == ["h-rex", "t-kept"]
+    assert removed not in dog._by_habitat
+    assert "blue" not in dog._by_dinosaur
+
+    dog.forget_dinosaur("rex")
+    assert sorted(dog.index) == ["t-kept"]
+    assert dog._by_habitat == {kept: {dog.index["t-kept"]}}
+
+    page = dog.list_sensors(START, habitat_id=kept)
+    assert [sensor["sensor_id"] for sensor in page["sensors"]] == ["t-kept"]
+    assert dog.list_sensors(START, habitat_id=removed)["total"] == 0
+
+def test_silent_sensor_goes_stale_then_is_forgotten():
+    dog = watchdog(stale_after=10.0, forget_after=100.0)
+    habitat = uuid4()
+    dog.observe([temperature("t", habitat)], START)
+
+    assert dog.expire(START + 9, Park(name="Test"), {}) == []
+    alerts = dog.expire(START + 11, Park(name="Test"), {})
+    assert [alert.rule for alert in alerts] == ["sensor_stale"]
+    assert dog.stats["sensors_went_stale"] == 1
+
+    dog.expire(START + 111, Park(name="Test"), {})
+    assert len(dog) == 0
+    assert dog._by_habitat == {}
+    assert dog.stats["sensors_forgotten"] == 1